@@ -0,0 +1,47 @@
+import pytest
+
+from antidote import is_compiled, new_container, register
+from antidote.core import DependencyContainer
+
+
+def pytest_report_header(config):
+    return "antidote: {}".format("compiled" if is_compiled() else "pure python")
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Results of the Cython and pure Python builds must never be mixed up when
+    # comparing runs.
+    machine_info['antidote_compiled'] = is_compiled()
+
+
+class Service1:
+    pass
+
+
+class Service2:
+    def __init__(self, service1: Service1):
+        self.service1 = service1
+
+
+class Service3:
+    def __init__(self, service1: Service1, service2: Service2):
+        self.service1 = service1
+        self.service2 = service2
+
+
+class Service4:
+    def __init__(self, service1: Service1, service2: Service2, service3: Service3):
+        self.service1 = service1
+        self.service2 = service2
+        self.service3 = service3
+
+
+SERVICES = (Service1, Service2, Service3, Service4)
+
+
+@pytest.fixture()
+def container() -> DependencyContainer:
+    c = new_container()
+    for service in SERVICES:
+        register(service, container=c)
+    return c
@@ -0,0 +1,336 @@
+"""
+Multithreaded contention and scaling harness of the container.
+
+Each scenario is run with an increasing number of threads, every thread
+resolving dependencies in a loop, and reports the throughput, the latency
+percentiles of :code:`container.get()` and the time spent waiting on the
+instantiation lock:
+
+- :code:`steady`: mix of already instantiated singletons and non-singletons.
+- :code:`concurrent`: same as :code:`steady` with the non-singletons registered
+  with :code:`concurrent=True`, hence instantiated without the lock.
+- :code:`cold-start`: all threads request the same unbuilt singletons at the
+  same moment, right after the container has been created.
+
+Usage:
+
+.. code-block:: bash
+
+    python -m benchmarks.contention --threads 1,2,4,8 --json contention.json
+
+The lock wait time can only be measured with the pure Python build, the
+Cython one acquires the lock directly through fastrlock's C API. Throughput can
+only scale with the number of cores on free-threaded interpreters.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from antidote import factory, is_compiled, new_container, register
+from antidote.core import DependencyContainer
+
+perf_counter = time.perf_counter
+
+
+class TimedLock:
+    """
+    Wraps the instantiation lock of the pure Python container to measure how
+    long each thread waits for it.
+    """
+
+    def __init__(self, lock):
+        self._lock = lock
+        self._local = threading.local()
+
+    @property
+    def wait(self) -> float:
+        return getattr(self._local, 'wait', 0.)
+
+    def reset(self):
+        self._local.wait = 0.
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self._local.wait = self.wait + perf_counter() - start
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def _is_owned(self):
+        return self._lock._is_owned()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class ThreadResult:
+    def __init__(self, latencies: List[float], lock_wait: Optional[float]):
+        self.latencies = latencies
+        self.lock_wait = lock_wait
+
+
+def time_lock(container: DependencyContainer) -> Optional[TimedLock]:
+    if is_compiled():
+        return None
+    lock = TimedLock(container._instantiation_lock)
+    container._instantiation_lock = lock
+    return lock
+
+
+def steady_scenario(singletons: int, non_singletons: int, work: float,
+                    concurrent: bool = False):
+    """
+    Returns a container and the dependencies to retrieve, the singletons
+    already instantiated.
+    """
+    container = new_container()
+
+    class Config:
+        pass
+
+    register(Config, container=container)
+    dependencies = []  # type: List[Any]
+    for i in range(singletons):
+        dependencies.append(register(type('Singleton{}'.format(i), (), {}),
+                                     container=container))
+
+    for i in range(non_singletons):
+        dependencies.append(register(_service('Service{}'.format(i), Config, work),
+                                     singleton=False,
+                                     concurrent=concurrent,
+                                     container=container))
+
+    for dependency in dependencies:
+        container.get(dependency)
+
+    return container, dependencies
+
+
+def concurrent_scenario(singletons: int, non_singletons: int, work: float):
+    return steady_scenario(singletons, non_singletons, work, concurrent=True)
+
+
+def cold_start_scenario(singletons: int, non_singletons: int, work: float):
+    """
+    Returns a container and the dependencies to retrieve, none of them being
+    instantiated. Each singleton depends on the previous one, which is built
+    by a factory, to keep the instantiation lock held for longer.
+    """
+    container = new_container()
+
+    class Config:
+        pass
+
+    @factory(container=container)
+    def build_config() -> Config:
+        _spin(work)
+        return Config()
+
+    dependencies = []  # type: List[Any]
+    previous = Config
+    for i in range(singletons):
+        previous = register(_service('Singleton{}'.format(i), previous, work),
+                            container=container)
+        dependencies.append(previous)
+
+    for i in range(non_singletons):
+        dependencies.append(register(_service('Service{}'.format(i), Config, work),
+                                     singleton=False,
+                                     container=container))
+
+    return container, dependencies
+
+
+# name -> (scenario, whether each dependency is only requested once per thread)
+SCENARIOS = {
+    'steady': (steady_scenario, False),
+    'concurrent': (concurrent_scenario, False),
+    'cold-start': (cold_start_scenario, True),
+}  # type: Dict[str, Tuple[Callable, bool]]
+
+
+def run(scenario: Callable,
+        n_threads: int,
+        rounds: int,
+        operations: Optional[int],
+        singletons: int,
+        non_singletons: int,
+        work: float) -> Dict[str, Any]:
+    """
+    Runs the scenario :code:`rounds` times with a new container each time.
+    Every thread retrieves :code:`operations` dependencies, or each dependency
+    once if None.
+    """
+    latencies = []  # type: List[float]
+    elapsed = 0.
+    lock_wait = 0.
+    timed = False
+    for _ in range(rounds):
+        container, dependencies = scenario(singletons, non_singletons, work)
+        lock = time_lock(container)
+        timed = lock is not None
+        results, round_elapsed = _run_threads(container, lock, dependencies,
+                                              n_threads,
+                                              operations or len(dependencies))
+        elapsed += round_elapsed
+        for result in results:
+            latencies.extend(result.latencies)
+            lock_wait += result.lock_wait or 0.
+
+    latencies.sort()
+    return {
+        'threads': n_threads,
+        'operations': len(latencies),
+        'elapsed': elapsed,
+        'ops_per_second': len(latencies) / elapsed,
+        'p50': _percentile(latencies, 0.50),
+        'p99': _percentile(latencies, 0.99),
+        'max': latencies[-1],
+        'lock_wait': lock_wait if timed else None,
+        'lock_wait_ratio': lock_wait / (elapsed * n_threads) if timed else None,
+    }
+
+
+def _run_threads(container: DependencyContainer,
+                 lock: Optional[TimedLock],
+                 dependencies: List[Any],
+                 n_threads: int,
+                 operations: int):
+    # All threads request the same dependencies in the same order, maximizing
+    # the contention.
+    sequence = [dependencies[i % len(dependencies)] for i in range(operations)]
+    barrier = threading.Barrier(n_threads + 1)
+    results = [ThreadResult([], None)] * n_threads
+
+    def worker(index: int):
+        get = container.get
+        latencies = []  # type: List[float]
+        append = latencies.append
+        if lock is not None:
+            lock.reset()
+        barrier.wait()
+        for dependency in sequence:
+            start = perf_counter()
+            get(dependency)
+            append(perf_counter() - start)
+        results[index] = ThreadResult(latencies,
+                                      lock.wait if lock is not None else None)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    return results, perf_counter() - start
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.contention',
+                                     description=__doc__.split('\n\n')[1])
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help="Scenarios to run, all of them by default.")
+    parser.add_argument('--threads', type=_int_list,
+                        default=_powers_of_two(os.cpu_count() or 1),
+                        help="Comma separated numbers of threads. Defaults to "
+                             "powers of two up to twice the number of cores.")
+    parser.add_argument('--operations', type=int, default=10000,
+                        help="Dependencies retrieved per thread in the steady "
+                             "scenario.")
+    parser.add_argument('--rounds', type=int, default=20,
+                        help="Number of cold starts.")
+    parser.add_argument('--singletons', type=int, default=40)
+    parser.add_argument('--non-singletons', type=int, default=10)
+    parser.add_argument('--work', type=float, default=0.,
+                        help="Seconds spent instantiating each service.")
+    parser.add_argument('--json', help="File in which results are written.")
+    args = parser.parse_args(argv)
+
+    machine = {
+        'python': sys.version,
+        'antidote_compiled': is_compiled(),
+        'cpu_count': os.cpu_count(),
+        # Python 3.13+, always enabled before.
+        'gil_enabled': getattr(sys, '_is_gil_enabled', lambda: True)(),
+    }
+    print("Python {python}\nAntidote compiled: {antidote_compiled}, "
+          "{cpu_count} cores, GIL enabled: {gil_enabled}".format(**machine))
+
+    report = dict(machine=machine, scenarios={})  # type: Dict[str, Any]
+    for name in args.scenario or sorted(SCENARIOS):
+        print("\n{}".format(name))
+        print("{:>8} {:>12} {:>8} {:>10} {:>10} {:>10}".format(
+            'threads', 'ops/s', 'scaling', 'p50 (us)', 'p99 (us)', 'lock wait'))
+        results = []  # type: List[Dict[str, Any]]
+        for n_threads in args.threads:
+            scenario, cold = SCENARIOS[name]
+            result = run(scenario, n_threads,
+                         rounds=args.rounds if cold else 1,
+                         operations=None if cold else args.operations,
+                         singletons=args.singletons,
+                         non_singletons=args.non_singletons,
+                         work=args.work)
+            result['scaling'] = result['ops_per_second'] / (
+                results[0]['ops_per_second'] if results else result['ops_per_second'])
+            results.append(result)
+            print("{:>8} {:>12.0f} {:>8.2f} {:>10.2f} {:>10.2f} {:>10}".format(
+                n_threads,
+                result['ops_per_second'],
+                result['scaling'],
+                result['p50'] * 1e6,
+                result['p99'] * 1e6,
+                ('{:.1%}'.format(result['lock_wait_ratio'])
+                 if result['lock_wait_ratio'] is not None else 'n/a')))
+        report['scenarios'][name] = results
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    return 0
+
+
+def _service(name: str, dependency: type, work: float) -> type:
+    def __init__(self, dependency: dependency):  # type: ignore
+        _spin(work)
+        self.dependency = dependency
+
+    return type(name, (), {'__init__': __init__})
+
+
+def _spin(duration: float):
+    # Busy loop instead of sleep, to hold the GIL like real instantiation code.
+    if duration > 0:
+        end = perf_counter() + duration
+        while perf_counter() < end:
+            pass
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',')]
+
+
+def _powers_of_two(cores: int) -> List[int]:
+    threads = [1]
+    while threads[-1] < 2 * cores:
+        threads.append(threads[-1] * 2)
+    return threads
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Memory footprint of Antidote, measured with :py:mod:`tracemalloc`:
+
+- bytes per registered service, with :py:func:`~antidote.register`,
+- bytes per singleton once instantiated, the instance itself excluded,
+- bytes per injected function, with :py:func:`~antidote.inject`,
+
+followed by :py:meth:`~antidote.core.DependencyContainer.memory_report` of
+the container.
+
+Usage:
+
+.. code-block:: bash
+
+    python -m benchmarks.memory --count 10000 --json memory.json
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence
+
+from antidote import inject, is_compiled, new_container, register
+
+
+class Dependency:
+    pass
+
+
+def make_services(count: int) -> List[type]:
+    def __init__(self, dependency: Dependency):
+        self.dependency = dependency
+
+    return [type('Service{}'.format(i), (), {'__init__': __init__})
+            for i in range(count)]
+
+
+def make_functions(count: int) -> List[Callable]:
+    functions = []
+    for i in range(count):
+        def f(a: Dependency, b: Dependency, c=None, d=None):
+            return a, b, c, d
+
+        f.__name__ = f.__qualname__ = 'f{}'.format(i)
+        functions.append(f)
+    return functions
+
+
+def measure(action: Callable[[], Any]) -> int:
+    """
+    Returns the number of bytes still allocated after the action.
+    """
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = action()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    del result
+    return size
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.memory',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=10000,
+                        help="Number of services and injected functions.")
+    parser.add_argument('--json', help="File in which results are written.")
+    args = parser.parse_args(argv)
+    count = args.count
+
+    container = new_container()
+    register(Dependency, container=container)
+    services = make_services(count)
+    functions = make_functions(count)
+    dependency = container.get(Dependency)
+    instances = []  # type: List[Any]
+    injected = []  # type: List[Callable]
+
+    tracemalloc.start()
+    registration = measure(lambda: [register(s, container=container)
+                                    for s in services])
+    instantiation = measure(lambda: [container.get(s) for s in services])
+    # Instances are owned by the application, a similar object is created for
+    # each service to deduct their size.
+    instantiation -= measure(lambda: instances.extend(s(dependency)
+                                                      for s in services))
+    injection = measure(lambda: injected.extend(inject(f, container=container)
+                                                for f in functions))
+    tracemalloc.stop()
+
+    results = {
+        'registration': registration / count,
+        'singleton': instantiation / count,
+        'injection': injection / count,
+    }  # type: Dict[str, Any]
+    report = container.memory_report()
+
+    print("Python {}\nAntidote compiled: {}".format(sys.version, is_compiled()))
+    print("\nBytes per")
+    for name, size in results.items():
+        print("  {:<14} {:>10.0f}".format(name, size))
+    print("\nMemory report for {} services and injected functions".format(count))
+    for name, size in report.items():
+        print("  {:<18} {:>10.1f} kB".format(name, size / 1024))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(dict(machine={'python': sys.version,
+                                    'antidote_compiled': is_compiled()},
+                           count=count,
+                           bytes_per=results,
+                           memory_report=report),
+                      file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Startup benchmark of synthetic applications of increasing size.
+
+For each size, an application is generated with :code:`benchmarks.synthetic`
+and started in a new interpreter to measure:
+
+- :code:`import`: import of all the modules, hence registration of all the
+  services.
+- :code:`first`: first retrieval of the service with the deepest dependency
+  graph.
+- :code:`warm-up`: retrieval of all the services and tags afterwards.
+
+Antidote itself is imported before any measure and the generated modules are
+already compiled to bytecode.
+
+Usage:
+
+.. code-block:: bash
+
+    python -m benchmarks.startup --services 100,1000,10000 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+from antidote import is_compiled
+from .synthetic import generate_app
+
+METRICS = ('import', 'first', 'warm-up')
+
+
+def measure(package: str, manifest_path: str = None) -> Dict[str, float]:
+    """
+    Starts the application, meant to be executed in a new interpreter.
+    """
+    import importlib
+    from antidote import manifest
+
+    start = time.perf_counter()
+    if manifest_path:
+        with manifest(manifest_path):
+            app = importlib.import_module(package + '.app')
+    else:
+        app = importlib.import_module(package + '.app')
+    imported = time.perf_counter()
+    app.container.get(app.ENTRY)
+    first = time.perf_counter()
+    for dependency in app.DEPENDENCIES:
+        app.container.get(dependency)
+    warm = time.perf_counter()
+
+    return {'import': imported - start,
+            'first': first - imported,
+            'warm-up': warm - first}
+
+
+def run(directory: str, package: str, manifest_path: str = None) -> Dict[str, float]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([directory] + [p or os.getcwd()
+                                                       for p in sys.path])
+    code = ("import json, sys\n"
+            "from benchmarks.startup import measure\n"
+            "json.dump(measure(sys.argv[1], sys.argv[2] or None), sys.stdout)")
+    output = subprocess.check_output(
+        [sys.executable, '-c', code, package, manifest_path or ''], env=env)
+    return json.loads(output.decode())
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('--services', default='100,1000,10000',
+                        help="Comma separated numbers of services.")
+    parser.add_argument('--services-per-module', type=int, default=20)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Number of starts per size, the median is reported.")
+    parser.add_argument('--manifest', action='store_true',
+                        help="Start the application with a manifest, filled "
+                             "beforehand.")
+    parser.add_argument('--json', help="File in which results are written.")
+    args = parser.parse_args(argv)
+
+    print("Python {}\nAntidote compiled: {}".format(sys.version, is_compiled()))
+    print("{:>9} {:>12} {:>12} {:>12} {:>12}".format(
+        'services', 'import (ms)', 'first (ms)', 'warm-up (ms)', 'total (ms)'))
+
+    results = []  # type: List[Dict[str, Any]]
+    for services in (int(s) for s in args.services.split(',')):
+        with tempfile.TemporaryDirectory() as directory:
+            package = 'synthetic_app_{}'.format(services)
+            generate_app(directory, package,
+                         services=services,
+                         modules=max(1, services // args.services_per_module),
+                         depth=min(args.depth, services),
+                         fan_out=args.fan_out)
+            manifest_path = None
+            if args.manifest:
+                manifest_path = os.path.join(directory, 'app.antidote')
+            # Discarded start, writing the .pyc files and the manifest.
+            run(directory, package, manifest_path)
+
+            starts = [run(directory, package, manifest_path)
+                      for _ in range(args.repeat)]
+
+        result = {'services': services}  # type: Dict[str, Any]
+        for metric in METRICS:
+            result[metric] = statistics.median(start[metric] for start in starts)
+        results.append(result)
+        print("{:>9} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+            services, *(1e3 * result[metric] for metric in METRICS),
+            1e3 * sum(result[metric] for metric in METRICS)))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(dict(machine={'python': sys.version,
+                                    'antidote_compiled': is_compiled()},
+                           options=vars(args),
+                           results=results),
+                      file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
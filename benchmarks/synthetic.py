@@ -0,0 +1,215 @@
+"""
+Generator of synthetic applications, used to measure how Antidote behaves with
+large dependency graphs.
+
+The generated package contains :code:`modules` modules sharing one container
+and :code:`services` services spread over :code:`depth` layers. Each service
+depends on :code:`fan_out` services of the previous layer and is declared in
+one of the following ways, in turn:
+
+- :py:func:`~antidote.register`,
+- :py:func:`~antidote.factory`,
+- :py:func:`~antidote.register` with a tag of its layer,
+- :py:func:`~antidote.implements` of an interface, on which others depend,
+- :py:func:`~antidote.register` also depending on a constant of the
+  module's :py:class:`~antidote.LazyConstantsMeta` configuration.
+
+Its :code:`app` module imports everything and defines :code:`container`,
+:code:`ENTRY`, the last service, and :code:`DEPENDENCIES`, all services and
+tags.
+
+Usage:
+
+.. code-block:: bash
+
+    python -m benchmarks.synthetic /tmp/apps --services 1000 --modules 50
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Dict, List, Sequence
+
+KINDS = ('register', 'factory', 'tag', 'implements', 'constants')
+
+
+class _Service:
+    def __init__(self, index: int, module: int, layer: int, dependencies: List[int]):
+        self.index = index
+        self.module = module
+        self.layer = layer
+        self.dependencies = dependencies
+        self.kind = KINDS[index % len(KINDS)]
+
+    @property
+    def name(self) -> str:
+        return 'Service{}'.format(self.index)
+
+    @property
+    def dependency(self) -> str:
+        """Name of the dependency to request for this service."""
+        if self.kind == 'implements':
+            return 'IService{}'.format(self.index)
+        return self.name
+
+
+def generate_app(directory: str,
+                 package: str = 'synthetic_app',
+                 services: int = 100,
+                 modules: int = 10,
+                 depth: int = 5,
+                 fan_out: int = 3,
+                 seed: int = 0) -> str:
+    """
+    Writes the package of the synthetic application in the directory and
+    returns its path.
+
+    Args:
+        directory: Directory in which the package is created. It must be added
+            to :py:data:`sys.path` to import the application.
+        package: Name of the package.
+        services: Number of services.
+        modules: Number of modules, services are evenly spread between them.
+        depth: Number of layers of the dependency graph.
+        fan_out: Number of dependencies of each service, except those of the
+            first layer which have none.
+        seed: Seed used to pick the dependencies.
+    """
+    if not (0 < modules <= services and 0 < depth <= services and fan_out >= 0):
+        raise ValueError("Expected 0 < modules <= services, 0 < depth <= services "
+                         "and fan_out >= 0.")
+
+    rng = random.Random(seed)
+    layers = [[] for _ in range(depth)]  # type: List[List[int]]
+    nodes = []  # type: List[_Service]
+    for index in range(services):
+        layer = index * depth // services
+        previous = layers[layer - 1] if layer > 0 else []
+        dependencies = sorted(rng.sample(previous, min(fan_out, len(previous))))
+        nodes.append(_Service(index, index * modules // services, layer, dependencies))
+        layers[layer].append(index)
+
+    path = os.path.join(directory, package)
+    os.makedirs(path, exist_ok=True)
+    _write(path, '__init__', '')
+    _write(path, 'base', "from antidote import new_container\n\n"
+                         "container = new_container()\n")
+
+    by_module = {}  # type: Dict[int, List[_Service]]
+    for node in nodes:
+        by_module.setdefault(node.module, []).append(node)
+
+    for module, module_nodes in by_module.items():
+        _write(path, 'module_{}'.format(module), _module(module, module_nodes, nodes))
+
+    lines = ["from antidote import Tagged", "from .base import container"]
+    lines.extend("from . import module_{}".format(module) for module in by_module)
+    lines.append("")
+    entry = nodes[-1]
+    lines.append("ENTRY = module_{}.{}\n".format(entry.module, entry.dependency))
+    lines.append("DEPENDENCIES = [")
+    lines.extend("    module_{}.{},".format(node.module, node.dependency)
+                 for node in nodes)
+    lines.extend("    Tagged('layer{}'),".format(layer) for layer in range(depth))
+    lines.append("]\n")
+    _write(path, 'app', "\n".join(lines))
+    return path
+
+
+def _module(module: int, module_nodes: List[_Service], nodes: List[_Service]) -> str:
+    imported = sorted(set(nodes[d].module
+                          for node in module_nodes
+                          for d in node.dependencies
+                          if nodes[d].module != module))
+    lines = ["from antidote import factory, implements, LazyConstantsMeta, register",
+             "from .base import container"]
+    lines.extend("from . import module_{}".format(m) for m in imported)
+
+    lines.append("\n\nclass Conf(metaclass=LazyConstantsMeta, container=container):")
+    for node in module_nodes:
+        if node.kind == 'constants':
+            lines.append("    SETTING_{0} = 'setting_{0}'".format(node.index))
+    lines.append("\n    def get(self, key):\n        return key")
+
+    for node in module_nodes:
+        arguments = []
+        for i, d in enumerate(node.dependencies):
+            target = nodes[d]
+            if target.module == module:
+                arguments.append('a{}: {}'.format(i, target.dependency))
+            else:
+                arguments.append('a{}: module_{}.{}'.format(i, target.module,
+                                                            target.dependency))
+        names = ['a{}'.format(i) for i in range(len(node.dependencies))]
+        lines.append('\n')
+        lines.append(_SERVICE_TEMPLATES[node.kind].format(
+            name=node.name,
+            index=node.index,
+            layer=node.layer,
+            arguments=''.join(', ' + a for a in arguments),
+            signature=', '.join(arguments),
+            names=''.join(n + ', ' for n in names)
+        ))
+
+    return "\n".join(lines) + "\n"
+
+
+_SERVICE_TEMPLATES = {
+    'register': '''@register(container=container)
+class {name}:
+    def __init__(self{arguments}):
+        self.dependencies = ({names})''',
+    'factory': '''class {name}:
+    def __init__(self, *dependencies):
+        self.dependencies = dependencies
+
+
+@factory(container=container)
+def build_{index}({signature}) -> {name}:
+    return {name}({names})''',
+    'tag': '''@register(container=container, tags=['layer{layer}'])
+class {name}:
+    def __init__(self{arguments}):
+        self.dependencies = ({names})''',
+    'implements': '''class I{name}:
+    pass
+
+
+@implements(I{name}, container=container)
+@register(container=container)
+class {name}(I{name}):
+    def __init__(self{arguments}):
+        self.dependencies = ({names})''',
+    'constants': '''@register(container=container,
+          dependencies=dict(setting=Conf.SETTING_{index}))
+class {name}:
+    def __init__(self, setting{arguments}):
+        self.setting = setting
+        self.dependencies = ({names})''',
+}
+
+
+def _write(path: str, module: str, source: str):
+    with open(os.path.join(path, module + '.py'), 'w') as file:
+        file.write(source)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument('directory')
+    parser.add_argument('--package', default='synthetic_app')
+    parser.add_argument('--services', type=int, default=100)
+    parser.add_argument('--modules', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(generate_app(args.directory, args.package, args.services, args.modules,
+                       args.depth, args.fan_out, args.seed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
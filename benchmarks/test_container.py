@@ -0,0 +1,102 @@
+import enum
+
+import pytest
+
+from antidote import (Build, implements, LazyCall, register, Tag, Tagged)
+from antidote.core import ProxyContainer
+from antidote.providers import IndirectProvider
+from .conftest import Service1, Service4
+
+
+def test_singleton(benchmark, container):
+    service = container.get(Service4)
+    assert service is benchmark(container.get, Service4)
+
+
+def test_non_singleton(benchmark, container):
+    class Service:
+        def __init__(self, service1: Service1):
+            self.service1 = service1
+
+    register(Service, singleton=False, container=container)
+    assert isinstance(benchmark(container.get, Service), Service)
+
+
+def test_build(benchmark, container):
+    dependency = Build(Service4, service1=Service1())
+    assert isinstance(benchmark(container.get, dependency), Service4)
+
+
+@pytest.mark.parametrize('singleton', [True, False])
+def test_lazy_call(benchmark, container, singleton):
+    dependency = LazyCall(Service1, singleton=singleton)
+    assert isinstance(benchmark(container.get, dependency), Service1)
+
+
+@pytest.mark.parametrize('n', [1, 10, 100])
+def test_tagged(benchmark, container, n):
+    for _ in range(n):
+        register(type('Service', (), {}), tags=[Tag('tag')], container=container)
+
+    def get_instances():
+        return list(container.get(Tagged('tag')).instances())
+
+    assert n == len(benchmark(get_instances))
+
+
+def test_tagged_where(benchmark, container):
+    for i in range(100):
+        register(type('Service', (), {}), tags=[Tag('tag', group=i % 10)],
+                 container=container)
+
+    def get_instances():
+        return list(container.get(Tagged('tag', where=dict(group=1))).instances())
+
+    assert 10 == len(benchmark(get_instances))
+
+
+class Profile(enum.Enum):
+    A = 'A'
+    B = 'B'
+
+
+class IService:
+    pass
+
+
+@pytest.mark.parametrize('cache_state', [False, True])
+def test_stateful_implements(benchmark, container, cache_state):
+    container.update_singletons({Profile: Profile.A})
+
+    @implements(IService, state=Profile.A, cache_state=cache_state,
+                container=container)
+    @register(container=container)
+    class ServiceA(IService):
+        pass
+
+    @implements(IService, state=Profile.B, cache_state=cache_state,
+                container=container)
+    @register(container=container)
+    class ServiceB(IService):
+        pass
+
+    assert isinstance(benchmark(container.get, IService), ServiceA)
+
+
+def test_stateful_implements_state_var(benchmark, container):
+    contextvars = pytest.importorskip('contextvars')
+    state = contextvars.ContextVar('state', default=Profile.A)
+    container.providers[IndirectProvider].register_state_var(Profile, state)
+
+    @implements(IService, state=Profile.A, container=container)
+    @register(container=container)
+    class ServiceA(IService):
+        pass
+
+    assert isinstance(benchmark(container.get, IService), ServiceA)
+
+
+@pytest.mark.parametrize('n', [0, 100])
+def test_proxy_container_creation(benchmark, container, n):
+    container.update_singletons({i: object() for i in range(n)})
+    benchmark(ProxyContainer, container, dependencies={Service1: Service1()})
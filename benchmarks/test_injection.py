@@ -0,0 +1,41 @@
+import pytest
+
+from antidote import inject
+from .conftest import Service1, Service2, Service3, Service4, SERVICES
+
+
+def f(s1: Service1, s2: Service2, s3: Service3, s4: Service4):
+    return s1, s2, s3, s4
+
+
+@pytest.fixture()
+def services(container):
+    return tuple(container.get(service) for service in SERVICES)
+
+
+def test_no_injection(benchmark, services):
+    benchmark(f, *services)
+
+
+def test_all_injected(benchmark, container, services):
+    injected_f = inject(f, container=container)
+    assert services == benchmark(injected_f)
+
+
+def test_none_injected(benchmark, container, services):
+    injected_f = inject(f, container=container)
+    assert services == benchmark(injected_f, *services)
+
+
+def test_partially_injected(benchmark, container, services):
+    injected_f = inject(f, container=container)
+    assert services == benchmark(injected_f, *services[:2])
+
+
+def test_injected_instantiation(benchmark, container, services):
+    class Obj:
+        @inject(container=container)
+        def __init__(self, s1: Service1, s2: Service2, s3: Service3, s4: Service4):
+            self.services = (s1, s2, s3, s4)
+
+    assert services == benchmark(Obj).services
@@ -1,5 +1,6 @@
 import os
 import pathlib
+import sysconfig
 
 from setuptools import Extension, find_packages, setup
 
@@ -29,8 +30,11 @@ setup_requires = ['setuptools_scm']
 try:
     from Cython.Build import cythonize
 except ImportError:
-    pass
-else:
+    cythonize = None
+
+# The extensions rely on the GIL, through fastrlock and borrowed references, so
+# free-threaded interpreters use the pure Python implementation.
+if cythonize is not None and not sysconfig.get_config_var('Py_GIL_DISABLED'):
     ext_modules = cythonize(generate_extensions())
     requires.append('fastrlock>=0.4,<0.5')
     setup_requires.append('fastrlock>=0.4,<0.5')
@@ -1,6 +1,7 @@
-from .core import inject
-from .helpers import (factory, implements, LazyConstantsMeta, new_container, provider,
-                      register, wire)
+from .core import inject, PoolSpec
+from .helpers import (compile_container, factory, implements, invalidate_constants,
+                      LazyConstantsMeta, load_compiled, manifest, new_container,
+                      provider, register, register_lazy, wire)
 from .providers.lazy import LazyCall, LazyMethodCall
 from .providers.factory import Build
 from .providers.tag import Tag, Tagged, TaggedDependencies
@@ -17,16 +18,22 @@ def __version__() -> str:  # pragma: no cover
 
 
 __all__ = ['Build',
+           'compile_container',
            'factory',
            'implements',
            'inject',
+           'invalidate_constants',
            'is_compiled',
            'LazyCall',
            'LazyConstantsMeta',
            'LazyMethodCall',
+           'load_compiled',
+           'manifest',
            'new_container',
+           'PoolSpec',
            'provider',
            'register',
+           'register_lazy',
            'Tag',
            'Tagged',
            'TaggedDependencies',
@@ -0,0 +1,43 @@
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+from .helpers.compiler import compile_container
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m antidote')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    compile_parser = commands.add_parser(
+        'compile',
+        help="Generate a module resolving the registered dependencies ahead "
+             "of time."
+    )
+    compile_parser.add_argument(
+        'target',
+        help="Module registering all the dependencies, optionally followed by "
+             "the container: 'package.module[:container]'. The global "
+             "container is used by default."
+    )
+    compile_parser.add_argument('-o', '--output',
+                                help="Output file, defaults to stdout.")
+
+    args = parser.parse_args(argv)
+    module_name, _, container_name = args.target.partition(':')
+    module = importlib.import_module(module_name)
+    container = getattr(module, container_name) if container_name else None
+    source = compile_container(container)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(source)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import inspect
-from typing import Callable, get_type_hints, Iterator, Sequence, Union
+from typing import Callable, get_type_hints, Iterable, Iterator, Sequence, Set, Union
+
+from .manifest import current_manifest
 
 
 class Argument:
@@ -28,6 +30,12 @@ class Arguments:
 
     @classmethod
     def _build(cls, func: Callable, unbound_method: bool) -> 'Arguments':
+        manifest = current_manifest()
+        if manifest is not None:
+            record = manifest.get(func)
+            if record is not None:
+                return cls._from_record(record, unbound_method)
+
         arguments = []
         has_var_positional = False
         has_var_keyword = False
@@ -50,26 +58,53 @@ class Arguments:
                     type_hint=type_hints.get(name)
                 ))
 
-        return Arguments(arguments=tuple(arguments),
+        result = Arguments(arguments=tuple(arguments),
+                           has_var_positional=has_var_positional,
+                           has_var_keyword=has_var_keyword,
+                           has_self=unbound_method,
+                           return_type_hint=type_hints.get('return'))
+
+        if manifest is not None:
+            manifest.set(func, result._to_record(),
+                         modules=_hint_modules(type_hints.values()))
+
+        return result
+
+    @classmethod
+    def _from_record(cls, record: tuple, unbound_method: bool) -> 'Arguments':
+        arguments, has_var_positional, has_var_keyword, return_type_hint = record
+        return Arguments(arguments=tuple(Argument(*arg) for arg in arguments),
                          has_var_positional=has_var_positional,
                          has_var_keyword=has_var_keyword,
-                         has_self=unbound_method)
+                         has_self=unbound_method,
+                         return_type_hint=return_type_hint)
+
+    def _to_record(self) -> tuple:
+        """ Picklable representation stored in the manifest. """
+        return (tuple((arg.name, arg.has_default, arg.type_hint)
+                      for arg in self.arguments),
+                self.has_var_positional,
+                self.has_var_keyword,
+                self.return_type_hint)
 
     def __init__(self,
                  arguments: Sequence[Argument],
                  has_var_positional: bool,
                  has_var_keyword: bool,
-                 has_self: bool):
+                 has_self: bool,
+                 return_type_hint=None):
         self.arguments = arguments
         self.name_to_argument = dict(((arg.name, arg)
                                       for arg in arguments))
         self.has_var_positional = has_var_positional
         self.has_var_keyword = has_var_keyword
         self.has_self = has_self
+        self.return_type_hint = return_type_hint
 
         if has_self:
             self.without_self = Arguments(self.arguments[1:], self.has_var_positional,
-                                          self.has_var_keyword, has_self=False)
+                                          self.has_var_keyword, has_self=False,
+                                          return_type_hint=return_type_hint)
         else:
             self.without_self = self
 
@@ -123,3 +158,21 @@ def is_unbound_method(func: Union[Callable, staticmethod, classmethod]) -> bool:
             and not inspect.ismethod(func)
             # not nested function
             and not func.__qualname__[:-len(func.__name__)].endswith("<locals>."))
+
+
+def _hint_modules(type_hints: Iterable) -> Set[str]:
+    """
+    Returns the modules defining the type hints, including the arguments of
+    generic ones such as :code:`List[Service]`.
+    """
+    modules = set()  # type: Set[str]
+    pending = list(type_hints)
+    while pending:
+        hint = pending.pop()
+        module = getattr(hint, '__module__', None)
+        if isinstance(module, str):
+            modules.add(module)
+        args = getattr(hint, '__args__', None)
+        if isinstance(args, tuple):
+            pending.extend(args)
+    return modules
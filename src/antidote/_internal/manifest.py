@@ -0,0 +1,210 @@
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Bumped whenever the format of the records changes.
+_FORMAT_VERSION = 3
+
+_current = None  # type: Optional[Manifest]
+
+
+def current_manifest() -> Optional['Manifest']:
+    return _current
+
+
+def set_current_manifest(manifest: Optional['Manifest']) -> Optional['Manifest']:
+    """
+    Activates the given manifest, or disables it if None, and returns the
+    previous one.
+    """
+    global _current
+    previous, _current = _current, manifest
+    return previous
+
+
+class Manifest:
+    """
+    On-disk cache of records computed from functions, similar to .pyc files.
+    Records are grouped by source file and are invalidated as soon as the
+    modification time or the size of the file changes. Each record may also
+    depend on the source files of other modules, typically those defining the
+    type hints, which are checked in the same way.
+
+    Each record is pickled independently and only unpickled when requested.
+    Type hints are pickled by reference, so this ensures that loading the
+    manifest does not import modules which are not used.
+
+    This class is not part of the public API.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # file name -> (mtime_ns, size, {(qualname, first line, bound): (
+        #     pickled record, ((file name, mtime_ns, size), ...))})
+        self._files = {}  # type: Dict[str, Tuple[int, int, Dict[Any, tuple]]]
+        # file name -> (mtime_ns, size) or None if it does not exist, retrieved
+        # once per manifest.
+        self._stats = {}  # type: Dict[str, Optional[Tuple[int, int]]]
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'Manifest':
+        """
+        Loads the manifest at the given path. A missing, corrupted or outdated
+        file results in an empty manifest.
+        """
+        manifest = cls(path)
+        try:
+            with open(path, 'rb') as file:
+                header, files = pickle.load(file)
+        except Exception:
+            return manifest
+
+        if header == _header():
+            manifest._files = files
+        return manifest
+
+    def dump(self):
+        """
+        Writes the manifest if it changed. The file is replaced atomically so
+        concurrent processes never read a partially written manifest.
+        """
+        if not self._dirty:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.antidote-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump((_header(), self._files), file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._dirty = False
+
+    def get(self, func: Callable) -> Any:
+        """
+        Returns the record stored for the function or None if there is none or
+        if it is outdated.
+        """
+        key = self._key(func)
+        if key is None:
+            return None
+
+        filename, record_key = key
+        records = self._records(filename)
+        if records is None:
+            return None
+
+        try:
+            data, dependencies = records[record_key]
+        except KeyError:
+            return None
+
+        if any(self._stat(filename) != (mtime_ns, size)
+               for filename, mtime_ns, size in dependencies):
+            del records[record_key]
+            self._dirty = True
+            return None
+
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # Whatever was referenced does not exist anymore.
+            del records[record_key]
+            self._dirty = True
+            return None
+
+    def set(self, func: Callable, record: Any, modules: Iterable[str] = ()):
+        """
+        Stores the record for the function. Nothing is stored if the function
+        cannot be reliably identified or if the record cannot be pickled.
+        The record is also invalidated whenever the source file of one of the
+        given modules changes.
+        """
+        key = self._key(func)
+        if key is None:
+            return
+
+        filename, record_key = key
+        records = self._records(filename)
+        if records is None:
+            return
+
+        try:
+            data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        dependencies = []
+        for name in sorted(set(modules)):
+            dependency = getattr(sys.modules.get(name), '__file__', None)
+            if dependency is None or dependency == filename:
+                continue
+            stat = self._stat(dependency)
+            if stat is None:
+                return
+            dependencies.append((dependency,) + stat)
+
+        records[record_key] = (data, tuple(dependencies))
+        self._dirty = True
+
+    def _records(self, filename: str) -> Optional[Dict[Any, tuple]]:
+        entry = self._files.get(filename)
+        stat = self._stat(filename)
+        if stat is None:
+            self._files.pop(filename, None)
+            return None
+
+        if entry is None or entry[:2] != stat:
+            entry = stat + ({},)
+            self._files[filename] = entry
+            self._dirty = True
+
+        return entry[2]
+
+    def _stat(self, filename: str) -> Optional[Tuple[int, int]]:
+        try:
+            return self._stats[filename]
+        except KeyError:
+            pass
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            result = None  # type: Optional[Tuple[int, int]]
+        else:
+            result = (stat.st_mtime_ns, stat.st_size)
+        self._stats[filename] = result
+        return result
+
+    @staticmethod
+    def _key(func: Callable) -> Optional[Tuple[str, Tuple[str, int, bool]]]:
+        # Bound methods, possibly wrapped, do not have the same arguments as
+        # their function.
+        methods = [inspect.ismethod(func)]
+        func = inspect.unwrap(func, stop=lambda f: methods.append(inspect.ismethod(f)))
+        bound = any(methods) or inspect.ismethod(func)
+        if isinstance(func, (staticmethod, classmethod)):
+            func = func.__func__
+
+        code = getattr(func, '__code__', None)
+        qualname = getattr(func, '__qualname__', None)
+        if code is None or not isinstance(qualname, str):
+            return None
+
+        # Functions defined in other functions, and lambdas, may share the same
+        # name and line while having different annotations.
+        if '<locals>' in qualname or '<lambda>' in qualname:
+            return None
+
+        return code.co_filename, (qualname, code.co_firstlineno, bound)
+
+
+def _header() -> Tuple[int, str]:
+    return _FORMAT_VERSION, sys.implementation.cache_tag
@@ -0,0 +1,99 @@
+import gc
+import sys
+from typing import Any, Dict, Iterable, List
+
+_CONTAINERS = (dict, list, tuple, set, frozenset)
+
+
+def deep_sizeof(*objects, exclude: Iterable = ()) -> int:
+    """
+    Returns the memory, in bytes, used by the objects and everything they
+    hold which belongs to Antidote: builtin containers and instances of
+    Antidote's classes. All other objects, such as the dependencies and their
+    instances, are owned by the application and are not counted. Objects in
+    :code:`exclude` are neither counted nor traversed.
+
+    Attributes of Cython classes cannot be introspected, only the size of the
+    object itself is counted for them.
+    """
+    seen = set(id(o) for o in exclude)
+    roots = set(id(o) for o in objects)
+    stack = list(objects)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, _CONTAINERS):
+            stack.extend(obj)
+        elif id(obj) in roots or _is_antidote_object(obj):
+            stack.extend(_attributes(obj))
+        else:
+            continue
+
+        total += sys.getsizeof(obj)
+
+    return total
+
+
+def injection_sizeof(container, exclude: Iterable = ()) -> int:
+    """
+    Returns the memory used by all the functions injected with the container,
+    their wrapper and injection blueprint.
+    """
+    from .wrapper import InjectedWrapper
+
+    objects = []  # type: List[Any]
+    for obj in gc.get_objects():
+        if isinstance(obj, InjectedWrapper) and obj.__antidote_container__ is container:
+            blueprint = obj.__antidote_blueprint__
+            objects.extend((obj, blueprint, blueprint.injections))
+
+    return deep_sizeof(*objects, exclude=exclude)
+
+
+def container_memory_report(container,
+                            internals: Iterable,
+                            singletons: Iterable,
+                            providers: List) -> Dict[str, int]:
+    """
+    Implementation of :py:meth:`~.core.DependencyContainer.memory_report`,
+    shared by the pure Python and Cython containers.
+    """
+    exclude = [container] + providers
+    report = {
+        'container': deep_sizeof(*internals, exclude=exclude),
+        'singletons': deep_sizeof(*singletons, exclude=exclude),
+        'injection': injection_sizeof(container, exclude=exclude),
+    }
+    for provider in providers:
+        report[type(provider).__name__] = provider.memory_usage()
+    return report
+
+
+def _is_antidote_object(obj) -> bool:
+    module = type(obj).__module__
+    # Injected wrappers replace __module__ with the one of the wrapped function.
+    return not isinstance(obj, type) \
+        and isinstance(module, str) \
+        and module.split('.', 1)[0] == 'antidote'
+
+
+def _attributes(obj) -> List[Any]:
+    attributes = []  # type: List[Any]
+    try:
+        attributes.append(vars(obj))
+    except TypeError:
+        pass
+
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        for name in ((slots,) if isinstance(slots, str) else slots):
+            if name not in ('__dict__', '__weakref__'):
+                attributes.append(getattr(obj, name, None))
+    return attributes
@@ -18,3 +18,18 @@ class SlotsReprMixin:
                 for name in slots
             ))
         )
+
+
+def freeze(obj):
+    """
+    Returns a hashable equivalent of the object by converting, recursively,
+    lists and tuples to tuples, and dictionaries and sets to frozensets. Used
+    to hash arguments structurally.
+    """
+    if isinstance(obj, dict):
+        return frozenset((key, freeze(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(o) for o in obj)
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(freeze(o) for o in obj)
+    return obj
@@ -1,34 +1,77 @@
-import functools
-from typing import Callable, Sequence
+import sys
+import weakref
+from typing import Any, Callable, Iterable, List, MutableMapping, Optional, Tuple
 
 from .._internal.utils import SlotsReprMixin
 from ..core import DependencyContainer
+from ..core.container import dependency_slot, release_dependency_slot
+from ..core.pool import Pool
 from ..exceptions import DependencyNotFoundError
 
 compiled = False
 
 
-class Injection(SlotsReprMixin):
+class InjectionBlueprint(SlotsReprMixin):
     """
-    Maps an argument name to its dependency and if the injection is required,
-    which is equivalent to no default argument.
+    Stores the injections of a function, only for the arguments which have a
+    dependency, as tuples of their position, name, dependency, whether the
+    injection is required, which is equivalent to no default argument, and the
+    slot of the dependency. Whether pooled dependencies have been injected is
+    also stored.
+
+    Identical blueprints are shared between functions, they should be created
+    with :py:func:`.build_blueprint`.
     """
-    __slots__ = ('arg_name', 'required', 'dependency')
+    __slots__ = ('injections', 'pooled', '__weakref__')
 
-    def __init__(self, arg_name: str, required: bool, dependency):
-        self.arg_name = arg_name
-        self.required = required
-        self.dependency = dependency
+    def __init__(self, injections: Tuple[Tuple[int, str, Any, bool, int], ...]):
+        self.injections = injections
+        self.pooled = False
 
+    def __del__(self):
+        _release_slots(self.injections)
 
-class InjectionBlueprint(SlotsReprMixin):
+
+_blueprints = weakref.WeakValueDictionary()  # type: MutableMapping[Any, Any]
+
+
+def build_blueprint(injections: Iterable[Tuple[str, bool, Any]]
+                    ) -> InjectionBlueprint:
     """
-    Stores all the injections for a function.
+    Returns the blueprint of a function given the name, whether the injection
+    is required and the dependency, or None, of each of its arguments.
+    Blueprints are shared between functions with the same injections.
     """
-    __slots__ = ('injections',)
-
-    def __init__(self, injections: Sequence[Injection]):
-        self.injections = injections
+    key = tuple([
+        (position, arg_name, dependency, required, _slot(dependency))
+        for position, (arg_name, required, dependency) in enumerate(injections)
+        if dependency is not None
+    ])
+    try:
+        blueprint = _blueprints.get(key)
+    except TypeError:  # Unhashable dependency
+        return InjectionBlueprint(key)
+
+    if blueprint is None:
+        blueprint = InjectionBlueprint(key)
+        _blueprints[key] = blueprint
+    else:
+        # Slots are already held by the existing blueprint.
+        _release_slots(key)
+    return blueprint
+
+
+def _slot(dependency) -> int:
+    try:
+        return dependency_slot(dependency)
+    except TypeError:  # Unhashable dependency, out of bounds of all containers.
+        return sys.maxsize
+
+
+def _release_slots(injections: Tuple[Tuple[int, str, Any, bool, int], ...]):
+    for _, _, dependency, _, slot in injections:
+        if slot != sys.maxsize:
+            release_dependency_slot(dependency)
 
 
 class InjectedWrapper:
@@ -37,6 +80,8 @@ class InjectedWrapper:
     arguments. An InjectionBlueprint is used to store the mapping of the
     arguments to their dependency if any and if the injection is required.
     """
+    __slots__ = ('__wrapped__', '__container', '__blueprint', '__injection_offset',
+                 '__weakref__')
 
     def __init__(self,
                  container: DependencyContainer,
@@ -54,26 +99,68 @@ class InjectedWrapper:
         self.__container = container
         self.__blueprint = blueprint
         self.__injection_offset = 1 if skip_self else 0
-        functools.wraps(wrapped, updated=())(self)
 
     def __call__(self, *args, **kwargs):
-        kwargs = _inject_kwargs(
-            self.__container,
-            self.__blueprint,
-            self.__injection_offset + len(args),
-            kwargs
-        )
-        return self.__wrapped__(*args, **kwargs)
+        offset = self.__injection_offset + len(args)
+        if not self.__blueprint.pooled:
+            kwargs = _inject_kwargs(self.__container, self.__blueprint,
+                                    offset, kwargs, None)
+            if not self.__blueprint.pooled:
+                return self.__wrapped__(*args, **kwargs)
+            # The arguments injected before the pooled one are kept.
+
+        _check_pooled_injection(self.__wrapped__)
+        leases = []  # type: List[Tuple[Pool, Any]]
+        try:
+            kwargs = _inject_kwargs(self.__container, self.__blueprint,
+                                    offset, kwargs, leases)
+            return self.__wrapped__(*args, **kwargs)
+        finally:
+            for pool, instance in leases:
+                pool.release(instance)
 
     def __get__(self, instance, owner):
-        wrapped = self.__wrapped__.__get__(instance, owner)
-        return functools.wraps(wrapped, updated=())(InjectedBoundWrapper(
+        return InjectedBoundWrapper(
             self.__container,
             self.__blueprint,
-            wrapped,
+            self.__wrapped__.__get__(instance, owner),
             isinstance(self.__wrapped__, classmethod)
             or (not isinstance(self.__wrapped__, staticmethod) and instance is not None)
-        ))
+        )
+
+    # Attributes of the wrapped function, like functools.wraps() without
+    # storing a copy of them in a __dict__.
+    @property
+    def __name__(self):
+        return self.__wrapped__.__name__
+
+    @property
+    def __doc__(self):
+        return self.__wrapped__.__doc__
+
+    @property
+    def __annotations__(self):
+        return self.__wrapped__.__annotations__
+
+    @property
+    def __module__(self):
+        return self.__wrapped__.__module__
+
+    def __getattr__(self, name):
+        # type() requires __qualname__ to be a string in the class namespace.
+        if name == '__qualname__':
+            return self.__wrapped__.__qualname__
+        raise AttributeError(name)
+
+    @property
+    def __antidote_blueprint__(self) -> InjectionBlueprint:
+        """ Used to inspect the injections, not part of the public API. """
+        return self.__blueprint
+
+    @property
+    def __antidote_container__(self) -> DependencyContainer:
+        """ Used to inspect the injections, not part of the public API. """
+        return self.__container
 
     @property
     def __func__(self):
@@ -87,10 +174,12 @@ class InjectedWrapper:
 
 
 class InjectedBoundWrapper(InjectedWrapper):
-    """
-    Behaves like Python bound methods. Unsure whether this is really necessary
-    or not.
-    """
+    # Behaves like Python bound methods. Unsure whether this is really necessary
+    # or not.
+    __slots__ = ()
+    # Set by the class statement, they would hide the properties otherwise.
+    __module__ = InjectedWrapper.__dict__['__module__']
+    __doc__ = InjectedWrapper.__dict__['__doc__']
 
     def __get__(self, instance, owner):
         return self  # pragma: no cover
@@ -99,20 +188,68 @@ class InjectedBoundWrapper(InjectedWrapper):
 def _inject_kwargs(container: DependencyContainer,
                    blueprint: InjectionBlueprint,
                    offset: int,
-                   kwargs: dict) -> dict:
+                   kwargs: dict,
+                   leases: Optional[list]) -> dict:
     """
     Does the actual injection of the dependencies. Used by InjectedCallableWrapper.
+
+    Instances of pooled dependencies are checked out and added to leases. If
+    it is None, the blueprint is marked as pooled instead and the arguments
+    injected so far are returned, the injection must then be completed with a
+    list.
     """
     dirty_kwargs = False
-    for injection in blueprint.injections[offset:]:
-        if injection.dependency is not None and injection.arg_name not in kwargs:
-            dependency_instance = container.provide(injection.dependency)
+    singleton_slots = container._singleton_slots
+    for position, arg_name, dependency, required, slot in blueprint.injections:
+        if position >= offset and arg_name not in kwargs:
+            try:
+                dependency_instance = singleton_slots[slot]
+            except IndexError:
+                dependency_instance = None
+            if dependency_instance is None:
+                dependency_instance = container.provide(dependency)
+                if dependency_instance is not None and dependency_instance.singleton:
+                    container._fill_slot(slot, dependency, dependency_instance)
             if dependency_instance is not None:
+                instance = dependency_instance.instance
+                if type(instance) is Pool:
+                    if leases is None:
+                        blueprint.pooled = True
+                        return kwargs
+                    pool = instance
+                    instance = pool.acquire()
+                    leases.append((pool, instance))
                 if not dirty_kwargs:
                     kwargs = kwargs.copy()
                     dirty_kwargs = True
-                kwargs[injection.arg_name] = dependency_instance.instance
-            elif injection.required:
-                raise DependencyNotFoundError(injection.dependency)
+                kwargs[arg_name] = instance
+            elif required:
+                raise DependencyNotFoundError(dependency)
 
     return kwargs
+
+
+# Code flags of generators, coroutines and asynchronous generators.
+_DEFERRED_BODY_FLAGS = 0x20 | 0x80 | 0x100 | 0x200
+
+
+def _check_pooled_injection(wrapped):
+    """
+    Pooled instances are given back once the injected function returns, but
+    the body of generators and coroutines is only executed afterwards and
+    objects keep those given to their __init__().
+    """
+    code = getattr(getattr(wrapped, '__func__', wrapped), '__code__', None)
+    if code is None:
+        return
+    if code.co_flags & _DEFERRED_BODY_FLAGS:
+        raise TypeError("Pooled dependencies cannot be injected into {!r}, "
+                        "generators and coroutines are executed after the call "
+                        "returns, once the instances have been given back to "
+                        "their pool.".format(wrapped))
+    if code.co_name == '__init__':
+        raise TypeError("Pooled dependencies cannot be injected into {!r}, "
+                        "the instances would be given back to their pool once "
+                        "it returns while still being used by the object. "
+                        "Retrieve the Pool from the container and use "
+                        "Pool.lease() instead.".format(wrapped))
@@ -1,44 +1,98 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
 
+import sys
+import weakref
+
 # @formatter:off
 cimport cython
 from cpython.dict cimport PyDict_Contains, PyDict_Copy, PyDict_SetItem
+from cpython.list cimport PyList_GET_ITEM, PyList_GET_SIZE
 from cpython.object cimport PyObject_Call
-from cpython.tuple cimport PyTuple_GET_ITEM,  PyTuple_Size
+from cpython.long cimport PyLong_AsSsize_t
+from cpython.tuple cimport PyTuple_GET_ITEM, PyTuple_GET_SIZE
 
 from antidote.core.container cimport DependencyContainer, DependencyInstance
+from ..core.container import dependency_slot, release_dependency_slot
+from ..core.pool import Pool
 from ..exceptions import DependencyNotFoundError
 # @formatter:on
 
 compiled = True
 
-@cython.freelist(128)
-cdef class Injection:
-    cdef:
-        readonly str arg_name
-        readonly bint required
-        readonly object dependency
-
-    def __repr__(self):
-        return "{}(arg_name={!r}, required={!r}, dependency={!r})".format(
-            type(self).__name__,
-            self.arg_name,
-            self.required,
-            self.dependency
-        )
-
-    def __init__(self, str arg_name, bint required, object dependency):
-        self.arg_name = arg_name
-        self.required = required
-        self.dependency = dependency
+cdef object _Pool = Pool
 
+# Injections must still be available when the blueprint is deallocated.
+@cython.no_gc_clear
 cdef class InjectionBlueprint:
+    """
+    Stores the injections of a function, only for the arguments which have a
+    dependency, as tuples of their position, name, dependency, whether the
+    injection is required, which is equivalent to no default argument, and the
+    slot of the dependency. Whether pooled dependencies have been injected is
+    also stored.
+
+    Identical blueprints are shared between functions, they should be created
+    with :py:func:`.build_blueprint`.
+    """
     cdef:
         readonly tuple injections
+        readonly bint pooled
+        object __weakref__
 
     def __init__(self, tuple injections):
         self.injections = injections
+        self.pooled = False
+
+    def __dealloc__(self):
+        if self.injections is not None:
+            _release_slots(self.injections)
+
+    def __repr__(self):
+        return "{}(injections={!r}, pooled={!r})".format(type(self).__name__,
+                                                         self.injections,
+                                                         self.pooled)
+
+_blueprints = weakref.WeakValueDictionary()
+
+def build_blueprint(injections):
+    """
+    Returns the blueprint of a function given the name, whether the injection
+    is required and the dependency, or None, of each of its arguments.
+    Blueprints are shared between functions with the same injections.
+    """
+    key = tuple([
+        (position, arg_name, dependency, required, _slot(dependency))
+        for position, (arg_name, required, dependency) in enumerate(injections)
+        if dependency is not None
+    ])
+    try:
+        blueprint = _blueprints.get(key)
+    except TypeError:  # Unhashable dependency
+        return InjectionBlueprint(key)
+
+    if blueprint is None:
+        blueprint = InjectionBlueprint(key)
+        _blueprints[key] = blueprint
+    else:
+        # Slots are already held by the existing blueprint.
+        _release_slots(key)
+    return blueprint
+
+cdef Py_ssize_t _slot(object dependency):
+    try:
+        return dependency_slot(dependency)
+    except TypeError:  # Unhashable dependency, out of bounds of all containers.
+        return sys.maxsize
+
+# C globals, still available when blueprints are deallocated at exit.
+cdef object _release_dependency_slot = release_dependency_slot
+cdef Py_ssize_t _unhashable_slot = sys.maxsize
+
+cdef _release_slots(tuple injections):
+    for _, _, dependency, _, slot in injections:
+        if slot != _unhashable_slot:
+            _release_dependency_slot(dependency)
 
 cdef class InjectedWrapper:
     cdef:
@@ -60,13 +114,26 @@ cdef class InjectedWrapper:
         self.__injection_offset = 1 if skip_first else 0
 
     def __call__(self, *args, **kwargs):
-        kwargs = _inject_kwargs(
-            self.__container,
-            self.__blueprint,
-            self.__injection_offset + len(args),
-            kwargs
-        )
-        return PyObject_Call(self.__wrapped__, args, kwargs)
+        cdef:
+            int offset = self.__injection_offset + len(args)
+            list leases
+
+        if not self.__blueprint.pooled:
+            kwargs = _inject_kwargs(self.__container, self.__blueprint,
+                                    offset, kwargs, None)
+            if not self.__blueprint.pooled:
+                return PyObject_Call(self.__wrapped__, args, kwargs)
+            # The arguments injected before the pooled one are kept.
+
+        _check_pooled_injection(self.__wrapped__)
+        leases = []
+        try:
+            kwargs = _inject_kwargs(self.__container, self.__blueprint,
+                                    offset, kwargs, leases)
+            return PyObject_Call(self.__wrapped__, args, kwargs)
+        finally:
+            for pool, instance in leases:
+                pool.release(instance)
 
     def __get__(self, instance, owner):
         return InjectedBoundWrapper.__new__(
@@ -98,6 +165,14 @@ cdef class InjectedWrapper:
     def __module__(self):
         return self.__wrapped__.__module__
 
+    @property
+    def __antidote_blueprint__(self):
+        return self.__blueprint
+
+    @property
+    def __antidote_container__(self):
+        return self.__container
+
     @property
     def __func__(self):
         return self.__wrapped__.__func__
@@ -113,24 +188,78 @@ cdef class InjectedBoundWrapper(InjectedWrapper):
 cdef inline dict _inject_kwargs(DependencyContainer container,
                                 InjectionBlueprint blueprint,
                                 int offset,
-                                dict kwargs):
+                                dict kwargs,
+                                list leases):
     cdef:
-        Injection injection
+        tuple injection
+        list singleton_slots = container._singleton_slots
         DependencyInstance dependency_instance
+        object arg_name
+        object dependency
+        object instance
+        object pool
         bint dirty_kwargs = False
-        int i
+        Py_ssize_t i
+        Py_ssize_t position
+        Py_ssize_t slot
 
-    for i in range(offset, PyTuple_Size(blueprint.injections)):
-        injection = <Injection> PyTuple_GET_ITEM(blueprint.injections, i)
-        if injection.dependency is not None \
-                and PyDict_Contains(kwargs, injection.arg_name) == 0:
-            dependency_instance = container.provide(injection.dependency)
+    for i in range(PyTuple_GET_SIZE(blueprint.injections)):
+        injection = <tuple> PyTuple_GET_ITEM(blueprint.injections, i)
+        position = PyLong_AsSsize_t(<object> PyTuple_GET_ITEM(injection, 0))
+        if position < offset:
+            continue
+        arg_name = <object> PyTuple_GET_ITEM(injection, 1)
+        if PyDict_Contains(kwargs, arg_name) == 0:
+            dependency = <object> PyTuple_GET_ITEM(injection, 2)
+            slot = PyLong_AsSsize_t(<object> PyTuple_GET_ITEM(injection, 4))
+            if slot < PyList_GET_SIZE(singleton_slots):
+                dependency_instance = <object> PyList_GET_ITEM(singleton_slots, slot)
+            else:
+                dependency_instance = None
+            if dependency_instance is None:
+                dependency_instance = container.provide(dependency)
+                if dependency_instance is not None and dependency_instance.singleton:
+                    container._fill_slot(slot, dependency, dependency_instance)
             if dependency_instance is not None:
+                instance = dependency_instance.instance
+                if type(instance) is _Pool:
+                    if leases is None:
+                        blueprint.pooled = True
+                        return kwargs
+                    pool = instance
+                    instance = pool.acquire()
+                    leases.append((pool, instance))
                 if not dirty_kwargs:
                     kwargs = PyDict_Copy(kwargs)
                     dirty_kwargs = True
-                PyDict_SetItem(kwargs, injection.arg_name, dependency_instance.instance)
-            elif injection.required:
-                raise DependencyNotFoundError(injection.dependency)
+                PyDict_SetItem(kwargs, arg_name, instance)
+            elif <object> PyTuple_GET_ITEM(injection, 3):
+                raise DependencyNotFoundError(dependency)
 
     return kwargs
+
+
+# Code flags of generators, coroutines and asynchronous generators.
+_DEFERRED_BODY_FLAGS = 0x20 | 0x80 | 0x100 | 0x200
+
+
+cdef _check_pooled_injection(object wrapped):
+    """
+    Pooled instances are given back once the injected function returns, but
+    the body of generators and coroutines is only executed afterwards and
+    objects keep those given to their __init__().
+    """
+    code = getattr(getattr(wrapped, '__func__', wrapped), '__code__', None)
+    if code is None:
+        return
+    if code.co_flags & _DEFERRED_BODY_FLAGS:
+        raise TypeError("Pooled dependencies cannot be injected into {!r}, "
+                        "generators and coroutines are executed after the call "
+                        "returns, once the instances have been given back to "
+                        "their pool.".format(wrapped))
+    if code.co_name == '__init__':
+        raise TypeError("Pooled dependencies cannot be injected into {!r}, "
+                        "the instances would be given back to their pool once "
+                        "it returns while still being used by the object. "
+                        "Retrieve the Pool from the container and use "
+                        "Pool.lease() instead.".format(wrapped))
@@ -1,3 +1,4 @@
 from .container import DependencyContainer, DependencyInstance, DependencyProvider
 from .injection import DEPENDENCIES_TYPE, inject
+from .pool import Pool, PoolSpec
 from .proxy import ProxyContainer
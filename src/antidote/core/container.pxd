@@ -8,6 +8,7 @@ cdef class DependencyInstance:
     cdef:
         readonly object instance
         readonly bint singleton
+        readonly bint thread_local "is_thread_local"
 
 cdef class DependencyContainer:
     cdef:
@@ -15,12 +16,23 @@ cdef class DependencyContainer:
         list _providers
         dict _type_to_provider
         dict _singletons
+        list _singleton_slots
         DependencyStack _dependency_stack
         object _instantiation_lock
+        object _thread_instances
+        dict _concurrent_providers
+        object _thread_stacks
+        list _singletons_listeners
 
     cpdef object get(self, object dependency)
     cpdef DependencyInstance safe_provide(self, object dependency)
     cpdef DependencyInstance provide(self, object dependency)
+    cdef _fill_slot(self, Py_ssize_t slot, object dependency,
+                    DependencyInstance dependency_instance)
+    cdef _clear_slot(self, Py_ssize_t slot)
+    cdef bint _is_instantiating(self)
+    cdef DependencyInstance _provide_concurrently(self, object provider,
+                                                  object dependency)
 
 cdef class DependencyProvider:
     cdef:
@@ -1,26 +1,86 @@
 import threading
-from typing import (Any, cast, Dict, Generic, Hashable, List, Mapping, Optional, Tuple,
-                    TypeVar)
+import weakref
+from typing import (Any, Callable, cast, Dict, Generic, Hashable, List, Mapping,
+                    MutableSet, Optional, Tuple, TypeVar)
 
 from .exceptions import (DependencyCycleError, DependencyInstantiationError,
                          DependencyNotFoundError)
+from .._internal.memory import container_memory_report, deep_sizeof
 from .._internal.stack import DependencyStack
 from .._internal.utils import SlotsReprMixin
 
 T = TypeVar('T')
 
+# Slot of each injected dependency and number of blueprints using it.
+_dependency_slots = dict()  # type: Dict[Any, List[int]]
+_free_slots = list()  # type: List[int]
+_released_slots = list()  # type: List[Any]
+_dependency_slots_lock = threading.Lock()
+_containers = weakref.WeakSet()  # type: MutableSet[Any]
+
+
+def dependency_slot(dependency: Hashable) -> int:
+    """
+    Returns the slot of a dependency: a dense integer, identical for all the
+    containers, at which they store its singleton once it has been retrieved
+    through an injection. Slots are counted for each call, which must be
+    matched by a :py:func:`.release_dependency_slot` once the slot is not used
+    anymore. Released slots are reused for other dependencies, so slots are
+    only kept for the dependencies currently injected.
+
+    Raises:
+        TypeError: If the dependency is not hashable.
+    """
+    hash(dependency)
+    with _dependency_slots_lock:
+        _free_released_slots()
+        try:
+            entry = _dependency_slots[dependency]
+        except KeyError:
+            # Slots are either used, once for each dependency, or free.
+            slot = _free_slots.pop() if _free_slots else len(_dependency_slots)
+            entry = _dependency_slots[dependency] = [slot, 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def release_dependency_slot(dependency: Hashable):
+    """
+    Releases a slot returned by :py:func:`.dependency_slot`. As it is called
+    when blueprints are garbage collected, at any time, it is only done on the
+    next call to :py:func:`.dependency_slot`.
+    """
+    _released_slots.append(dependency)
+
+
+def _free_released_slots():
+    while _released_slots:
+        dependency = _released_slots.pop()
+        entry = _dependency_slots[dependency]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _dependency_slots[dependency]
+            for container in list(_containers):
+                container._clear_slot(entry[0])
+            _free_slots.append(entry[0])
+
 
 class DependencyInstance(SlotsReprMixin, Generic[T]):
     """
     Simple wrapper used by a :py:class:`~.core.Provider` when returning an
     instance of a dependency so it can specify in which scope the instance
-    belongs to.
+    belongs to. Thread-local instances are cached for the current thread only
+    and released when it exits.
     """
-    __slots__ = ('instance', 'singleton')
+    __slots__ = ('instance', 'singleton', 'thread_local')
 
-    def __init__(self, instance: T, singleton: bool = False):
+    def __init__(self,
+                 instance: T,
+                 singleton: bool = False,
+                 thread_local: bool = False):
         self.instance = instance
         self.singleton = singleton
+        self.thread_local = thread_local
 
 
 class DependencyContainer:
@@ -34,8 +94,21 @@ class DependencyContainer:
         self._type_to_provider = dict()  # type: Dict[type, DependencyProvider]
         self._singletons = dict()  # type: Dict[Any, DependencyInstance]
         self._singletons[DependencyContainer] = DependencyInstance(self, singleton=True)
+        # Singletons indexed by their slot, filled by the injection wrappers to
+        # avoid hashing the dependency. Only a cache of _singletons.
+        self._singleton_slots = list()  # type: List[Optional[DependencyInstance]]
         self._dependency_stack = DependencyStack()
         self._instantiation_lock = threading.RLock()
+        # Its __dict__ is specific to each thread and used as the cache of the
+        # thread-local instances.
+        self._thread_instances = threading.local()
+        # Dependencies provided without holding the instantiation lock, cycles
+        # being detected with a stack per thread.
+        self._concurrent_providers = dict()  # type: Dict[Any, DependencyProvider]
+        self._thread_stacks = _ThreadStacks()
+        # Called with the new singletons by update_singletons().
+        self._singletons_listeners = list()  # type: List[Callable[[Mapping], Any]]
+        _containers.add(self)
 
     def __str__(self):
         return "{}(providers=({}))".format(
@@ -62,6 +135,34 @@ class DependencyContainer:
         """ Returns all the defined singletons """
         return self._singletons.copy()
 
+    def memory_report(self) -> Dict[str, int]:
+        """
+        Estimates the memory, in bytes, used by Antidote itself, split by
+        subsystem:
+
+        - :code:`container`: internal structures of the container.
+        - :code:`singletons`: storage of the singletons, without their instances.
+        - :code:`injection`: wrappers and injection blueprints of the functions
+          injected with this container.
+        - One entry per provider, named after its class, as returned by
+          :py:meth:`~.DependencyProvider.memory_usage`.
+
+        Instances of the dependencies, and everything else owned by the
+        application, are not taken into account. With the Cython build, only the
+        size of the objects themselves is counted for Cython classes, not what
+        they reference.
+
+        Returns:
+            Mapping of the subsystems to their size in bytes.
+        """
+        return container_memory_report(self,
+                                       (self._providers,
+                                        self._type_to_provider,
+                                        self._concurrent_providers,
+                                        self._dependency_stack),
+                                       (self._singletons, self._singleton_slots),
+                                       self._providers)
+
     def register_provider(self, provider: 'DependencyProvider'):
         """
         Registers a provider, which can then be used to instantiate dependencies.
@@ -87,6 +188,46 @@ class DependencyContainer:
 
         self._providers.append(provider)
 
+    def register_concurrent(self,
+                            dependency: Hashable,
+                            provider: 'DependencyProvider'):
+        """
+        Declares that the provider can instantiate the dependency concurrently
+        in multiple threads. It is then provided without holding the global
+        instantiation lock, and dependency cycles are only detected within each
+        thread. The provider must be thread-safe for this dependency and never
+        return it as a singleton.
+
+        Args:
+            dependency: Dependency to provide concurrently.
+            provider: Provider called directly for this dependency.
+        """
+        if not isinstance(provider, DependencyProvider):
+            raise TypeError("provider must be a DependencyProvider, not a {!r}".format(
+                type(provider)
+            ))
+
+        with self._instantiation_lock:
+            self._concurrent_providers[dependency] = provider
+
+    def add_singletons_listener(self, listener: Callable[[Mapping], Any]):
+        """
+        Registers a function called with the new singletons whenever they are
+        updated with :py:meth:`.update_singletons`, while holding the
+        instantiation lock. Used by the providers, and compiled modules, which
+        keep singletons outside of the container to apply its overrides.
+
+        Args:
+            listener: Function taking the mapping of the updated singletons.
+        """
+        if not callable(listener):
+            raise TypeError("listener must be callable, not a {!r}".format(
+                type(listener)
+            ))
+
+        with self._instantiation_lock:
+            self._singletons_listeners.append(listener)
+
     def update_singletons(self, dependencies: Mapping):
         """
         Update the singletons.
@@ -96,6 +237,48 @@ class DependencyContainer:
                 k: DependencyInstance(v, singleton=True)
                 for k, v in dependencies.items()
             })
+            self._singleton_slots.clear()
+            for listener in self._singletons_listeners:
+                listener(dependencies)
+
+    def _fill_slot(self,
+                   slot: int,
+                   dependency,
+                   dependency_instance: DependencyInstance):
+        """
+        Stores the singleton at its slot, unless it has been replaced since it
+        was provided. Used by the injection wrappers.
+        """
+        with self._instantiation_lock:
+            if self._singletons.get(dependency) is dependency_instance:
+                missing = slot + 1 - len(self._singleton_slots)
+                if missing > 0:
+                    self._singleton_slots.extend([None] * missing)
+                self._singleton_slots[slot] = dependency_instance
+
+    def _clear_slot(self, slot: int):
+        """
+        Removes the singleton stored at a slot which has been released. No
+        injection can fill it meanwhile, so the lock is not needed.
+        """
+        try:
+            self._singleton_slots[slot] = None
+        except IndexError:
+            pass
+
+    def _is_instantiating(self) -> bool:
+        """
+        Whether the current thread is instantiating a dependency while holding
+        the instantiation lock. Other threads needing the lock would then wait
+        for it until the current instantiation is finished.
+        """
+        if not self._instantiation_lock.acquire(blocking=False):
+            return False  # Held by another thread.
+        try:
+            # Only filled by the thread holding the lock.
+            return len(self._dependency_stack._stack) > 0
+        finally:
+            self._instantiation_lock.release()
 
     def get(self, dependency: Hashable):
         """
@@ -131,6 +314,14 @@ class DependencyContainer:
         except KeyError:
             pass
 
+        dependency_instance = self._thread_instances.__dict__.get(dependency)
+        if dependency_instance is not None:
+            return dependency_instance
+
+        provider = self._concurrent_providers.get(dependency)
+        if provider is not None:
+            return self._provide_concurrently(provider, dependency)
+
         try:
             # @formatter:off
             with self._instantiation_lock, \
@@ -154,6 +345,9 @@ class DependencyContainer:
                 if dependency_instance is not None:
                     if dependency_instance.singleton:
                         self._singletons[dependency] = dependency_instance
+                    elif dependency_instance.thread_local:
+                        self._thread_instances.__dict__[dependency] = \
+                            dependency_instance
 
                     return dependency_instance
 
@@ -165,6 +359,31 @@ class DependencyContainer:
 
         return None
 
+    def _provide_concurrently(self,
+                              provider: 'DependencyProvider',
+                              dependency: Hashable
+                              ) -> Optional[DependencyInstance]:
+        try:
+            with self._thread_stacks.stack.instantiating(dependency):
+                dependency_instance = provider.provide(dependency)
+                if dependency_instance is not None \
+                        and dependency_instance.thread_local:
+                    self._thread_instances.__dict__[dependency] = dependency_instance
+                return dependency_instance
+
+        except DependencyCycleError:
+            raise
+
+        except Exception as e:
+            raise DependencyInstantiationError(dependency) from e
+
+
+class _ThreadStacks(threading.local):
+    """ Dependency stack of each thread, for concurrent instantiations. """
+
+    def __init__(self):
+        self.stack = DependencyStack()
+
 
 class DependencyProvider:
     """
@@ -183,6 +402,18 @@ class DependencyProvider:
     def __init__(self, container: DependencyContainer):
         self._container = container  # type: DependencyContainer
 
+    def memory_usage(self) -> int:
+        """
+        Estimates the memory, in bytes, used by the provider to store its
+        dependencies. Used by :py:meth:`~.DependencyContainer.memory_report`.
+        Defaults to the size of the provider and of all the containers and
+        Antidote objects it references.
+
+        Returns:
+            Size in bytes.
+        """
+        return deep_sizeof(self, exclude=(self._container,))
+
     def provide(self, dependency: Hashable) -> Optional[DependencyInstance]:
         """
         Method called by the :py:class:`~.core.DependencyContainer` when
@@ -1,33 +1,95 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
-from typing import (Any, Dict, Hashable, List, Mapping, Tuple)
+import threading
+import weakref
+from typing import (Any, Callable, Dict, Hashable, List, Mapping, MutableSet,
+                    Tuple)
 
 # @formatter:off
 cimport cython
 from cpython.dict cimport PyDict_GetItem, PyDict_SetItem
+from cpython.list cimport PyList_GET_SIZE
 from cpython.ref cimport PyObject
 from fastrlock.rlock cimport create_fastrlock, lock_fastrlock, unlock_fastrlock
 
 from antidote._internal.stack cimport DependencyStack
 # @formatter:on
+from .._internal.memory import container_memory_report, deep_sizeof
 from ..exceptions import (DependencyCycleError, DependencyInstantiationError,
                           DependencyNotFoundError)
 
+# Slot of each injected dependency and number of blueprints using it.
+_dependency_slots = dict()  # type: Dict[Any, List[int]]
+_free_slots = list()  # type: List[int]
+# C global, still available when blueprints are deallocated at exit.
+cdef list _released_slots = list()
+_dependency_slots_lock = threading.Lock()
+_containers = weakref.WeakSet()  # type: MutableSet[Any]
+
+def dependency_slot(dependency: Hashable) -> int:
+    """
+    Returns the slot of a dependency: a dense integer, identical for all the
+    containers, at which they store its singleton once it has been retrieved
+    through an injection. Slots are counted for each call, which must be
+    matched by a :py:func:`.release_dependency_slot` once the slot is not used
+    anymore. Released slots are reused for other dependencies, so slots are
+    only kept for the dependencies currently injected.
+
+    Raises:
+        TypeError: If the dependency is not hashable.
+    """
+    hash(dependency)
+    with _dependency_slots_lock:
+        _free_released_slots()
+        try:
+            entry = _dependency_slots[dependency]
+        except KeyError:
+            # Slots are either used, once for each dependency, or free.
+            slot = _free_slots.pop() if _free_slots else len(_dependency_slots)
+            entry = _dependency_slots[dependency] = [slot, 0]
+        entry[1] += 1
+        return entry[0]
+
+def release_dependency_slot(dependency: Hashable):
+    """
+    Releases a slot returned by :py:func:`.dependency_slot`. As it is called
+    when blueprints are garbage collected, at any time, it is only done on the
+    next call to :py:func:`.dependency_slot`.
+    """
+    _released_slots.append(dependency)
+
+def _free_released_slots():
+    while _released_slots:
+        dependency = _released_slots.pop()
+        entry = _dependency_slots[dependency]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _dependency_slots[dependency]
+            for container in list(_containers):
+                (<DependencyContainer> container)._clear_slot(entry[0])
+            _free_slots.append(entry[0])
+
 @cython.freelist(32)
 cdef class DependencyInstance:
     """
     Simple wrapper used by a :py:class:`~.core.DependencyProvider` when returning
     an instance of a dependency so it can specify in which scope the instance
-    belongs to.
+    belongs to. Thread-local instances are cached for the current thread only
+    and released when it exits.
     """
-    def __cinit__(self, object instance, bint singleton = False):
+    def __cinit__(self, object instance, bint singleton = False,
+                  bint thread_local = False):
         self.instance = instance
         self.singleton = singleton
+        self.thread_local = thread_local
 
     def __repr__(self):
-        return "{}(instance={!r}, singleton={!r})".format(type(self).__name__,
-                                                          self.instance,
-                                                          self.singleton)
+        return "{}(instance={!r}, singleton={!r}, thread_local={!r})".format(
+            type(self).__name__,
+            self.instance,
+            self.singleton,
+            self.thread_local
+        )
 
 cdef class DependencyContainer:
     """
@@ -40,8 +102,21 @@ cdef class DependencyContainer:
         self._type_to_provider = dict()  # type: Dict[type, DependencyProvider]
         self._singletons = dict()  # type: Dict[Any, DependencyInstance]
         self._singletons[DependencyContainer] = DependencyInstance(self, True)
+        # Singletons indexed by their slot, filled by the injection wrappers to
+        # avoid hashing the dependency. Only a cache of _singletons.
+        self._singleton_slots = list()  # type: List[DependencyInstance]
         self._dependency_stack = DependencyStack()
         self._instantiation_lock = create_fastrlock()
+        # Its __dict__ is specific to each thread and used as the cache of the
+        # thread-local instances.
+        self._thread_instances = threading.local()
+        # Dependencies provided without holding the instantiation lock, cycles
+        # being detected with a stack per thread.
+        self._concurrent_providers = dict()  # type: Dict[Any, DependencyProvider]
+        self._thread_stacks = _ThreadStacks()
+        # Called with the new singletons by update_singletons().
+        self._singletons_listeners = list()  # type: List[Callable[[Mapping], Any]]
+        _containers.add(self)
 
     def __str__(self):
         return "{}(providers={!r}, type_to_provider={!r})".format(
@@ -68,6 +143,34 @@ cdef class DependencyContainer:
         """ Returns all the defined singletons """
         return self._singletons.copy()
 
+    def memory_report(self) -> Dict[str, int]:
+        """
+        Estimates the memory, in bytes, used by Antidote itself, split by
+        subsystem:
+
+        - :code:`container`: internal structures of the container.
+        - :code:`singletons`: storage of the singletons, without their instances.
+        - :code:`injection`: wrappers and injection blueprints of the functions
+          injected with this container.
+        - One entry per provider, named after its class, as returned by
+          :py:meth:`~.DependencyProvider.memory_usage`.
+
+        Instances of the dependencies, and everything else owned by the
+        application, are not taken into account. With the Cython build, only the
+        size of the objects themselves is counted for Cython classes, not what
+        they reference.
+
+        Returns:
+            Mapping of the subsystems to their size in bytes.
+        """
+        return container_memory_report(self,
+                                       (self._providers,
+                                        self._type_to_provider,
+                                        self._concurrent_providers,
+                                        self._dependency_stack),
+                                       (self._singletons, self._singleton_slots),
+                                       self._providers)
+
     def register_provider(self, provider: Hashable):
         """
         Registers a provider, which can then be used to instantiate dependencies.
@@ -94,17 +197,106 @@ cdef class DependencyContainer:
 
         self._providers.append(provider)
 
+    def register_concurrent(self, dependency: Hashable, provider: 'DependencyProvider'):
+        """
+        Declares that the provider can instantiate the dependency concurrently
+        in multiple threads. It is then provided without holding the global
+        instantiation lock, and dependency cycles are only detected within each
+        thread. The provider must be thread-safe for this dependency and never
+        return it as a singleton.
+
+        Args:
+            dependency: Dependency to provide concurrently.
+            provider: Provider called directly for this dependency.
+        """
+        if not isinstance(provider, DependencyProvider):
+            raise TypeError("provider must be a DependencyProvider, not a {!r}".format(
+                type(provider)
+            ))
+
+        lock_fastrlock(self._instantiation_lock, -1, True)
+        self._concurrent_providers[dependency] = provider
+        unlock_fastrlock(self._instantiation_lock)
+
+    def add_singletons_listener(self, listener: Callable[[Mapping], Any]):
+        """
+        Registers a function called with the new singletons whenever they are
+        updated with :py:meth:`.update_singletons`, while holding the
+        instantiation lock. Used by the providers, and compiled modules, which
+        keep singletons outside of the container to apply its overrides.
+
+        Args:
+            listener: Function taking the mapping of the updated singletons.
+        """
+        if not callable(listener):
+            raise TypeError("listener must be callable, not a {!r}".format(
+                type(listener)
+            ))
+
+        lock_fastrlock(self._instantiation_lock, -1, True)
+        self._singletons_listeners.append(listener)
+        unlock_fastrlock(self._instantiation_lock)
+
     def update_singletons(self, dependencies: Mapping):
         """
         Update the singletons.
         """
         lock_fastrlock(self._instantiation_lock, -1, True)
-        self._singletons.update({
-            k: DependencyInstance(v, singleton=True)
-            for k, v in dependencies.items()
-        })
+        try:
+            self._singletons.update({
+                k: DependencyInstance(v, singleton=True)
+                for k, v in dependencies.items()
+            })
+            self._singleton_slots.clear()
+            for listener in self._singletons_listeners:
+                listener(dependencies)
+        finally:
+            unlock_fastrlock(self._instantiation_lock)
+
+    cdef _fill_slot(self,
+                    Py_ssize_t slot,
+                    object dependency,
+                    DependencyInstance dependency_instance):
+        """
+        Stores the singleton at its slot, unless it has been replaced since it
+        was provided. Used by the injection wrappers.
+        """
+        cdef:
+            PyObject*ptr
+            Py_ssize_t missing
+
+        lock_fastrlock(self._instantiation_lock, -1, True)
+        ptr = PyDict_GetItem(self._singletons, dependency)
+        if ptr == <PyObject*> dependency_instance:
+            missing = slot + 1 - PyList_GET_SIZE(self._singleton_slots)
+            if missing > 0:
+                self._singleton_slots.extend([None] * missing)
+            self._singleton_slots[slot] = dependency_instance
         unlock_fastrlock(self._instantiation_lock)
 
+    cdef _clear_slot(self, Py_ssize_t slot):
+        """
+        Removes the singleton stored at a slot which has been released. No
+        injection can fill it meanwhile, so the lock is not needed.
+        """
+        if slot < PyList_GET_SIZE(self._singleton_slots):
+            self._singleton_slots[slot] = None
+
+    cdef bint _is_instantiating(self):
+        """
+        Whether the current thread is instantiating a dependency while holding
+        the instantiation lock. Other threads needing the lock would then wait
+        for it until the current instantiation is finished.
+        """
+        cdef bint instantiating
+
+        if not lock_fastrlock(self._instantiation_lock, -1, False):
+            return False  # Held by another thread.
+        # Only filled by the thread holding the lock.
+        instantiating = len(self._dependency_stack._stack) > 0
+        unlock_fastrlock(self._instantiation_lock)
+        return instantiating
+
     cpdef object get(self, object dependency: Hashable):
         """
         Returns an instance for the given dependency. All registered providers
@@ -148,6 +340,14 @@ cdef class DependencyContainer:
         if ptr != NULL:
             return <DependencyInstance> ptr
 
+        ptr = PyDict_GetItem(self._thread_instances.__dict__, dependency)
+        if ptr != NULL:
+            return <DependencyInstance> ptr
+
+        ptr = PyDict_GetItem(self._concurrent_providers, dependency)
+        if ptr != NULL:
+            return self._provide_concurrently(<object> ptr, dependency)
+
         lock_fastrlock(self._instantiation_lock, -1, True)
 
         ptr = PyDict_GetItem(self._singletons, dependency)
@@ -174,6 +374,9 @@ cdef class DependencyContainer:
             if dependency_instance is not None:
                 if dependency_instance.singleton:
                     PyDict_SetItem(self._singletons, dependency, dependency_instance)
+                elif dependency_instance.thread_local:
+                    PyDict_SetItem(self._thread_instances.__dict__, dependency,
+                                   dependency_instance)
                 return dependency_instance
 
         except Exception as e:
@@ -186,6 +389,40 @@ cdef class DependencyContainer:
 
         return None
 
+    cdef DependencyInstance _provide_concurrently(self,
+                                                  object provider,
+                                                  object dependency):
+        cdef:
+            DependencyInstance dependency_instance
+            DependencyStack stack = self._thread_stacks.stack
+            Exception e
+            list cycle
+
+        if 1 != stack.push(dependency):
+            cycle = stack._stack.copy()
+            cycle.append(dependency)
+            raise DependencyCycleError(cycle)
+
+        try:
+            dependency_instance = (<DependencyProvider> provider).provide(dependency)
+            if dependency_instance is not None and dependency_instance.thread_local:
+                PyDict_SetItem(self._thread_instances.__dict__, dependency,
+                               dependency_instance)
+            return dependency_instance
+
+        except Exception as e:
+            if isinstance(e, DependencyCycleError):
+                raise
+            raise DependencyInstantiationError(dependency) from e
+        finally:
+            stack.pop()
+
+class _ThreadStacks(threading.local):
+    """ Dependency stack of each thread, for concurrent instantiations. """
+
+    def __init__(self):
+        self.stack = DependencyStack()
+
 cdef class DependencyProvider:
     """
     Abstract base class for a Provider.
@@ -203,6 +440,18 @@ cdef class DependencyProvider:
     def __init__(self, DependencyContainer container):
         self._container = container
 
+    def memory_usage(self) -> int:
+        """
+        Estimates the memory, in bytes, used by the provider to store its
+        dependencies. Used by :py:meth:`~.DependencyContainer.memory_report`.
+        Defaults to the size of the provider and of all the containers and
+        Antidote objects it references.
+
+        Returns:
+            Size in bytes.
+        """
+        return deep_sizeof(self, exclude=(self._container,))
+
     cpdef DependencyInstance provide(self, dependency: Hashable):
         """
         Method called by the :py:class:`~.core.DependencyContainer` when
@@ -71,3 +71,10 @@ class DependencyNotFoundError(AntidoteError):
 
     def __str__(self):
         return repr(self.missing_dependency)
+
+
+class PoolTimeoutError(AntidoteError):
+    """
+    No instance of a pooled dependency became available in time.
+    Raised by the core.
+    """
@@ -6,7 +6,7 @@ from typing import (Any, Callable, Dict, Hashable, Iterable, Mapping, overload,
 
 from .._internal.argspec import Arguments
 from .._internal.default_container import get_default_container
-from .._internal.wrapper import InjectedWrapper, Injection, InjectionBlueprint
+from .._internal.wrapper import build_blueprint, InjectedWrapper, InjectionBlueprint
 from ..core import DependencyContainer
 
 F = TypeVar('F', Callable, staticmethod, classmethod)
@@ -113,7 +113,7 @@ def inject(func=None,
 
         # If nothing can be injected, just return the existing function without
         # any overhead.
-        if all(injection.dependency is None for injection in blueprint.injections):
+        if not blueprint.injections:
             return wrapped
 
         return InjectedWrapper(container=container or get_default_container(),
@@ -151,12 +151,10 @@ def _build_injection_blueprint(arguments: Arguments,
         for arg in arguments
     ]
 
-    return InjectionBlueprint(tuple([
-        Injection(arg_name=arg.name,
-                  required=not arg.has_default,
-                  dependency=dependency)
+    return build_blueprint([
+        (arg.name, not arg.has_default, dependency)
         for arg, dependency in zip(arguments, resolved_dependencies)
-    ]))
+    ])
 
 
 def _build_arg_to_dependency(arguments: Arguments,
@@ -0,0 +1,173 @@
+import collections
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Iterator, Optional
+
+from .exceptions import PoolTimeoutError
+from .._internal.utils import SlotsReprMixin
+
+
+class PoolSpec(SlotsReprMixin):
+    """
+    Defines a pooled scope: instances are checked out of a bounded pool when
+    injected and given back once the injected function returns.
+
+    .. doctest::
+
+        >>> from antidote import PoolSpec, register, inject
+        >>> @register(pool=PoolSpec(min=1, max=4))
+        ... class Connection:
+        ...     pass
+        >>> @inject
+        ... def f(connection: Connection):
+        ...     return connection
+        >>> f() is f()
+        True
+
+    Instances are given back as soon as the injected function returns, hence
+    pooled dependencies cannot be injected into generators and coroutines,
+    which are executed afterwards, nor into :code:`__init__()`, as the object
+    would keep them. An instance stored by the function in any other way is
+    given back too while still being used: it is then shared with the next
+    functions checking it out. Retrieve the :py:class:`~.Pool` itself and use
+    :py:meth:`~.Pool.lease` instead.
+
+    """
+    __slots__ = ('min', 'max', 'timeout', 'validate')
+
+    def __init__(self,
+                 min: int = 0,
+                 max: int = 8,
+                 timeout: Optional[float] = None,
+                 validate: Callable[[Any], bool] = None):
+        """
+        Args:
+            min: Number of instances created with the pool.
+            max: Maximum number of instances. Once all of them are checked out,
+                injection waits for one to be given back.
+            timeout: Maximum time, in seconds, to wait for an instance.
+                :py:exc:`~.exceptions.PoolTimeoutError` is raised when it
+                expires. Defaults to waiting indefinitely.
+            validate: Called with an idle instance before it is checked out.
+                If it returns False, or raises an exception, the instance is
+                discarded.
+        """
+        if not isinstance(min, int) or min < 0:
+            raise ValueError("min must be a positive integer, not {!r}".format(min))
+        if not isinstance(max, int) or max < 1 or max < min:
+            raise ValueError("max must be a strictly positive integer greater "
+                             "than min, not {!r}".format(max))
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must be positive, not {!r}".format(timeout))
+        if validate is not None and not callable(validate):
+            raise TypeError("validate must be callable, "
+                            "not {!r}".format(type(validate)))
+
+        self.min = min
+        self.max = max
+        self.timeout = timeout
+        self.validate = validate
+
+
+class Pool:
+    """
+    Bounded pool of instances of a dependency defined by a
+    :py:class:`~.PoolSpec`. Retrieving a pooled dependency from the container
+    returns its pool, injected functions receive an instance instead.
+    """
+
+    def __init__(self, spec: PoolSpec, factory: Callable[[], Any]):
+        self.spec = spec
+        self._factory = factory
+        self._idle = collections.deque()  # type: Deque[Any]
+        self._size = 0
+        self._condition = threading.Condition(threading.Lock())
+
+        for _ in range(spec.min):
+            self._idle.append(factory())
+            self._size += 1
+
+    def __repr__(self):
+        return "{}(spec={!r}, size={}, idle={})".format(type(self).__name__,
+                                                        self.spec,
+                                                        self._size,
+                                                        len(self._idle))
+
+    @property
+    def size(self) -> int:
+        """ Number of instances, idle or not. """
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """ Number of instances which can be checked out right away. """
+        return len(self._idle)
+
+    def acquire(self) -> Any:
+        """
+        Checks out an instance, creating a new one if none is idle and the pool
+        is not full. Otherwise waits for one to be released.
+        """
+        timeout = self.spec.timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.spec.max:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                "No instance available after {}s in {!r}".format(
+                                    timeout, self))
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    instance = self._idle.pop()
+                else:
+                    self._size += 1
+                    break
+
+            if self._is_valid(instance):
+                return instance
+            self._discard()
+
+        try:
+            return self._factory()
+        except BaseException:
+            self._discard()
+            raise
+
+    def release(self, instance: Any):
+        """
+        Gives back an instance previously returned by :py:meth:`.acquire`.
+        """
+        with self._condition:
+            self._idle.append(instance)
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """
+        Checks out an instance for the duration of the context.
+        """
+        instance = self.acquire()
+        try:
+            yield instance
+        finally:
+            self.release(instance)
+
+    def _is_valid(self, instance: Any) -> bool:
+        if self.spec.validate is None:
+            return True
+        try:
+            return bool(self.spec.validate(instance))
+        except Exception:
+            return False
+
+    def _discard(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
@@ -1,6 +1,6 @@
 from .core.exceptions import (AntidoteError, DependencyCycleError,
                               DependencyInstantiationError, DependencyNotFoundError,
-                              DuplicateDependencyError)
+                              DuplicateDependencyError, PoolTimeoutError)
 
 
 class DuplicateTagError(AntidoteError):
@@ -24,5 +24,6 @@ __all__ = [
     'DependencyNotFoundError',
     'DuplicateDependencyError',
     'DuplicateTagError',
+    'PoolTimeoutError',
     'UndefinedContextError'
 ]
@@ -1,7 +1,9 @@
 from .container import new_container
 from .factory import factory
 from .provider import provider
-from .register import register
-from .constants import LazyConstantsMeta
+from .register import register, register_lazy
+from .constants import invalidate_constants, LazyConstantsMeta
 from .wire import wire
 from .implements import implements
+from .manifest import manifest
+from .compiler import compile_container, load_compiled
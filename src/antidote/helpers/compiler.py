@@ -0,0 +1,393 @@
+import inspect
+import math
+import sys
+from enum import Enum
+from types import ModuleType
+from typing import Any, cast, Dict, Hashable, List, Optional, Tuple
+
+from .._internal.default_container import get_default_container
+from ..core import DependencyContainer
+from ..providers.factory import FactoryProvider
+
+_LITERAL_TYPES = (type(None), bool, int, float, str, bytes)
+_MISSING = object()
+
+_HEADER = '''"""
+Generated by Antidote, do not edit. Use :py:func:`antidote.load_compiled` to
+install it in the container from which it was generated.
+"""
+'''
+
+_MODULE_PROLOGUE = '''
+_MISSING = object()
+_container = None
+
+
+def install(container):
+    global _container
+    _container = container
+    _update({d: i.instance for d, i in container.singletons.items()})
+    container.add_singletons_listener(_update)
+    return FACTORIES
+'''
+
+# Singletons are stored in module-level variables, set by the container when it
+# instantiates them, while holding its lock, or when it overrides them.
+_SINGLETON_TEMPLATE = '''
+
+{comment}
+_d{i} = {dependency}
+{factory_line}_s{i} = _MISSING
+
+
+def get_{i}():
+    instance = _s{i}
+    if instance is _MISSING:
+        return _container.get(_d{i})
+    return instance
+
+
+def new_{i}(**kwargs):
+    global _s{i}
+    if kwargs:
+        return {factory}({prefix}**kwargs)
+    _s{i} = {direct}({arguments})
+    return _s{i}
+'''
+
+# Only overridden non-singletons are stored.
+_NON_SINGLETON_TEMPLATE = '''
+
+{comment}
+_d{i} = {dependency}
+{factory_line}_s{i} = _MISSING
+
+
+def get_{i}():
+    instance = _s{i}
+    if instance is _MISSING:
+        return new_{i}()
+    return instance
+
+
+def new_{i}(**kwargs):
+    if kwargs:
+        return {factory}({prefix}**kwargs)
+    return {direct}({arguments})
+'''
+
+
+def compile_container(container: Optional[DependencyContainer] = None) -> str:
+    """
+    Generates the source code of a Python module resolving ahead of time the
+    dependencies registered with :py:func:`~.register` or :py:func:`~.factory`.
+    Each of them gets its own function calling its factory with its
+    dependencies directly, singletons being stored in module-level variables.
+    Injected factories are called without their injection wrapper when all
+    their dependencies are compiled. Overriding singletons with
+    :py:meth:`~.core.container.DependencyContainer.update_singletons` also
+    updates those variables.
+    This is also available from the command line:
+
+    .. code-block:: bash
+
+        python -m antidote compile myapp.dependencies -o myapp/compiled.py
+
+    Only dependencies which can be referenced in source code, such as
+    importable classes and functions, literals or enum members, and which are
+    neither pooled nor thread-local are compiled.
+    Everything else, including dependencies involved in a cycle, is left to
+    the container.
+
+    Args:
+        container: :py:class:`~.core.container.DependencyContainer` with all
+            dependencies registered. Defaults to the global container.
+
+    Returns:
+        Source code of the module, to be loaded with :py:func:`.load_compiled`.
+    """
+    container = container or get_default_container()
+    try:
+        factory_provider = cast(FactoryProvider,
+                                container.providers[FactoryProvider])
+    except KeyError:
+        raise ValueError("The container has no FactoryProvider.")
+
+    return _Compiler(factory_provider.builders).generate()
+
+
+def load_compiled(module: ModuleType,
+                  container: Optional[DependencyContainer] = None):
+    """
+    Installs a module generated by :py:func:`.compile_container` into the
+    container. The registered factories of the compiled dependencies are
+    replaced by the generated ones, their scope does not change.
+
+    Singletons are stored in the generated module, so it must only be
+    installed in one container.
+
+    Args:
+        module: Generated module.
+        container: :py:class:`~.core.container.DependencyContainer` from which
+            the module was generated. Defaults to the global container.
+    """
+    container = container or get_default_container()
+    factory_provider = cast(FactoryProvider, container.providers[FactoryProvider])
+    for dependency, factory in module.install(container).items():
+        factory_provider.update_factory(dependency, factory)
+
+
+class _Node:
+    __slots__ = ('index', 'dependency', 'builder', 'factory', 'factory_dependency',
+                 'arguments', 'injected', 'wrapped')
+
+    def __init__(self, index: int, dependency: Hashable, builder, factory: Any,
+                 factory_dependency: Any, arguments: List[Tuple[str, Hashable]],
+                 injected: bool = False):
+        self.index = index
+        self.dependency = dependency
+        self.builder = builder
+        self.factory = factory
+        self.factory_dependency = factory_dependency
+        self.arguments = arguments
+        # Whether factory is an injected function, which can be unwrapped.
+        self.injected = injected
+        # Whether the generated factory still goes through an injection.
+        self.wrapped = True
+
+    def edges(self) -> List[Hashable]:
+        edges = [dependency for _, dependency in self.arguments]
+        if self.factory_dependency is not None:
+            edges.append(self.factory_dependency)
+        return edges
+
+
+class _Compiler:
+    def __init__(self, builders: Dict[Hashable, Any]):
+        self._builders = builders
+        self._modules = dict()  # type: Dict[str, str]
+        self._nodes = dict()  # type: Dict[Any, _Node]
+
+    def generate(self) -> str:
+        for dependency, builder in self._builders.items():
+            node = self._build_node(len(self._nodes), dependency, builder)
+            if node is not None:
+                self._nodes[dependency] = node
+
+        self._prune()
+
+        parts = [self._generate_node(node) for node in self._nodes.values()]
+        lines = [_HEADER]
+        lines.extend("import {} as {}".format(name, alias)
+                     for name, alias in self._modules.items())
+        lines.append(_MODULE_PROLOGUE)
+        lines.extend(parts)
+        lines.append("\n\ndef _update(singletons):")
+        if self._nodes:
+            lines.append("    global {}".format(
+                ", ".join("_s{}".format(node.index) for node in self._nodes.values())
+            ))
+        lines.extend("    _s{0} = singletons.get(_d{0}, _s{0})".format(node.index)
+                     for node in self._nodes.values())
+        if not self._nodes:
+            lines.append("    pass")
+        lines.append("\n\nFACTORIES = {")
+        # Non-singletons whose factory still injects some of its arguments are
+        # faster with the container, only their dependents use new_<n>().
+        lines.extend("    _d{0}: new_{0},".format(node.index)
+                     for node in self._nodes.values()
+                     if node.builder.singleton or not node.wrapped)
+        lines.append("}\n")
+        return "\n".join(lines)
+
+    def _build_node(self, index: int, dependency: Hashable, builder
+                    ) -> Optional[_Node]:
+        if builder.pool is not None or builder.thread_local \
+                or self._reference(dependency) is None:
+            return None
+
+        factory = None
+        factory_dependency = builder.factory_dependency
+        if factory_dependency is None:
+            factory = builder.factory
+            if factory is None:
+                # Lazily registered, the factory is not known yet.
+                return None
+            if self._reference(factory) is None:
+                # Factory provided by a singleton which has already been
+                # instantiated.
+                if type(factory) not in self._builders:
+                    return None
+                factory_dependency = type(factory)
+                factory = None
+
+        if factory_dependency is not None:
+            if not isinstance(factory_dependency, type):
+                return None
+            wrapper = inspect.getattr_static(factory_dependency, '__call__', None)
+            skip = 1
+        elif isinstance(factory, type):
+            wrapper = inspect.getattr_static(factory, '__init__', None)
+            skip = 1
+        else:
+            wrapper = factory
+            skip = 1 if hasattr(factory, '__self__') else 0
+
+        if builder.takes_dependency:
+            skip += 1
+
+        blueprint = getattr(wrapper, '__antidote_blueprint__', None)
+        arguments = [
+            (arg_name, dependency)
+            for position, arg_name, dependency, _, _ in (blueprint.injections
+                                                         if blueprint else ())
+            if position >= skip
+        ]
+        injected = (blueprint is not None and wrapper is factory
+                    and hasattr(factory, '__wrapped__') and skip == 0)
+        return _Node(index, dependency, builder, factory, factory_dependency,
+                     arguments, injected)
+
+    def _prune(self):
+        """
+        Removes the nodes which cannot be compiled: those whose factory is not
+        compiled and those which are part of, or depend on, a cycle.
+        """
+        nodes = self._nodes
+        changed = True
+        while changed:
+            changed = False
+            for dependency, node in list(nodes.items()):
+                if node.factory_dependency is not None \
+                        and node.factory_dependency not in nodes:
+                    del nodes[dependency]
+                    changed = True
+
+        # Remove the nodes whose dependencies have all been removed, starting
+        # from those without any. The remaining ones are all part of, or depend
+        # on, a cycle.
+        dependents = {dependency: [] for dependency in nodes}  # type: Dict[Any, list]
+        pending = dict()  # type: Dict[Any, int]
+        for dependency, node in nodes.items():
+            edges = set(d for d in node.edges() if d in nodes)
+            pending[dependency] = len(edges)
+            for d in edges:
+                dependents[d].append(dependency)
+
+        ready = [dependency for dependency, count in pending.items() if count == 0]
+        while ready:
+            dependency = ready.pop()
+            del pending[dependency]
+            for dependent in dependents[dependency]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        for dependency in pending:
+            del nodes[dependency]
+
+    def _generate_node(self, node: _Node) -> str:
+        i = node.index
+        arguments = []  # type: List[str]
+        prefix = ''
+        if node.builder.takes_dependency:
+            prefix = '_d{}, '.format(i)
+            arguments.append('_d{}'.format(i))
+
+        compiled = True
+        direct = None
+        for name, dependency in node.arguments:
+            if dependency in self._nodes:
+                arguments.append('{}=get_{}()'.format(name,
+                                                      self._nodes[dependency].index))
+            else:
+                compiled = False
+
+        if node.factory_dependency is not None:
+            factory = 'get_{}()'.format(self._nodes[node.factory_dependency].index)
+            factory_line = ''
+        else:
+            factory = '_f{}'.format(i)
+            factory_line = '_f{} = {}\n'.format(i, self._reference(node.factory))
+            if node.injected and compiled:
+                # All the injected arguments are given, the injection would only
+                # check them. Build() arguments still go through it.
+                direct = '_w{}'.format(i)
+                factory_line += '_w{0} = _f{0}.__wrapped__\n'.format(i)
+                node.wrapped = False
+            elif not node.injected and not node.arguments:
+                node.wrapped = False
+
+        template = (_SINGLETON_TEMPLATE
+                    if node.builder.singleton else
+                    _NON_SINGLETON_TEMPLATE)
+        return template.format(
+            i=i,
+            comment='# {}'.format(' '.join(repr(node.dependency).split())),
+            dependency=self._reference(node.dependency),
+            factory_line=factory_line,
+            factory=factory,
+            direct=direct or factory,
+            prefix=prefix,
+            arguments=', '.join(arguments)
+        ).rstrip('\n')
+
+    def _reference(self, obj: Any) -> Optional[str]:
+        """
+        Returns an expression evaluating to the object in the generated module,
+        or None if there is none.
+        """
+        if type(obj) in _LITERAL_TYPES:
+            if isinstance(obj, float) and not math.isfinite(obj):
+                return None
+            return repr(obj)
+
+        if type(obj) is tuple:
+            references = []
+            for o in obj:
+                reference = self._reference(o)
+                if reference is None:
+                    return None
+                references.append(reference + ', ')
+            return '({})'.format(''.join(references))
+
+        if isinstance(obj, Enum):
+            name = cast(Enum, obj).name
+            enum_reference = self._reference(type(obj))
+            if enum_reference is None or getattr(type(obj), name, None) is not obj:
+                return None
+            return '{}.{}'.format(enum_reference, name)
+
+        module_name = getattr(obj, '__module__', None)
+        qualname = getattr(obj, '__qualname__', None)
+        if not isinstance(module_name, str) or not isinstance(qualname, str) \
+                or '<' in qualname or module_name == '__main__':
+            return None
+
+        target = sys.modules.get(module_name)
+        for name in qualname.split('.'):
+            target = getattr(target, name, None)
+
+        if not _is_same(target, obj):
+            return None
+
+        try:
+            alias = self._modules[module_name]
+        except KeyError:
+            alias = '_m{}'.format(len(self._modules))
+            self._modules[module_name] = alias
+
+        return '{}.{}'.format(alias, qualname)
+
+
+def _is_same(a, b) -> bool:
+    if a is b:
+        return True
+
+    # Methods, and injected ones, are re-created on each access.
+    for attr in ('__wrapped__', '__func__', '__self__'):
+        x = getattr(a, attr, _MISSING)
+        y = getattr(b, attr, _MISSING)
+        if x is not y and x != y:
+            return False
+    return hasattr(b, '__wrapped__') or hasattr(b, '__func__')
@@ -1,4 +1,4 @@
-from typing import Iterable, Union
+from typing import Iterable, Set, Union
 
 from .register import register
 from .wire import wire
@@ -9,6 +9,8 @@ from ..providers.lazy import LazyMethodCall
 class LazyConstantsMeta(type):
     def __new__(metacls, cls, bases, namespace,
                 lazy_method: str = 'get',
+                lazy_batch_method: str = None,
+                lazy_memoize: bool = False,
                 auto_wire: Union[bool, Iterable[str]] = None,
                 dependencies: DEPENDENCIES_TYPE = None,
                 use_names: Union[bool, Iterable[str]] = None,
@@ -88,9 +90,44 @@ class LazyConstantsMeta(type):
 
                 DOMAIN = LazyMethodCall(__call__)('domain')
 
+        When the constants are retrieved from a backend supporting bulk
+        queries, a batch method can be specified with :code:`lazy_batch_method`.
+        On the first retrieval of any constant through Antidote, it is called
+        once with the list of all the constants' initial values and must return
+        their values in the same order. All of them are then stored as
+        singletons. Instance attributes still use the lazy method.
+
+        .. doctest::
+
+            >>> class BatchConf(metaclass=antidote.LazyConstantsMeta,
+            ...                 lazy_batch_method='get_many'):
+            ...     DOMAIN = 'domain'
+            ...     PORT = 'port'
+            ...
+            ...     def get(self, key):
+            ...         return self.get_many([key])[0]
+            ...
+            ...     def get_many(self, keys):
+            ...         print("Fetching {}".format(keys))
+            ...         return [{'domain': 'example.com', 'port': 80}[k]
+            ...                 for k in keys]
+            ...
+            >>> antidote.world.get(BatchConf.PORT)
+            Fetching ['domain', 'port']
+            80
+            >>> antidote.world.get(BatchConf.DOMAIN)
+            'example.com'
+
         Args:
             lazy_method: Name of the lazy method to use for the constants.
                 Defaults to :code:`'__call__'`.
+            lazy_batch_method: Name of the method retrieving the values of all
+                the constants at once. Defaults to :code:`None`, constants are
+                retrieved one by one.
+            lazy_memoize: Whether the constants' values should be stored in the
+                instance on the first attribute access, such as
+                :code:`Conf().DOMAIN`. They can be reset with
+                :py:func:`.invalidate_constants`. Defaults to :code:`False`.
             auto_wire: Injects automatically the dependencies of the methods
                 specified, or only of :code:`__init__()` and :code:`__call__()`
                 if True.
@@ -119,6 +156,12 @@ class LazyConstantsMeta(type):
                 "Lazy method {}() is no defined in {}".format(lazy_method, cls)
             )
 
+        if lazy_batch_method is not None and lazy_batch_method not in namespace:
+            raise ValueError(
+                "Lazy batch method {}() is no defined in {}".format(lazy_batch_method,
+                                                                    cls)
+            )
+
         resource_class = super().__new__(metacls, cls, bases, namespace)
 
         wire_raise_on_missing = True
@@ -127,6 +170,8 @@ class LazyConstantsMeta(type):
                 methods = ()  # type: Iterable[str]
             else:
                 methods = (lazy_method, '__init__')
+                if lazy_batch_method is not None:
+                    methods += (lazy_batch_method,)
                 wire_raise_on_missing = False
         else:
             methods = auto_wire
@@ -152,10 +197,60 @@ class LazyConstantsMeta(type):
         func = resource_class.__dict__[lazy_method]
         for name, v in list(resource_class.__dict__.items()):
             if not name.startswith('_') and name.isupper():
-                setattr(resource_class, name, LazyMethodCall(func, singleton=True)(v))
+                setattr(resource_class, name,
+                        LazyMethodCall(func, singleton=True,
+                                       batch_method=lazy_batch_method,
+                                       memoize=lazy_memoize)(v))
 
         return resource_class
 
     # Python 3.5 compatibility
     def __init__(metacls, cls, bases, namespace, **kwargs):
         super().__init__(cls, bases, namespace)
+
+
+def invalidate_constants(instance: object, *names: str):
+    """
+    Removes the values memoized in the instance by :py:class:`.LazyMethodCall`,
+    see :py:class:`.LazyConstantsMeta`. They are computed again on the next
+    access. The singletons stored in the container are not affected.
+
+    .. doctest::
+
+        >>> import antidote
+        >>> class Conf(metaclass=antidote.LazyConstantsMeta, lazy_memoize=True):
+        ...     DOMAIN = 'domain'
+        ...
+        ...     def get(self, key):
+        ...         print("Retrieving {}".format(key))
+        ...         return 'example.com'
+        ...
+        >>> conf = Conf()
+        >>> conf.DOMAIN
+        Retrieving domain
+        'example.com'
+        >>> conf.DOMAIN
+        'example.com'
+        >>> antidote.invalidate_constants(conf)
+        >>> conf.DOMAIN
+        Retrieving domain
+        'example.com'
+
+    Args:
+        instance: Instance in which the values were memoized.
+        *names: Names of the constants to reset. Defaults to all of them.
+    """
+    constants = set()  # type: Set[str]
+    for cls in type(instance).__mro__:
+        constants.update(name
+                         for name, value in cls.__dict__.items()
+                         if isinstance(value, LazyMethodCall))
+
+    for name in names:
+        if name not in constants:
+            raise ValueError("{!r} is not a lazy constant of {!r}".format(
+                name, type(instance)))
+
+    instance_dict = getattr(instance, '__dict__', {})
+    for name in names or constants:
+        instance_dict.pop(name, None)
@@ -1,8 +1,9 @@
 import inspect
-from typing import (Callable, cast, get_type_hints, Iterable, overload, TypeVar, Union)
+from typing import Callable, cast, Hashable, Iterable, overload, TypeVar, Union
 
 from .register import register
 from .wire import wire
+from .._internal.argspec import Arguments
 from .._internal.default_container import get_default_container
 from ..core import DEPENDENCIES_TYPE, DependencyContainer, inject
 from ..exceptions import DuplicateDependencyError
@@ -22,6 +23,9 @@ def factory(func: F,  # noqa: E704  # pragma: no cover
             use_type_hints: Union[bool, Iterable[str]] = None,
             wire_super: Union[bool, Iterable[str]] = None,
             tags: Iterable[Union[str, Tag]] = None,
+            build_cache_size: int = None,
+            concurrent: bool = False,
+            outputs: Iterable[Hashable] = None,
             container: DependencyContainer = None
             ) -> F: ...
 
@@ -35,6 +39,9 @@ def factory(*,  # noqa: E704  # pragma: no cover
             use_type_hints: Union[bool, Iterable[str]] = None,
             wire_super: Union[bool, Iterable[str]] = None,
             tags: Iterable[Union[str, Tag]] = None,
+            build_cache_size: int = None,
+            concurrent: bool = False,
+            outputs: Iterable[Hashable] = None,
             container: DependencyContainer = None
             ) -> Callable[[F], F]: ...
 
@@ -48,6 +55,9 @@ def factory(func: Union[Callable, type] = None,
             use_type_hints: Union[bool, Iterable[str]] = None,
             wire_super: Union[bool, Iterable[str]] = None,
             tags: Iterable[Union[str, Tag]] = None,
+            build_cache_size: int = None,
+            concurrent: bool = False,
+            outputs: Iterable[Hashable] = None,
             container: DependencyContainer = None
             ):
     """Register a dependency providers, a factory to build the dependency.
@@ -85,6 +95,19 @@ def factory(func: Union[Callable, type] = None,
             (the tag name) or :py:class:`~.providers.tag.Tag`. All
             dependencies with a specific tag can then be retrieved with
             a :py:class:`~.providers.tag.Tagged`.
+        build_cache_size: If specified, at most this number of singletons
+            created with :py:class:`~.providers.factory.Build` are kept, the
+            least recently used ones being discarded. Defaults to keeping all
+            of them.
+        concurrent: If True, the dependency is instantiated without holding the
+            container's global lock, so several threads can build it at the
+            same time. Its factory must be thread-safe. Only for non-singletons
+            and thread-local dependencies. Dependency cycles are still detected
+            within each thread.
+        outputs: If specified, :code:`func` must be a function returning a
+            mapping of those dependencies to their instance. All of them are
+            created with a single call the first time any of them is requested.
+            The return annotation is not used in this case.
         container: :py:class:`~.core.container.DependencyContainer` to which the
             dependency should be attached. Defaults to the global container,
             :code:`antidote.world`.
@@ -93,12 +116,21 @@ def factory(func: Union[Callable, type] = None,
         object: The dependency_provider
 
     """
+    if outputs is not None:
+        outputs = tuple(outputs)
+        if not singleton:
+            raise ValueError("Multiple outputs are always singletons.")
+
     container = container or get_default_container()
 
     def register_factory(obj):
         factory_provider = cast(FactoryProvider,
                                 container.providers[FactoryProvider])
 
+        if outputs is not None and not inspect.isfunction(obj):
+            raise TypeError("Multiple outputs are only supported for functions, "
+                            "not {!r}".format(type(obj)))
+
         if inspect.isclass(obj):
             if '__call__' not in dir(obj):
                 raise TypeError("The class must implement __call__()")
@@ -124,7 +156,7 @@ def factory(func: Union[Callable, type] = None,
                            container=container)
 
             obj = register(obj, auto_wire=False, singleton=True, container=container)
-            dependency = get_type_hints(obj.__call__).get('return')
+            dependency = Arguments.from_callable(obj.__call__).return_type_hint
             if dependency is None:
                 raise ValueError("The return annotation is necessary on __call__."
                                  "It is used a the dependency.")
@@ -132,7 +164,9 @@ def factory(func: Union[Callable, type] = None,
                 dependency=dependency,
                 singleton=singleton,
                 takes_dependency=False,
-                factory_dependency=obj
+                factory_dependency=obj,
+                build_cache_size=build_cache_size,
+                concurrent=concurrent
             )
         elif callable(obj):
             if auto_wire:
@@ -142,14 +176,21 @@ def factory(func: Union[Callable, type] = None,
                              use_type_hints=use_type_hints,
                              container=container)
 
-            dependency = get_type_hints(obj).get('return')
-            if dependency is None:
-                raise ValueError("A return annotation is necessary."
-                                 "It is used a the dependency.")
-            factory_provider.register_factory(factory=obj,
-                                              singleton=singleton,
-                                              dependency=dependency,
-                                              takes_dependency=False)
+            if outputs is not None:
+                factory_provider.register_multi_factory(dependencies=outputs,
+                                                        factory=obj)
+                dependency = None
+            else:
+                dependency = Arguments.from_callable(obj).return_type_hint
+                if dependency is None:
+                    raise ValueError("A return annotation is necessary."
+                                     "It is used a the dependency.")
+                factory_provider.register_factory(factory=obj,
+                                                  singleton=singleton,
+                                                  dependency=dependency,
+                                                  takes_dependency=False,
+                                                  build_cache_size=build_cache_size,
+                                                  concurrent=concurrent)
         else:
             raise TypeError("Must be either a function "
                             "or a class implementing __call__(), "
@@ -157,8 +198,12 @@ def factory(func: Union[Callable, type] = None,
 
         if tags is not None:
             tag_provider = cast(TagProvider, container.providers[TagProvider])
-            tag_provider.register(dependency=dependency,
-                                  tags=tags)
+            if outputs is None:
+                tag_provider.register(dependency=dependency, tags=tags)
+            else:
+                output_tags = list(tags)
+                for output in outputs:
+                    tag_provider.register(dependency=output, tags=output_tags)
 
         return obj
 
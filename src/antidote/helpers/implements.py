@@ -12,6 +12,7 @@ T = TypeVar('T', bound=type)
 def implements(interface: type,
                *,
                state: Enum = None,
+               cache_state: bool = False,
                container: DependencyContainer = None) -> Callable[[T], T]:
     """
     Class decorator declaring the underlying class as a (possible) implementation
@@ -25,7 +26,13 @@ def implements(interface: type,
             :py:class:`~enum.Enum` should be used to identify all the possible
             states the application may be. Each state should be associated with
             one implementation. At runtime Antidote will retrieve the state
-            (the :py:class:`~enum.Enum`) class to determine the current state.
+            (the :py:class:`~enum.Enum`) class to determine the current state,
+            or read it from a context variable registered with
+            :py:meth:`~.providers.indirect.IndirectProvider.register_state_var`.
+        cache_state: Whether the state should only be retrieved once, until
+            :py:meth:`~.providers.indirect.IndirectProvider.notify_state_change`
+            is called with the :py:class:`~enum.Enum` class. Useful when
+            the state is not a singleton. Defaults to :code:`False`.
         container: :py:class:`~.core.container.DependencyContainer` from which
             the dependencies should be retrieved. Defaults to the global
             container if it is defined.
@@ -45,7 +52,7 @@ def implements(interface: type,
 
         interface_provider = cast(IndirectProvider,
                                   container.providers[IndirectProvider])
-        interface_provider.register(interface, cls, state)
+        interface_provider.register(interface, cls, state, cache_state)
 
         return cls
 
@@ -0,0 +1,44 @@
+import warnings
+from contextlib import contextmanager
+from typing import Iterator
+
+from .._internal.manifest import Manifest, set_current_manifest
+
+
+@contextmanager
+def manifest(path: str) -> Iterator[None]:
+    """
+    Caches on disk the analysis of the functions and methods wired, injected
+    or registered within the context, typically the import of the
+    application. Later starts load the signatures and type hints from the
+    manifest instead of computing them again.
+
+    .. testcode::
+
+        import os, tempfile
+        from antidote import manifest
+
+        path = os.path.join(tempfile.mkdtemp(), 'app.antidote')
+        with manifest(path):
+            from antidote import helpers  # import your application here
+
+    Similar to :code:`.pyc` files, the analysis of a function is invalidated
+    whenever the modification time or the size of its source file, or of the
+    source files of the modules defining its type hints, changes. Other
+    modules through which a type hint is retrieved, such as one re-exporting
+    it, are not checked. Nested functions and lambdas are never cached.
+
+    Args:
+        path: File in which the manifest is stored. It does not need to exist.
+            Failing to write it only emits a warning.
+    """
+    current = Manifest.load(path)
+    previous = set_current_manifest(current)
+    try:
+        yield
+    finally:
+        set_current_manifest(previous)
+        try:
+            current.dump()
+        except OSError as e:
+            warnings.warn("Could not write Antidote manifest {!r}: {}".format(path, e))
@@ -1,10 +1,13 @@
 import collections.abc as c_abc
+import functools
+import importlib
 import inspect
-from typing import Any, Callable, cast, Iterable, overload, TypeVar, Union
+from typing import (Any, Callable, cast, Iterable, Optional, overload, Tuple, TypeVar,
+                    Union)
 
 from .wire import wire
 from .._internal.default_container import get_default_container
-from ..core import DEPENDENCIES_TYPE, DependencyContainer, inject
+from ..core import DEPENDENCIES_TYPE, DependencyContainer, inject, PoolSpec
 from ..providers.factory import FactoryProvider
 from ..providers.tag import Tag, TagProvider
 
@@ -23,6 +26,10 @@ def register(class_: C,  # noqa: E704  # pragma: no cover
              use_type_hints: Union[bool, Iterable[str]] = None,
              wire_super: Union[bool, Iterable[str]] = None,
              tags: Iterable[Union[str, Tag]] = None,
+             pool: PoolSpec = None,
+             thread_local: bool = False,
+             build_cache_size: int = None,
+             concurrent: bool = False,
              container: DependencyContainer = None
              ) -> C: ...
 
@@ -38,6 +45,10 @@ def register(*,  # noqa: E704  # pragma: no cover
              use_type_hints: Union[bool, Iterable[str]] = None,
              wire_super: Union[bool, Iterable[str]] = None,
              tags: Iterable[Union[str, Tag]] = None,
+             pool: PoolSpec = None,
+             thread_local: bool = False,
+             build_cache_size: int = None,
+             concurrent: bool = False,
              container: DependencyContainer = None
              ) -> Callable[[C], C]: ...
 
@@ -53,6 +64,10 @@ def register(class_=None,
              use_type_hints: Union[bool, Iterable[str]] = None,
              wire_super: Union[bool, Iterable[str]] = None,
              tags: Iterable[Union[str, Tag]] = None,
+             pool: PoolSpec = None,
+             thread_local: bool = False,
+             build_cache_size: int = None,
+             concurrent: bool = False,
              container: DependencyContainer = None):
     """Register a dependency by its class.
 
@@ -96,6 +111,24 @@ def register(class_=None,
             (the tag name) or :py:class:`~.providers.tag.Tag`. All
             dependencies with a specific tag can then be retrieved with
             a :py:class:`~.providers.tag.Tagged`.
+        pool: If specified, injected instances are checked out of a bounded
+            pool, defined by this :py:class:`~.core.pool.PoolSpec`, and given
+            back once the injected function returns. Retrieving the dependency
+            directly returns the :py:class:`~.core.pool.Pool` itself. Pooled
+            dependencies cannot be injected into generators, coroutines and
+            :code:`__init__()`.
+        thread_local: If True, one instance is created per thread and reused
+            by it. Instances are released when their thread exits. Overrides
+            :code:`singleton`.
+        build_cache_size: If specified, at most this number of singletons
+            created with :py:class:`~.providers.factory.Build` are kept, the
+            least recently used ones being discarded. Defaults to keeping all
+            of them.
+        concurrent: If True, the dependency is instantiated without holding the
+            container's global lock, so several threads can build it at the
+            same time. Its factory must be thread-safe. Only for non-singletons
+            and thread-local dependencies. Dependency cycles are still detected
+            within each thread.
         container: :py:class:`~.core.container.DependencyContainer` to which the
             dependency should be attached. Defaults to the global container,
             :code:`antidote.world`.
@@ -107,87 +140,51 @@ def register(class_=None,
     if factory is not None and factory_dependency is not None:
         raise ValueError("factory and factory_dependency cannot be used together.")
 
-    if not (factory is None or isinstance(factory, str) or inspect.isfunction(factory)):
-        raise TypeError("factory must be either None, a method name or a function "
-                        "not {!r}".format(type(factory)))
-
+    _check_factory(factory)
+    _check_pool(pool, thread_local)
     container = container or get_default_container()
-    auto_wire = auto_wire if auto_wire is not None else True
-    methods = ()  # type: Iterable[str]
-    wire_raise_on_missing = True
-
-    if isinstance(auto_wire, bool):  # for Mypy
-        if auto_wire:
-            if isinstance(factory, str):
-                methods = (factory,)
-                if wire_super is None:
-                    wire_super = (factory,)
-            elif factory is None:
-                wire_raise_on_missing = False
-                methods = ('__init__',)
-    else:
-        methods = auto_wire
 
     def register_service(cls):
-        nonlocal factory
-
         if not inspect.isclass(cls):
             raise TypeError("Expected a class, got {!r}".format(cls))
 
-        takes_dependency = False
-        if isinstance(factory, str):
-            static_factory = inspect.getattr_static(cls, factory)
-            if not isinstance(static_factory, (staticmethod, classmethod)):
-                raise TypeError("Only class methods and static methods "
-                                "are supported as factories. Not "
-                                "{!r}".format(static_factory))
-            if isinstance(static_factory, staticmethod):
-                takes_dependency = True
-
-        if auto_wire:
-            cls = wire(cls,
-                       methods=methods,
-                       wire_super=wire_super,
-                       dependencies=dependencies,
-                       use_names=use_names,
-                       use_type_hints=use_type_hints,
-                       container=container,
-                       raise_on_missing=wire_raise_on_missing)
-
-        if isinstance(factory, str):
-            # Retrieve injected class/static method
-            factory = cast(Callable, getattr(cls, factory))
-        elif inspect.isfunction(factory):
-            takes_dependency = True
-            if not isinstance(dependencies, c_abc.Mapping) \
-                    and isinstance(dependencies, c_abc.Iterable):
-                # takes dependency as first argument
-                factory_dependencies = (None,) + tuple(dependencies)
-            else:
-                factory_dependencies = dependencies
-
-            if auto_wire:
-                factory = inject(factory,
-                                 dependencies=factory_dependencies,
-                                 use_names=use_names,
-                                 use_type_hints=use_type_hints,
-                                 container=container)
+        cls, service_factory, takes_dependency = _wire_service(
+            cls,
+            factory=factory,
+            auto_wire=auto_wire,
+            dependencies=dependencies,
+            use_names=use_names,
+            use_type_hints=use_type_hints,
+            wire_super=wire_super,
+            container=container
+        )
 
         factory_provider = cast(FactoryProvider, container.providers[FactoryProvider])
-        if factory is not None:
+        if service_factory is not None:
             factory_provider.register_factory(
                 dependency=cls,
-                factory=factory,
+                factory=service_factory,
                 singleton=singleton,
-                takes_dependency=takes_dependency)
+                takes_dependency=takes_dependency,
+                pool=pool,
+                thread_local=thread_local,
+                build_cache_size=build_cache_size,
+                concurrent=concurrent)
         elif factory_dependency is not None:
             factory_provider.register_providable_factory(
                 dependency=cls,
                 factory_dependency=factory_dependency,
                 singleton=singleton,
-                takes_dependency=True)
+                takes_dependency=True,
+                pool=pool,
+                thread_local=thread_local,
+                build_cache_size=build_cache_size,
+                concurrent=concurrent)
         else:
-            factory_provider.register_class(cls, singleton=singleton)
+            factory_provider.register_class(cls, singleton=singleton, pool=pool,
+                                            thread_local=thread_local,
+                                            build_cache_size=build_cache_size,
+                                            concurrent=concurrent)
 
         if tags is not None:
             tag_provider = cast(TagProvider, container.providers[TagProvider])
@@ -196,3 +193,237 @@ def register(class_=None,
         return cls
 
     return class_ and register_service(class_) or register_service
+
+
+def register_lazy(import_path: str,
+                  *,
+                  singleton: bool = True,
+                  factory: Union[Callable, str] = None,
+                  auto_wire: Union[bool, Iterable[str]] = None,
+                  dependencies: DEPENDENCIES_TYPE = None,
+                  use_names: Union[bool, Iterable[str]] = None,
+                  use_type_hints: Union[bool, Iterable[str]] = None,
+                  wire_super: Union[bool, Iterable[str]] = None,
+                  tags: Iterable[Union[str, Tag]] = None,
+                  pool: PoolSpec = None,
+                  thread_local: bool = False,
+                  build_cache_size: int = None,
+                  concurrent: bool = False,
+                  container: DependencyContainer = None) -> str:
+    """Register a dependency by the import path of its class, without importing
+    it. The module is only imported, and the class wired, the first time the
+    dependency is requested.
+
+    .. doctest::
+
+        >>> from antidote import register_lazy, world
+        >>> dependency = register_lazy('collections:OrderedDict')
+        >>> dependency
+        'collections:OrderedDict'
+        >>> world.get('collections:OrderedDict')
+        OrderedDict()
+
+    The import path itself is the dependency, the class is not registered.
+
+    Args:
+        import_path: Import path of the class formatted as
+            :code:`'package.module:Class'`.
+        singleton: If True, the class will be instantiated only once,
+            further will receive the same instance.
+        factory: Callable to be used when building the class. The dependency
+            is given as first argument. If a string is specified, it is
+            interpreted as the name of the method which has to be used to build
+            the class. The class is given as first argument for static methods
+            but not for class methods.
+        auto_wire: Injects automatically the dependencies of the methods
+            specified, or only of :code:`__init__()` if True.
+        dependencies: Can be either a mapping of arguments name to their
+            dependency, an iterable of dependencies or a function which returns
+            the dependency given the arguments name. If an iterable is specified,
+            the position of the arguments is used to determine their respective
+            dependency. An argument may be skipped by using :code:`None` as a
+            placeholder. The first argument is always ignored for methods (self)
+            and class methods (cls).Type hints are overridden. Defaults to :code:`None`.
+        use_names: Whether or not the arguments' name should be used as their
+            respective dependency. An iterable of argument names may also be
+            supplied to restrict this to those. Defaults to :code:`False`.
+        use_type_hints: Whether or not the type hints (annotations) should be
+            used as the arguments dependency. An iterable of argument names may
+            also be specified to restrict this to those. Any type hints from
+            the builtins (str, int...) or the typing (:py:class:`~typing.Optional`,
+            ...) are ignored. Defaults to :code:`True`.
+        wire_super: If a method from a super-class needs to be wired, specify
+            either a list of method names or :code:`True` to enable it for
+            all methods. Defaults to :code:`False`, only methods defined in the
+            class itself can be wired.
+        tags: Iterable of tag to be applied. Those must be either strings
+            (the tag name) or :py:class:`~.providers.tag.Tag`. All
+            dependencies with a specific tag can then be retrieved with
+            a :py:class:`~.providers.tag.Tagged`.
+        pool: If specified, injected instances are checked out of a bounded
+            pool, defined by this :py:class:`~.core.pool.PoolSpec`, and given
+            back once the injected function returns. Retrieving the dependency
+            directly returns the :py:class:`~.core.pool.Pool` itself. Pooled
+            dependencies cannot be injected into generators, coroutines and
+            :code:`__init__()`.
+        thread_local: If True, one instance is created per thread and reused
+            by it. Instances are released when their thread exits. Overrides
+            :code:`singleton`.
+        build_cache_size: If specified, at most this number of singletons
+            created with :py:class:`~.providers.factory.Build` are kept, the
+            least recently used ones being discarded. Defaults to keeping all
+            of them.
+        concurrent: If True, the dependency is instantiated without holding the
+            container's global lock, so several threads can build it at the
+            same time. Its factory must be thread-safe. Only for non-singletons
+            and thread-local dependencies. Dependency cycles are still detected
+            within each thread.
+        container: :py:class:`~.core.container.DependencyContainer` to which the
+            dependency should be attached. Defaults to the global container,
+            :code:`antidote.world`.
+
+    Returns:
+        The dependency, which is the import path.
+
+    """
+    if not isinstance(import_path, str):
+        raise TypeError("import_path must be a string, "
+                        "not {!r}".format(type(import_path)))
+
+    module_name, _, class_name = import_path.partition(':')
+    if not module_name or not class_name or ':' in class_name:
+        raise ValueError("import_path must be formatted as 'package.module:Class', "
+                         "not {!r}".format(import_path))
+
+    _check_factory(factory)
+    _check_pool(pool, thread_local)
+    container = container or get_default_container()
+
+    def load_factory():
+        cls = importlib.import_module(module_name)
+        for name in class_name.split('.'):
+            cls = getattr(cls, name)
+
+        if not inspect.isclass(cls):
+            raise TypeError("{!r} does not point to a class, "
+                            "but a {!r}".format(import_path, type(cls)))
+
+        cls, service_factory, takes_dependency = _wire_service(
+            cls,
+            factory=factory,
+            auto_wire=auto_wire,
+            dependencies=dependencies,
+            use_names=use_names,
+            use_type_hints=use_type_hints,
+            wire_super=wire_super,
+            container=container
+        )
+        if service_factory is None:
+            return cls
+
+        # The builder cannot know it beforehand, so the dependency is bound here.
+        if takes_dependency:
+            return functools.partial(service_factory, cls)
+        return service_factory
+
+    factory_provider = cast(FactoryProvider, container.providers[FactoryProvider])
+    factory_provider.register_lazy_factory(dependency=import_path,
+                                           factory_loader=load_factory,
+                                           singleton=singleton,
+                                           takes_dependency=False,
+                                           pool=pool,
+                                           thread_local=thread_local,
+                                           build_cache_size=build_cache_size,
+                                           concurrent=concurrent)
+
+    if tags is not None:
+        tag_provider = cast(TagProvider, container.providers[TagProvider])
+        tag_provider.register(import_path, tags)
+
+    return import_path
+
+
+def _check_pool(pool, thread_local: bool):
+    if pool is not None:
+        if not isinstance(pool, PoolSpec):
+            raise TypeError("pool must be a PoolSpec, not {!r}".format(type(pool)))
+        if thread_local:
+            raise ValueError("pool and thread_local cannot be used together.")
+
+
+def _check_factory(factory):
+    if not (factory is None or isinstance(factory, str) or inspect.isfunction(factory)):
+        raise TypeError("factory must be either None, a method name or a function "
+                        "not {!r}".format(type(factory)))
+
+
+def _wire_service(cls: type,
+                  *,
+                  factory: Optional[Union[Callable, str]],
+                  auto_wire: Optional[Union[bool, Iterable[str]]],
+                  dependencies: DEPENDENCIES_TYPE,
+                  use_names: Union[bool, Iterable[str]],
+                  use_type_hints: Union[bool, Iterable[str]],
+                  wire_super: Union[bool, Iterable[str]],
+                  container: DependencyContainer
+                  ) -> Tuple[type, Optional[Callable], bool]:
+    """
+    Wires the class and its factory. Returns the wired class, the factory if
+    the class is not its own factory and whether the factory takes the class
+    as first argument.
+    """
+    auto_wire = auto_wire if auto_wire is not None else True
+    methods = ()  # type: Iterable[str]
+    wire_raise_on_missing = True
+
+    if isinstance(auto_wire, bool):  # for Mypy
+        if auto_wire:
+            if isinstance(factory, str):
+                methods = (factory,)
+                if wire_super is None:
+                    wire_super = (factory,)
+            elif factory is None:
+                wire_raise_on_missing = False
+                methods = ('__init__',)
+    else:
+        methods = auto_wire
+
+    takes_dependency = False
+    if isinstance(factory, str):
+        static_factory = inspect.getattr_static(cls, factory)
+        if not isinstance(static_factory, (staticmethod, classmethod)):
+            raise TypeError("Only class methods and static methods "
+                            "are supported as factories. Not "
+                            "{!r}".format(static_factory))
+        if isinstance(static_factory, staticmethod):
+            takes_dependency = True
+
+    if auto_wire:
+        cls = wire(cls,
+                   methods=methods,
+                   wire_super=wire_super,
+                   dependencies=dependencies,
+                   use_names=use_names,
+                   use_type_hints=use_type_hints,
+                   container=container,
+                   raise_on_missing=wire_raise_on_missing)
+
+    if isinstance(factory, str):
+        # Retrieve injected class/static method
+        factory = cast(Callable, getattr(cls, factory))
+    elif inspect.isfunction(factory):
+        takes_dependency = True
+        factory_dependencies = dependencies  # type: DEPENDENCIES_TYPE
+        if not isinstance(dependencies, c_abc.Mapping) \
+                and isinstance(dependencies, c_abc.Iterable):
+            # takes dependency as first argument
+            factory_dependencies = (None,) + tuple(dependencies)
+
+        if auto_wire:
+            factory = inject(factory,
+                             dependencies=factory_dependencies,
+                             use_names=use_names,
+                             use_type_hints=use_type_hints,
+                             container=container)
+
+    return cls, cast(Optional[Callable], factory), takes_dependency
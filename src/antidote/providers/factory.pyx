@@ -1,6 +1,8 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
-from typing import Any, Callable, Dict, Hashable, Optional
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional
 
 # @formatter:off
 from cpython.dict cimport PyDict_GetItem
@@ -8,7 +10,10 @@ from cpython.ref cimport PyObject
 
 from antidote.core.container cimport (DependencyContainer, DependencyInstance,
                                      DependencyProvider)
-from ..exceptions import DuplicateDependencyError
+from .._internal.memory import deep_sizeof
+from .._internal.utils import freeze, SlotsReprMixin
+from ..core.pool import Pool, PoolSpec
+from ..exceptions import DependencyNotFoundError, DuplicateDependencyError
 # @formatter:on
 
 
@@ -46,11 +51,11 @@ cdef class Build:
             raise TypeError("Without additional arguments, Build must not be used.")
 
         try:
-            # Try most precise hash first
-            self._hash = hash((self.dependency, tuple(self.kwargs.items())))
+            # Lists, dictionaries and sets are hashed by their content.
+            self._hash = hash((self.dependency, freeze(self.kwargs)))
         except TypeError:
             # If type error, return the best error-free hash possible
-            self._hash = hash((self.dependency, tuple(self.kwargs.keys())))
+            self._hash = hash((self.dependency, frozenset(self.kwargs.keys())))
 
     def __hash__(self):
         return self._hash
@@ -63,10 +68,10 @@ cdef class Build:
     __str__ = __repr__
 
     def __eq__(self, other):
-        return isinstance(other, Build) \
-               and (self.dependency is other.dependency
-                    or self.dependency == other.dependency) \
-               and self.kwargs == self.kwargs  # noqa
+        return (isinstance(other, Build)
+                and (self.dependency is other.dependency
+                     or self.dependency == other.dependency)
+                and self.kwargs == other.kwargs)
 
 cdef class FactoryProvider(DependencyProvider):
     """
@@ -82,40 +87,76 @@ cdef class FactoryProvider(DependencyProvider):
         return "{}(factories={!r})".format(type(self).__name__,
                                            tuple(self._builders.keys()))
 
+    def memory_usage(self) -> int:
+        return deep_sizeof(self, self._builders, exclude=(self._container,))
+
     cpdef DependencyInstance provide(self, object dependency: Hashable):
         cdef:
             Builder builder
             Build build
             PyObject*ptr
             DependencyInstance f
+            object key = dependency
             object instance
             object factory
 
         if isinstance(dependency, Build):
             build = <Build> dependency
-            ptr = PyDict_GetItem(self._builders, build.dependency)
-        else:
-            ptr = PyDict_GetItem(self._builders, dependency)
+            key = build.dependency
+
+        ptr = PyDict_GetItem(self._builders, key)
 
         if ptr == NULL:
             return None
 
         builder = <Builder> ptr
 
-        if builder.factory_dependency is not None:
-            f = self._container.safe_provide(builder.factory_dependency)
-            if f.singleton:
-                builder.factory_dependency = None
-                builder.factory = f.instance
-            factory = f.instance
-        else:
-            factory = builder.factory
+        if builder.build_cache is not None and isinstance(dependency, Build):
+            try:
+                instance = builder.build_cache[dependency]
+            except KeyError:
+                pass
+            else:
+                builder.build_cache.move_to_end(dependency)
+                # Kept by the builder, not by the container.
+                return DependencyInstance.__new__(DependencyInstance, instance, False)
+
+        factory = builder.factory
+        if factory is None:
+            if builder.factory_loader is not None:
+                factory = builder.factory_loader()
+                builder.factory = factory
+                builder.factory_loader = None
+            else:
+                f = self._container.safe_provide(builder.factory_dependency)
+                if f.singleton:
+                    # Factory set before its dependency is cleared, so that
+                    # builders can be read without any lock.
+                    builder.factory = f.instance
+                    builder.factory_dependency = None
+                factory = f.instance
+
+            if builder.concurrent and builder.factory is not None:
+                self._container.register_concurrent(key, self)
+
+        if builder.pool is not None and not isinstance(dependency, Build):
+            if builder.takes_dependency:
+                factory = functools.partial(factory, dependency)
+            return DependencyInstance.__new__(DependencyInstance,
+                                              Pool(builder.pool, factory),
+                                              True)
 
         if isinstance(dependency, Build):
             if builder.takes_dependency:
                 instance = factory(build.dependency, **build.kwargs)
             else:
                 instance = factory(**build.kwargs)
+
+            if builder.build_cache is not None:
+                builder.build_cache[dependency] = instance
+                if len(builder.build_cache) > builder.build_cache_size:
+                    builder.build_cache.popitem(last=False)
+                return DependencyInstance.__new__(DependencyInstance, instance, False)
         else:
             if builder.takes_dependency:
                 instance = factory(dependency)
@@ -124,9 +165,21 @@ cdef class FactoryProvider(DependencyProvider):
 
         return DependencyInstance.__new__(DependencyInstance,
                                           instance,
-                                          builder.singleton)
-
-    def register_class(self, class_: type, singleton: bool = True):
+                                          builder.singleton,
+                                          builder.thread_local)
+
+    @property
+    def builders(self):
+        """ Returns the builders by their dependency. Not part of the public API. """
+        return self._builders.copy()
+
+    def register_class(self,
+                       class_: type,
+                       singleton: bool = True,
+                       pool: PoolSpec = None,
+                       thread_local: bool = False,
+                       build_cache_size: int = None,
+                       concurrent: bool = False):
         """
         Register a class which is both dependency and factory.
 
@@ -134,16 +187,33 @@ cdef class FactoryProvider(DependencyProvider):
             class_: dependency to register.
             singleton: Whether the dependency should be mark as singleton or
                 not for the :py:class:`~..core.DependencyContainer`.
+            pool: If specified, instances are checked out of a pool defined
+                by this :py:class:`~..core.pool.PoolSpec` when injected.
+            thread_local: If True, one instance is created per thread.
+                Overrides singleton.
+            build_cache_size: If specified, at most this number of singletons
+                created with :py:class:`~.Build` are kept, the least recently
+                used ones being discarded.
+            concurrent: If True, the factory is called without holding the
+                container's instantiation lock once it is known, so it must be
+                thread-safe. Only for non-singletons.
         """
         self.register_factory(dependency=class_, factory=class_,
-                              singleton=singleton, takes_dependency=False)
+                              singleton=singleton, takes_dependency=False,
+                              pool=pool, thread_local=thread_local,
+                              build_cache_size=build_cache_size,
+                              concurrent=concurrent)
         return class_
 
     def register_factory(self,
                          dependency: Hashable,
                          factory: Callable,
                          singleton: bool = True,
-                         takes_dependency: bool = False):
+                         takes_dependency: bool = False,
+                         pool: PoolSpec = None,
+                         thread_local: bool = False,
+                         build_cache_size: int = None,
+                         concurrent: bool = False):
         """
         Registers a factory for a dependency.
 
@@ -155,6 +225,16 @@ cdef class FactoryProvider(DependencyProvider):
             takes_dependency: If True, the factory will be given the requested
                 dependency as its first arguments. This allows re-using the
                 same factory for different dependencies.
+            pool: If specified, instances are checked out of a pool defined
+                by this :py:class:`~..core.pool.PoolSpec` when injected.
+            thread_local: If True, one instance is created per thread.
+                Overrides singleton.
+            build_cache_size: If specified, at most this number of singletons
+                created with :py:class:`~.Build` are kept, the least recently
+                used ones being discarded.
+            concurrent: If True, the factory is called without holding the
+                container's instantiation lock once it is known, so it must be
+                thread-safe. Only for non-singletons.
         """
         if dependency in self._builders:
             raise DuplicateDependencyError(dependency,
@@ -163,7 +243,13 @@ cdef class FactoryProvider(DependencyProvider):
         if callable(factory):
             self._builders[dependency] = Builder(singleton=singleton,
                                                  takes_dependency=takes_dependency,
-                                                 factory=factory)
+                                                 factory=factory,
+                                                 pool=pool,
+                                                 thread_local=thread_local,
+                                                 build_cache_size=build_cache_size,
+                                                 concurrent=concurrent)
+            if concurrent:
+                self._container.register_concurrent(dependency, self)
         else:
             raise TypeError("factory must be callable, not {!r}.".format(type(factory)))
 
@@ -171,7 +257,11 @@ cdef class FactoryProvider(DependencyProvider):
                                     dependency: Hashable,
                                     factory_dependency: Hashable,
                                     singleton: bool = True,
-                                    takes_dependency: bool = False):
+                                    takes_dependency: bool = False,
+                                    pool: PoolSpec = None,
+                                    thread_local: bool = False,
+                                    build_cache_size: int = None,
+                                    concurrent: bool = False):
         """
         Registers a lazy factory (retrieved only at the first instantiation) for
         a dependency.
@@ -184,6 +274,16 @@ cdef class FactoryProvider(DependencyProvider):
             takes_dependency: If True, the factory will be given the requested
                 dependency as its first arguments. This allows re-using the
                 same factory for different dependencies.
+            pool: If specified, instances are checked out of a pool defined
+                by this :py:class:`~..core.pool.PoolSpec` when injected.
+            thread_local: If True, one instance is created per thread.
+                Overrides singleton.
+            build_cache_size: If specified, at most this number of singletons
+                created with :py:class:`~.Build` are kept, the least recently
+                used ones being discarded.
+            concurrent: If True, the factory is called without holding the
+                container's instantiation lock once it is known, so it must be
+                thread-safe. Only for non-singletons.
         """
         if dependency in self._builders:
             raise DuplicateDependencyError(dependency,
@@ -191,7 +291,162 @@ cdef class FactoryProvider(DependencyProvider):
 
         self._builders[dependency] = Builder(singleton=singleton,
                                              takes_dependency=takes_dependency,
-                                             factory_dependency=factory_dependency)
+                                             factory_dependency=factory_dependency,
+                                             pool=pool,
+                                             thread_local=thread_local,
+                                             build_cache_size=build_cache_size,
+                                             concurrent=concurrent)
+
+    def register_lazy_factory(self,
+                              dependency: Hashable,
+                              factory_loader: Callable[[], Callable],
+                              singleton: bool = True,
+                              takes_dependency: bool = False,
+                              pool: PoolSpec = None,
+                              thread_local: bool = False,
+                              build_cache_size: int = None,
+                              concurrent: bool = False):
+        """
+        Registers a factory which is only loaded at the first instantiation of
+        the dependency. Typically used to defer the import of the module
+        defining it.
+
+        Args:
+            dependency: dependency to register.
+            factory_loader: Callable without arguments returning the factory.
+                Called at most once.
+            singleton: Whether the dependency should be mark as singleton or
+                not for the :py:class:`~..core.DependencyContainer`.
+            takes_dependency: If True, the factory will be given the requested
+                dependency as its first arguments. This allows re-using the
+                same factory for different dependencies.
+            pool: If specified, instances are checked out of a pool defined
+                by this :py:class:`~..core.pool.PoolSpec` when injected.
+            thread_local: If True, one instance is created per thread.
+                Overrides singleton.
+            build_cache_size: If specified, at most this number of singletons
+                created with :py:class:`~.Build` are kept, the least recently
+                used ones being discarded.
+            concurrent: If True, the factory is called without holding the
+                container's instantiation lock once it is known, so it must be
+                thread-safe. Only for non-singletons.
+        """
+        if dependency in self._builders:
+            raise DuplicateDependencyError(dependency,
+                                           self._builders[dependency])
+
+        if not callable(factory_loader):
+            raise TypeError("factory_loader must be callable, "
+                            "not {!r}.".format(type(factory_loader)))
+
+        self._builders[dependency] = Builder(singleton=singleton,
+                                             takes_dependency=takes_dependency,
+                                             factory_loader=factory_loader,
+                                             pool=pool,
+                                             thread_local=thread_local,
+                                             build_cache_size=build_cache_size,
+                                             concurrent=concurrent)
+
+    def register_multi_factory(self,
+                               dependencies: Iterable[Hashable],
+                               factory: Callable[[], Mapping]):
+        """
+        Registers a factory creating several dependencies with a single call.
+        It must return a mapping of all the dependencies to their instance. It
+        is only called the first time any of them is requested, the other
+        instances being kept until they are requested. Dependencies already
+        defined as singletons in the container, to override them, are left
+        untouched.
+
+        Args:
+            dependencies: dependencies to register.
+            factory: Callable used to instantiate all the dependencies.
+        """
+        dependencies = tuple(dependencies)
+        if not dependencies:
+            raise ValueError("At least one dependency must be specified.")
+
+        if not callable(factory):
+            raise TypeError("factory must be callable, not {!r}.".format(type(factory)))
+
+        for dependency in dependencies:
+            if dependency in self._builders:
+                raise DuplicateDependencyError(dependency,
+                                               self._builders[dependency])
+
+        multi_factory = MultiFactory(dependencies, factory)
+        for dependency in dependencies:
+            self._builders[dependency] = Builder(singleton=True,
+                                                 takes_dependency=True,
+                                                 factory=multi_factory)
+
+    def update_factory(self,
+                       dependency: Hashable,
+                       factory: Callable,
+                       takes_dependency: bool = False):
+        """
+        Replaces the factory of an already registered dependency. Its scope is
+        kept.
+
+        Args:
+            dependency: registered dependency.
+            factory: Callable used to instantiate the dependency from now on.
+            takes_dependency: If True, the factory will be given the requested
+                dependency as its first arguments.
+        """
+        try:
+            builder = self._builders[dependency]
+        except KeyError:
+            raise DependencyNotFoundError(dependency)
+
+        if not callable(factory):
+            raise TypeError("factory must be callable, not {!r}.".format(type(factory)))
+
+        self._builders[dependency] = Builder(singleton=builder.singleton,
+                                             takes_dependency=takes_dependency,
+                                             factory=factory,
+                                             pool=builder.pool,
+                                             thread_local=builder.thread_local,
+                                             build_cache_size=builder.build_cache_size,
+                                             concurrent=builder.concurrent)
+        if builder.concurrent:
+            self._container.register_concurrent(dependency, self)
+
+
+class MultiFactory(SlotsReprMixin):
+    """
+    Not part of the public API.
+
+    Factory of all the dependencies registered with
+    :py:meth:`~.FactoryProvider.register_multi_factory`.
+    """
+    __slots__ = ('dependencies', 'factory', 'instances')
+
+    def __init__(self, dependencies: tuple, factory: Callable[[], Mapping]):
+        self.dependencies = dependencies
+        self.factory = factory
+        # Instances of the first call, each one is stored as a singleton by the
+        # container requesting it. They are not added to any container
+        # directly, which would override its existing singletons.
+        self.instances = None  # type: Optional[Dict[Hashable, Any]]
+
+    def __call__(self, dependency: Hashable, **kwargs):
+        # Arguments passed through Build() only affect the requested instance.
+        if self.instances is not None and not kwargs:
+            return self.instances[dependency]
+
+        outputs = self.factory(**kwargs)
+        try:
+            instances = {d: outputs[d] for d in self.dependencies}
+        except KeyError as e:
+            raise ValueError("{!r} did not return {!r}".format(self.factory,
+                                                               e.args[0]))
+
+        if not kwargs:
+            self.instances = instances
+
+        return instances[dependency]
+
 
 cdef class Builder:
     """
@@ -201,27 +456,62 @@ cdef class Builder:
     has to be used.
     """
     cdef:
-        bint singleton
-        bint takes_dependency
-        object factory
-        object factory_dependency
+        readonly bint singleton
+        readonly bint takes_dependency
+        readonly object factory
+        readonly object factory_dependency
+        readonly object factory_loader
+        readonly object pool
+        readonly bint thread_local "is_thread_local"
+        readonly object build_cache_size
+        readonly object build_cache
+        readonly bint concurrent
 
     def __init__(self,
                  bint singleton,
                  bint takes_dependency,
                  factory: Optional[Callable] = None,
-                 factory_dependency: Optional[Hashable] = None):
-        assert factory is not None or factory_dependency is not None
-        self.singleton = singleton
+                 factory_dependency: Optional[Hashable] = None,
+                 factory_loader: Optional[Callable] = None,
+                 pool: Optional[PoolSpec] = None,
+                 bint thread_local = False,
+                 build_cache_size: Optional[int] = None,
+                 bint concurrent = False):
+        assert factory is not None \
+            or factory_dependency is not None \
+            or factory_loader is not None
+        if build_cache_size is not None \
+                and (not isinstance(build_cache_size, int) or build_cache_size < 1):
+            raise ValueError("build_cache_size must be a strictly positive integer, "
+                             "not {!r}".format(build_cache_size))
+        if concurrent and (singleton and not thread_local or pool is not None):
+            raise ValueError("Only non-singletons and thread-local dependencies can be "
+                             "instantiated concurrently.")
+        self.singleton = singleton and not thread_local
         self.takes_dependency = takes_dependency
         self.factory = factory
         self.factory_dependency = factory_dependency
+        self.factory_loader = factory_loader
+        self.pool = pool
+        self.thread_local = thread_local
+        self.build_cache_size = build_cache_size
+        self.concurrent = concurrent
+        # Least recently used instances created with Build() come first.
+        self.build_cache = (OrderedDict()
+                            if build_cache_size is not None and self.singleton
+                            else None)
 
     def __repr__(self):
         return ("{}(singleton={!r}, takes_dependency={!r}, factory={!r},"
-                "factory_dependency={!r})").format(
+                "factory_dependency={!r}, factory_loader={!r}, pool={!r}, "
+                "thread_local={!r}, build_cache_size={!r}, concurrent={!r})").format(
             type(self).__name__,
             self.singleton,
             self.takes_dependency,
             self.factory,
-            self.factory_dependency)
+            self.factory_dependency,
+            self.factory_loader,
+            self.pool,
+            self.thread_local,
+            self.build_cache_size,
+            self.concurrent)
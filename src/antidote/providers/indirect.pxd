@@ -5,6 +5,10 @@ from antidote.core.container cimport DependencyInstance, DependencyProvider
 cdef class IndirectProvider(DependencyProvider):
     cdef:
         dict _stateful_links
+        dict _direct_links
         dict _links
+        dict _state_vars
+        set _overridden
+        object __weakref__
 
     cpdef DependencyInstance provide(self, object dependency)
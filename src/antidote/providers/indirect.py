@@ -1,9 +1,12 @@
+import weakref
 from enum import Enum
-from typing import Dict, Hashable, Optional
+from typing import Any, Dict, Hashable, Mapping, Optional, Set
 
 from .._internal.utils import SlotsReprMixin
 from ..core import DependencyInstance, DependencyProvider
-from ..exceptions import DuplicateDependencyError, UndefinedContextError
+from ..core.container import dependency_slot, release_dependency_slot
+from ..exceptions import (DependencyCycleError, DuplicateDependencyError,
+                          UndefinedContextError)
 
 
 class IndirectProvider(DependencyProvider):
@@ -14,7 +17,16 @@ class IndirectProvider(DependencyProvider):
     def __init__(self, container):
         super(IndirectProvider, self).__init__(container)
         self._stateful_links = dict()  # type: Dict[Hashable, StatefulLink]
+        # Links as registered, and collapsed to their last target.
+        self._direct_links = dict()  # type: Dict[Hashable, Hashable]
         self._links = dict()  # type: Dict[Hashable, Hashable]
+        self._state_vars = dict()  # type: Dict[Hashable, Any]
+        # Linked dependencies overridden in the container, at which the
+        # collapsed links must stop.
+        self._overridden = set()  # type: Set[Hashable]
+        finalizer = weakref.finalize(self, _release_targets, self._stateful_links)
+        finalizer.atexit = False
+        container.add_singletons_listener(self._update_links)
 
     def provide(self, dependency: Hashable) -> Optional[DependencyInstance]:
         try:
@@ -25,25 +37,138 @@ class IndirectProvider(DependencyProvider):
             except KeyError:
                 return None
             else:
-                state = self._container.safe_provide(
-                    stateful_link.state_dependency
-                )
+                if stateful_link.state_var is not None:
+                    try:
+                        state_value = stateful_link.state_var.get()
+                    except LookupError:
+                        raise UndefinedContextError(dependency, None)
+                    state_singleton = False
+                else:
+                    state = stateful_link.state
+                    if state is None:
+                        state = self._container.safe_provide(
+                            stateful_link.state_dependency
+                        )
+                        if stateful_link.cache_state:
+                            stateful_link.state = state
+                    state_value = state.instance
+                    state_singleton = state.singleton
 
                 try:
-                    target = stateful_link.targets[state.instance]
+                    target = stateful_link.targets[state_value]
                 except KeyError:
-                    raise UndefinedContextError(dependency, state.instance)
+                    raise UndefinedContextError(dependency, state_value)
+
+                # Singleton targets are cached by the container in their slot,
+                # which is cleared when its singletons are updated.
+                slot = stateful_link.slots[state_value]
+                try:
+                    t = self._container._singleton_slots[slot]
+                except IndexError:
+                    t = None
+                if t is None:
+                    t = self._container.safe_provide(target)
+                    if t.singleton:
+                        self._container._fill_slot(slot, target, t)
 
-                t = self._container.safe_provide(target)
                 return DependencyInstance(
                     t.instance,
-                    singleton=state.singleton & t.singleton
+                    singleton=state_singleton & t.singleton
                 )
         else:
             return self._container.safe_provide(target)
 
+    def notify_state_change(self, state_dependency: Hashable):
+        """
+        Notifies that the state retrieved from :code:`state_dependency` has
+        changed. Links registered with :code:`cache_state` and depending on
+        it will retrieve it again on their next request, others are left
+        untouched.
+
+        Args:
+            state_dependency: Dependency of the state, typically its
+                :py:class:`~enum.Enum` class.
+        """
+        for stateful_link in list(self._stateful_links.values()):
+            if stateful_link.state_dependency == state_dependency:
+                stateful_link.state = None
+
+    def register_state_var(self, state_dependency: Hashable, state_var):
+        """
+        Reads the state from a context variable instead of retrieving
+        :code:`state_dependency` from the container. Each context, such as a
+        request being processed, then gets the implementation of its own state
+        with a single lookup. Singleton implementations are still cached for
+        each state.
+
+        .. doctest::
+
+            >>> import contextvars, enum
+            >>> from antidote import implements, register, world
+            >>> from antidote.providers import IndirectProvider
+            >>> class Tenant(enum.Enum):
+            ...     FREE = 'free'
+            ...     PAID = 'paid'
+            >>> class Storage:
+            ...     pass
+            >>> @implements(Storage, state=Tenant.FREE)
+            ... @register
+            ... class LocalStorage(Storage):
+            ...     pass
+            >>> @implements(Storage, state=Tenant.PAID)
+            ... @register
+            ... class CloudStorage(Storage):
+            ...     pass
+            >>> tenant = contextvars.ContextVar('tenant')
+            >>> world.providers[IndirectProvider].register_state_var(Tenant, tenant)
+            >>> token = tenant.set(Tenant.PAID)
+            >>> type(world.get(Storage)).__name__
+            'CloudStorage'
+            >>> tenant.reset(token)
+
+        Args:
+            state_dependency: Dependency of the state, typically its
+                :py:class:`~enum.Enum` class.
+            state_var: :py:class:`~contextvars.ContextVar`, or any object
+                with a :code:`get()` method, returning the current state.
+                :py:exc:`~.exceptions.UndefinedContextError` is raised if it
+                has no value.
+        """
+        if not callable(getattr(state_var, 'get', None)):
+            raise TypeError("state_var must have a get() method, "
+                            "not a {!r}".format(type(state_var)))
+
+        self._state_vars[state_dependency] = state_var
+        for stateful_link in self._stateful_links.values():
+            if stateful_link.state_dependency == state_dependency:
+                stateful_link.state_var = state_var
+
     def register(self, dependency: Hashable, target_dependency: Hashable,
-                 state: Enum = None):
+                 state: Enum = None, cache_state: bool = False):
+        """
+        Registers target_dependency as the implementation of dependency, in
+        the given state if specified.
+
+        Chains of links are collapsed: if target_dependency is itself linked
+        to another dependency, dependency is directly linked to the latter,
+        unless target_dependency has been overridden with
+        :py:meth:`~.core.container.DependencyContainer.update_singletons`.
+        Links creating a cycle raise a
+        :py:exc:`~.exceptions.DependencyCycleError`.
+
+        Singleton targets are cached for each state. With :code:`cache_state`,
+        the state itself is only retrieved once, until
+        :py:meth:`.notify_state_change` is called.
+
+        Args:
+            dependency: Dependency, typically an interface.
+            target_dependency: Dependency to which it is linked.
+            state: Member of the :py:class:`~enum.Enum` identifying the
+                states in which target_dependency is used.
+            cache_state: Whether the state should be cached until a change is
+                notified, enabled for all the states of dependency. Defaults
+                to :code:`False`.
+        """
         if dependency in self._links:
             raise DuplicateDependencyError(dependency,
                                            self._links[dependency])
@@ -52,30 +177,111 @@ class IndirectProvider(DependencyProvider):
             if dependency in self._stateful_links:
                 raise DuplicateDependencyError(dependency,
                                                self._stateful_links[dependency])
+            self._direct_links[dependency] = target_dependency
+            target_dependency = self._final_target(dependency, target_dependency)
             self._links[dependency] = target_dependency
+
+            # Links to dependency now lead directly to its target.
+            if dependency not in self._overridden:
+                for linked_dependency, target in self._links.items():
+                    if target == dependency:
+                        self._links[linked_dependency] = target_dependency
+                for stateful_link in self._stateful_links.values():
+                    for state_, target in list(stateful_link.targets.items()):
+                        if target == dependency:
+                            stateful_link.set_target(state_, target_dependency)
         elif isinstance(state, Enum):
             try:
                 stateful_link = self._stateful_links[dependency]
             except KeyError:
                 stateful_link = StatefulLink(type(state))
+                stateful_link.state_var = self._state_vars.get(type(state))
                 self._stateful_links[dependency] = stateful_link
 
             if state in stateful_link.targets:
                 raise DuplicateDependencyError((dependency, state),
                                                stateful_link.targets[state])
 
-            stateful_link.targets[state] = target_dependency
+            stateful_link.direct_targets[state] = target_dependency
+            stateful_link.set_target(state, self._final_target(dependency,
+                                                               target_dependency))
+            stateful_link.cache_state = stateful_link.cache_state or cache_state
         else:
             raise TypeError("profile must be an instance of Flag or be None, "
                             "not a {!r}".format(type(state)))
 
+    def _update_links(self, singletons: Mapping):
+        """
+        Stops the collapsed links at the linked dependencies overridden in the
+        container, so that the overrides are used.
+        """
+        overridden = [dependency
+                      for dependency in singletons
+                      if dependency in self._direct_links
+                      and dependency not in self._overridden]
+        if not overridden:
+            return
+
+        self._overridden.update(overridden)
+        for dependency, target in self._direct_links.items():
+            self._links[dependency] = self._final_target(dependency, target)
+        for dependency, stateful_link in self._stateful_links.items():
+            for state, target in stateful_link.direct_targets.items():
+                target = self._final_target(dependency, target)
+                if stateful_link.targets[state] != target:
+                    stateful_link.set_target(state, target)
+
+    def _final_target(self, dependency: Hashable, target_dependency: Hashable
+                      ) -> Hashable:
+        """
+        Follows the links from target_dependency and returns the last
+        dependency, raising a DependencyCycleError if it leads to dependency.
+        Overridden dependencies are never followed.
+        """
+        chain = [dependency]
+        while True:
+            if target_dependency in chain:
+                raise DependencyCycleError(chain + [target_dependency])
+            if target_dependency in self._overridden:
+                return target_dependency
+            try:
+                next_target = self._links[target_dependency]
+            except KeyError:
+                return target_dependency
+            chain.append(target_dependency)
+            target_dependency = next_target
+
 
 class StatefulLink(SlotsReprMixin):
     """
     Internal API
     """
-    __slots__ = ('state_dependency', 'targets')
+    __slots__ = ('state_dependency', 'direct_targets', 'targets', 'slots',
+                 'cache_state', 'state', 'state_var')
 
     def __init__(self, state_dependency: Hashable):
         self.state_dependency = state_dependency
+        # Targets as registered, and collapsed to their last target.
+        self.direct_targets = dict()  # type: Dict[Enum, Hashable]
         self.targets = dict()  # type: Dict[Enum, Hashable]
+        # Slots of the targets, in which the container stores their singleton.
+        self.slots = dict()  # type: Dict[Enum, int]
+        self.cache_state = False
+        self.state = None  # type: Optional[DependencyInstance]
+        self.state_var = None  # type: Any
+
+    def set_target(self, state: Enum, target: Hashable):
+        slot = dependency_slot(target)
+        if state in self.targets:
+            release_dependency_slot(self.targets[state])
+        self.targets[state] = target
+        self.slots[state] = slot
+
+
+def _release_targets(stateful_links: Dict[Hashable, StatefulLink]):
+    """
+    Releases the slots of the targets once the provider is garbage collected.
+    """
+    for stateful_link in stateful_links.values():
+        for target in stateful_link.targets.values():
+            release_dependency_slot(target)
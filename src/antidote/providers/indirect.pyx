@@ -1,14 +1,20 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
+import weakref
 from enum import Enum
-from typing import Hashable, Dict
+from typing import Any, Dict, Hashable, Mapping, Set
 
 # @formatter:off
 from cpython.dict cimport PyDict_GetItem
+from cpython.list cimport PyList_GET_ITEM, PyList_GET_SIZE
+from cpython.long cimport PyLong_AsSsize_t
 from cpython.object cimport PyObject
 
 from antidote.core.container cimport DependencyInstance, DependencyProvider
-from ..exceptions import DuplicateDependencyError, UndefinedContextError
+from .._internal.memory import deep_sizeof
+from ..core.container import dependency_slot, release_dependency_slot
+from ..exceptions import (DependencyCycleError, DuplicateDependencyError,
+                          UndefinedContextError)
 # @formatter:on
 
 
@@ -16,7 +22,24 @@ cdef class IndirectProvider(DependencyProvider):
     def __init__(self, container):
         super(IndirectProvider, self).__init__(container)
         self._stateful_links = dict()  # type: Dict[Hashable, StatefulLink]
+        # Links as registered, and collapsed to their last target.
+        self._direct_links = dict()  # type: Dict[Hashable, Hashable]
         self._links = dict()  # type: Dict[Hashable, Hashable]
+        self._state_vars = dict()  # type: Dict[Hashable, Any]
+        # Linked dependencies overridden in the container, at which the
+        # collapsed links must stop.
+        self._overridden = set()  # type: Set[Hashable]
+        finalizer = weakref.finalize(self, _release_targets, self._stateful_links)
+        finalizer.atexit = False
+        container.add_singletons_listener(self._update_links)
+
+    def memory_usage(self) -> int:
+        cdef StatefulLink link
+        objects = [self, self._stateful_links, self._direct_links, self._links,
+                   self._state_vars, self._overridden]
+        for link in self._stateful_links.values():
+            objects.extend((link.direct_targets, link.targets, link.slots))
+        return deep_sizeof(*objects, exclude=(self._container,))
 
     cpdef DependencyInstance provide(self, object dependency):
         cdef:
@@ -24,6 +47,9 @@ cdef class IndirectProvider(DependencyProvider):
             object service
             StatefulLink stateful_link
             DependencyInstance state
+            object state_value
+            bint state_singleton
+            Py_ssize_t slot
             DependencyInstance ContextualTarget_dependency
 
         ptr = PyDict_GetItem(self._links, dependency)
@@ -33,24 +59,145 @@ cdef class IndirectProvider(DependencyProvider):
         ptr = PyDict_GetItem(self._stateful_links, dependency)
         if ptr != NULL:
             stateful_link = <StatefulLink> ptr
-            state = self._container.safe_provide(
-                stateful_link.state_dependency
-            )
+            if stateful_link.state_var is not None:
+                try:
+                    state_value = stateful_link.state_var.get()
+                except LookupError:
+                    raise UndefinedContextError(dependency, None)
+                state_singleton = False
+            else:
+                state = stateful_link.state
+                if state is None:
+                    state = self._container.safe_provide(
+                        stateful_link.state_dependency
+                    )
+                    if stateful_link.cache_state:
+                        stateful_link.state = state
+                state_value = state.instance
+                state_singleton = state.singleton
 
-            ptr = PyDict_GetItem(stateful_link.targets, state.instance)
+            ptr = PyDict_GetItem(stateful_link.targets, state_value)
             if ptr == NULL:
-                raise UndefinedContextError(dependency, state.instance)
+                raise UndefinedContextError(dependency, state_value)
+
+            # Singleton targets are cached by the container in their slot,
+            # which is cleared when its singletons are updated.
+            slot = PyLong_AsSsize_t(<object> PyDict_GetItem(stateful_link.slots,
+                                                            state_value))
+            target = None
+            if slot < PyList_GET_SIZE(self._container._singleton_slots):
+                target = <object> PyList_GET_ITEM(self._container._singleton_slots,
+                                                  slot)
+            if target is None:
+                target = self._container.safe_provide(<object> ptr)
+                if target.singleton:
+                    self._container._fill_slot(slot, <object> ptr, target)
 
-            target = self._container.safe_provide(<object> ptr)
             return DependencyInstance.__new__(
                 DependencyInstance,
                 target.instance,
-                state.singleton & target.singleton
+                state_singleton & target.singleton
             )
 
         return None
 
-    def register(self, dependency: Hashable, target_dependency: Hashable, state: Enum = None):
+    def notify_state_change(self, state_dependency: Hashable):
+        """
+        Notifies that the state retrieved from :code:`state_dependency` has
+        changed. Links registered with :code:`cache_state` and depending on
+        it will retrieve it again on their next request, others are left
+        untouched.
+
+        Args:
+            state_dependency: Dependency of the state, typically its
+                :py:class:`~enum.Enum` class.
+        """
+        cdef:
+            StatefulLink stateful_link
+
+        for stateful_link in list(self._stateful_links.values()):
+            if stateful_link.state_dependency == state_dependency:
+                stateful_link.state = None
+
+    def register_state_var(self, state_dependency: Hashable, state_var):
+        """
+        Reads the state from a context variable instead of retrieving
+        :code:`state_dependency` from the container. Each context, such as a
+        request being processed, then gets the implementation of its own state
+        with a single lookup. Singleton implementations are still cached for
+        each state.
+
+        .. doctest::
+
+            >>> import contextvars, enum
+            >>> from antidote import implements, register, world
+            >>> from antidote.providers import IndirectProvider
+            >>> class Tenant(enum.Enum):
+            ...     FREE = 'free'
+            ...     PAID = 'paid'
+            >>> class Storage:
+            ...     pass
+            >>> @implements(Storage, state=Tenant.FREE)
+            ... @register
+            ... class LocalStorage(Storage):
+            ...     pass
+            >>> @implements(Storage, state=Tenant.PAID)
+            ... @register
+            ... class CloudStorage(Storage):
+            ...     pass
+            >>> tenant = contextvars.ContextVar('tenant')
+            >>> world.providers[IndirectProvider].register_state_var(Tenant, tenant)
+            >>> token = tenant.set(Tenant.PAID)
+            >>> type(world.get(Storage)).__name__
+            'CloudStorage'
+            >>> tenant.reset(token)
+
+        Args:
+            state_dependency: Dependency of the state, typically its
+                :py:class:`~enum.Enum` class.
+            state_var: :py:class:`~contextvars.ContextVar`, or any object
+                with a :code:`get()` method, returning the current state.
+                :py:exc:`~.exceptions.UndefinedContextError` is raised if it
+                has no value.
+        """
+        cdef:
+            StatefulLink stateful_link
+
+        if not callable(getattr(state_var, 'get', None)):
+            raise TypeError("state_var must have a get() method, "
+                            "not a {!r}".format(type(state_var)))
+
+        self._state_vars[state_dependency] = state_var
+        for stateful_link in self._stateful_links.values():
+            if stateful_link.state_dependency == state_dependency:
+                stateful_link.state_var = state_var
+
+    def register(self, dependency: Hashable, target_dependency: Hashable, state: Enum = None,
+                 cache_state: bool = False):
+        """
+        Registers target_dependency as the implementation of dependency, in
+        the given state if specified.
+
+        Chains of links are collapsed: if target_dependency is itself linked
+        to another dependency, dependency is directly linked to the latter,
+        unless target_dependency has been overridden with
+        :py:meth:`~.core.container.DependencyContainer.update_singletons`.
+        Links creating a cycle raise a
+        :py:exc:`~.exceptions.DependencyCycleError`.
+
+        Singleton targets are cached for each state. With :code:`cache_state`,
+        the state itself is only retrieved once, until
+        :py:meth:`.notify_state_change` is called.
+
+        Args:
+            dependency: Dependency, typically an interface.
+            target_dependency: Dependency to which it is linked.
+            state: Member of the :py:class:`~enum.Enum` identifying the
+                states in which target_dependency is used.
+            cache_state: Whether the state should be cached until a change is
+                notified, enabled for all the states of dependency. Defaults
+                to :code:`False`.
+        """
         cdef:
             StatefulLink stateful_link
 
@@ -62,31 +209,110 @@ cdef class IndirectProvider(DependencyProvider):
             if dependency in self._stateful_links:
                 raise DuplicateDependencyError(dependency,
                                                self._stateful_links[dependency])
+            self._direct_links[dependency] = target_dependency
+            target_dependency = self._final_target(dependency, target_dependency)
             self._links[dependency] = target_dependency
+
+            # Links to dependency now lead directly to its target.
+            if dependency not in self._overridden:
+                for linked_dependency, target in self._links.items():
+                    if target == dependency:
+                        self._links[linked_dependency] = target_dependency
+                for stateful_link in self._stateful_links.values():
+                    for state_, target in list(stateful_link.targets.items()):
+                        if target == dependency:
+                            stateful_link.set_target(state_, target_dependency)
         elif isinstance(state, Enum):
             try:
                 stateful_link = self._stateful_links[dependency]
             except KeyError:
                 stateful_link = StatefulLink(type(state))
+                stateful_link.state_var = self._state_vars.get(type(state))
                 self._stateful_links[dependency] = stateful_link
 
             if state in stateful_link.targets:
                 raise DuplicateDependencyError((dependency, state),
                                                stateful_link.targets[state])
 
-            stateful_link.targets[state] = target_dependency
+            stateful_link.direct_targets[state] = target_dependency
+            stateful_link.set_target(state, self._final_target(dependency,
+                                                               target_dependency))
+            stateful_link.cache_state = stateful_link.cache_state or cache_state
         else:
             raise TypeError("profile must be an instance of Flag or be None, "
                             "not a {!r}".format(type(state)))
 
+    def _update_links(self, singletons: Mapping):
+        """
+        Stops the collapsed links at the linked dependencies overridden in the
+        container, so that the overrides are used.
+        """
+        cdef:
+            StatefulLink stateful_link
+
+        overridden = [dependency
+                      for dependency in singletons
+                      if dependency in self._direct_links
+                      and dependency not in self._overridden]
+        if not overridden:
+            return
+
+        self._overridden.update(overridden)
+        for dependency, target in self._direct_links.items():
+            self._links[dependency] = self._final_target(dependency, target)
+        for dependency, stateful_link in self._stateful_links.items():
+            for state, target in stateful_link.direct_targets.items():
+                target = self._final_target(dependency, target)
+                if stateful_link.targets[state] != target:
+                    stateful_link.set_target(state, target)
+
+    def _final_target(self, dependency: Hashable, target_dependency: Hashable
+                      ) -> Hashable:
+        """
+        Follows the links from target_dependency and returns the last
+        dependency, raising a DependencyCycleError if it leads to dependency.
+        Overridden dependencies are never followed.
+        """
+        chain = [dependency]
+        while True:
+            if target_dependency in chain:
+                raise DependencyCycleError(chain + [target_dependency])
+            if target_dependency in self._overridden:
+                return target_dependency
+            try:
+                next_target = self._links[target_dependency]
+            except KeyError:
+                return target_dependency
+            chain.append(target_dependency)
+            target_dependency = next_target
+
 cdef class StatefulLink:
     cdef:
         object state_dependency
+        dict direct_targets
         dict targets
+        dict slots
+        bint cache_state
+        DependencyInstance state
+        object state_var
 
     def __init__(self, state_dependency):
         self.state_dependency = state_dependency
+        # Targets as registered, and collapsed to their last target.
+        self.direct_targets = dict()  # type: Dict[Enum, Hashable]
         self.targets = dict()  # type: Dict[Enum, Hashable]
+        # Slots of the targets, in which the container stores their singleton.
+        self.slots = dict()  # type: Dict[Enum, int]
+        self.cache_state = False
+        self.state = None
+        self.state_var = None
+
+    cdef set_target(self, state, target):
+        slot = dependency_slot(target)
+        if state in self.targets:
+            release_dependency_slot(self.targets[state])
+        self.targets[state] = target
+        self.slots[state] = slot
 
     def __repr__(self):
         return "{}(state_dependency={!r}, targets={!r})".format(
@@ -94,3 +320,15 @@ cdef class StatefulLink:
             self.state_dependency,
             self.targets
         )
+
+
+def _release_targets(stateful_links: Dict[Hashable, StatefulLink]):
+    """
+    Releases the slots of the targets once the provider is garbage collected.
+    """
+    cdef:
+        StatefulLink stateful_link
+
+    for stateful_link in stateful_links.values():
+        for target in stateful_link.targets.values():
+            release_dependency_slot(target)
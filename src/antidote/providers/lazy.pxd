@@ -3,7 +3,11 @@
 from antidote.core.container cimport DependencyInstance, DependencyProvider
 
 cdef class LazyCallProvider(DependencyProvider):
+    cdef:
+        dict _batched
+
     cpdef DependencyInstance provide(self, object dependency)
+    cdef DependencyInstance _provide_batch(self, object dependency)
 
 cdef class LazyCall:
     cdef:
@@ -11,6 +15,7 @@ cdef class LazyCall:
         tuple _args
         dict _kwargs
         bint _singleton
+        object _hash
 
 cdef class LazyMethodCall:
     cdef:
@@ -18,6 +23,10 @@ cdef class LazyMethodCall:
         bint _singleton
         tuple _args
         dict _kwargs
-        str _key
+        dict _dependencies
+        str _batch_method_name
+        bint _memoize
+        str _name
+        object _hash
 
     cdef object _call(self, object instance)
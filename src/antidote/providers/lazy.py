@@ -1,7 +1,7 @@
-from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
 
-from .._internal.utils import SlotsReprMixin
-from ..core import DependencyInstance, DependencyProvider
+from .._internal.utils import freeze, SlotsReprMixin
+from ..core import DependencyContainer, DependencyInstance, DependencyProvider
 
 
 class LazyCall(SlotsReprMixin):
@@ -19,8 +19,16 @@ class LazyCall(SlotsReprMixin):
         >>> world.get(A)
         Computing 2 + 3
         5
+
+    Lazy calls are immutable and compared by their function and arguments, so
+    equal calls share the same singleton.
+
+    .. doctest::
+
+        >>> world.get(LazyCall(f)(2, y=3))
+        5
     """
-    __slots__ = ('_func', '_args', '_kwargs', '_singleton')
+    __slots__ = ('_func', '_args', '_kwargs', '_singleton', '_hash')
 
     def __init__(self, func: Callable, singleton: bool = True):
         """
@@ -33,14 +41,32 @@ class LazyCall(SlotsReprMixin):
         self._func = func
         self._args = ()  # type: Tuple
         self._kwargs = {}  # type: Dict
+        self._hash = None  # type: Optional[int]
 
-    def __call__(self, *args, **kwargs):
+    def __call__(self, *args, **kwargs) -> 'LazyCall':
         """
         All argument are passed on to the lazily called function.
+
+        Returns:
+            A new :py:class:`~.LazyCall` with those arguments.
         """
-        self._args = args
-        self._kwargs = kwargs
-        return self
+        lazy_call = LazyCall(self._func, self._singleton)
+        lazy_call._args = args
+        lazy_call._kwargs = kwargs
+        return lazy_call
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = _call_hash((self._func, self._singleton),
+                                    self._args, self._kwargs)
+        return self._hash
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, LazyCall)
+                                 and self._func == other._func
+                                 and self._singleton == other._singleton
+                                 and self._args == other._args
+                                 and self._kwargs == other._kwargs)
 
 
 class LazyMethodCall(SlotsReprMixin):
@@ -70,68 +96,155 @@ class LazyMethodCall(SlotsReprMixin):
       the result for Antidote.
     - if retrieved as a instance attribute it returns the result for this
       instance. This makes testing a lot easier as it does not require Antidote.
+      With :code:`memoize=True`, the result is stored in the instance's
+      :code:`__dict__` so later accesses are plain attribute lookups. Use
+      :py:func:`~.helpers.constants.invalidate_constants` to reset it.
+
+    Like :py:class:`~.LazyCall`, it is immutable and compared by its method
+    name and arguments.
 
     Check out :py:class:`~.helpers.conf.LazyConstantsMeta` for simple way
     to declare multiple constants.
     """
-    __slots__ = ('_method_name', '_args', '_kwargs', '_singleton', '_key')
+    __slots__ = ('_method_name', '_args', '_kwargs', '_singleton', '_dependencies',
+                 '_batch_method_name', '_memoize', '_name', '_hash')
 
-    def __init__(self, method: Union[Callable, str], singleton: bool = True):
+    def __init__(self,
+                 method: Union[Callable, str],
+                 singleton: bool = True,
+                 batch_method: Union[Callable, str] = None,
+                 memoize: bool = False):
         """
 
         Args:
             method: Method to be called or the name of it.
             singleton: Whether or not this is a singleton or not.
+            batch_method: Method, or the name of it, used to retrieve at once
+                all the singletons of the class sharing it. It is called with
+                the list of their argument, which must be unique, and must
+                return their values in the same order.
+            memoize: Whether the result should be stored in the instance on
+                the first attribute access. Only supported for singletons.
         """
+        if memoize and not singleton:
+            raise ValueError("Only singletons can be memoized.")
+
         self._singleton = singleton
+        self._memoize = memoize
+        self._name = None  # type: Optional[str]
         # Retrieve the name of the method, as injection can be done after the class
         # creation which is typically the case with @register.
         self._method_name = method if isinstance(method, str) else method.__name__
+        self._batch_method_name = (batch_method
+                                   if batch_method is None
+                                   or isinstance(batch_method, str) else
+                                   batch_method.__name__)
         self._args = ()  # type: Tuple
         self._kwargs = {}  # type: Dict
-        self._key = None
+        # owner -> dependency, so that the same key is returned on each access.
+        self._dependencies = dict()  # type: Dict[type, LazyMethodCallDependency]
+        self._hash = None  # type: Optional[int]
 
-    def __call__(self, *args, **kwargs):
+    def __call__(self, *args, **kwargs) -> 'LazyMethodCall':
         """
         All argument are passed on to the lazily called function.
+
+        Returns:
+            A new :py:class:`~.LazyMethodCall` with those arguments.
         """
-        self._args = args
-        self._kwargs = kwargs
-        return self
+        lazy_method_call = LazyMethodCall(self._method_name,
+                                          self._singleton,
+                                          self._batch_method_name,
+                                          self._memoize)
+        lazy_method_call._args = args
+        lazy_method_call._kwargs = kwargs
+        return lazy_method_call
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = _call_hash((self._method_name, self._singleton),
+                                    self._args, self._kwargs)
+        return self._hash
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, LazyMethodCall)
+                                 and self._method_name == other._method_name
+                                 and self._singleton == other._singleton
+                                 and self._batch_method_name
+                                 == other._batch_method_name
+                                 and self._args == other._args
+                                 and self._kwargs == other._kwargs)
 
     def __get__(self, instance, owner):
         if instance is None:
-            if self._singleton:
-                if self._key is None:
-                    self._key = "{}_dependency".format(self._get_attribute_name(owner))
-                    setattr(owner, self._key, LazyMethodCallDependency(self, owner))
-                return getattr(owner, self._key)
-            return LazyMethodCallDependency(self, owner)
-        return getattr(instance, self._method_name)(*self._args, **self._kwargs)
-
-    # The attribute is expected to be found in owner, as one should not call
-    # directly __get__.
+            try:
+                return self._dependencies[owner]
+            except KeyError:
+                return self._dependencies.setdefault(
+                    owner, LazyMethodCallDependency(self, owner))
+
+        value = getattr(instance, self._method_name)(*self._args, **self._kwargs)
+        if self._memoize:
+            if self._name is None:
+                self._name = self._get_attribute_name(owner)
+            # As there is no __set__(), the instance attribute takes precedence
+            # over this descriptor on the next accesses.
+            instance_dict = getattr(instance, '__dict__', None)
+            if instance_dict is not None:
+                instance_dict[self._name] = value
+        return value
+
+    # The attribute is expected to be found in owner, or one of its base classes,
+    # as one should not call directly __get__.
     def _get_attribute_name(self, owner):
-        for k, v in owner.__dict__.items():  # pragma: no cover
-            if v is self:
-                return k
+        for cls in owner.__mro__:  # pragma: no cover
+            for k, v in cls.__dict__.items():
+                if v is self:
+                    return k
 
 
 class LazyMethodCallDependency(SlotsReprMixin):
-    __slots__ = ('lazy_method_call', 'owner')
+    __slots__ = ('lazy_method_call', 'owner', '_hash')
 
     def __init__(self, lazy_method_call, owner):
         self.lazy_method_call = lazy_method_call
         self.owner = owner
+        self._hash = hash((lazy_method_call, owner))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, LazyMethodCallDependency)
+                                 and self.owner is other.owner
+                                 and self.lazy_method_call == other.lazy_method_call)
 
 
 class LazyCallProvider(DependencyProvider):
     bound_dependency_types = (LazyMethodCallDependency, LazyCall)
 
+    def __init__(self, container: DependencyContainer):
+        super().__init__(container)
+        # Singletons retrieved by a batch method. Kept by the provider, which may
+        # be used by multiple containers, each of them storing the singleton it
+        # asked for.
+        self._batched = dict()  # type: Dict[LazyMethodCallDependency, Any]
+
     def provide(self,
                 dependency: Hashable
                 ) -> Optional[DependencyInstance]:
         if isinstance(dependency, LazyMethodCallDependency):
+            if dependency.lazy_method_call._batch_method_name is not None \
+                    and dependency.lazy_method_call._singleton:
+                try:
+                    return DependencyInstance(self._batched[dependency],
+                                              singleton=True)
+                except KeyError:
+                    pass
+                dependency_instance = self._provide_batch(dependency)
+                if dependency_instance is not None:
+                    return dependency_instance
+
             return DependencyInstance(
                 dependency.lazy_method_call.__get__(
                     self._container.get(dependency.owner),
@@ -145,3 +258,47 @@ class LazyCallProvider(DependencyProvider):
                 singleton=dependency._singleton
             )
         return None
+
+    def _provide_batch(self, dependency: LazyMethodCallDependency
+                       ) -> Optional[DependencyInstance]:
+        """
+        Retrieves all the singletons of the owner sharing the same batch method
+        and which are not yet defined with a single call.
+        """
+        owner = dependency.owner
+        batch_method_name = dependency.lazy_method_call._batch_method_name
+        singletons = self._container.singletons
+        dependencies = []
+        arguments = []
+        for value in list(owner.__dict__.values()):
+            if isinstance(value, LazyMethodCall) \
+                    and value._batch_method_name == batch_method_name \
+                    and value._singleton \
+                    and len(value._args) == 1 and not value._kwargs:
+                d = value.__get__(None, owner)
+                if d == dependency or (d not in singletons
+                                       and d not in self._batched):
+                    dependencies.append(d)
+                    arguments.append(value._args[0])
+
+        # Arguments which cannot be batched are retrieved one by one.
+        if dependency not in dependencies:
+            return None
+
+        instance = self._container.get(owner)
+        values = list(getattr(instance, batch_method_name)(arguments))
+        if len(values) != len(arguments):
+            raise ValueError("{}() returned {} values for {} arguments".format(
+                batch_method_name, len(values), len(arguments)))
+
+        self._batched.update(zip(dependencies, values))
+        return DependencyInstance(self._batched[dependency], singleton=True)
+
+
+def _call_hash(callee: tuple, args: tuple, kwargs: dict) -> int:
+    try:
+        # Lists, dictionaries and sets are hashed by their content.
+        return hash((callee, freeze(args), freeze(kwargs)))
+    except TypeError:
+        # If type error, return the best error-free hash possible
+        return hash((callee, len(args), frozenset(kwargs.keys())))
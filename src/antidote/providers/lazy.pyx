@@ -1,11 +1,15 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
-from typing import Callable, Dict, Tuple, Union
+from typing import Any, Callable, Dict, Tuple, Union
 
 # @formatter:off
+from cpython.dict cimport PyDict_GetItem
 from cpython.object cimport PyObject, PyObject_Call, PyObject_GetAttr
 
-from antidote.core.container cimport DependencyInstance, DependencyProvider
+from antidote.core.container cimport (DependencyContainer, DependencyInstance,
+                                      DependencyProvider)
+from .._internal.memory import deep_sizeof
+from .._internal.utils import freeze
 # @formatter:on
 
 
@@ -24,6 +28,14 @@ cdef class LazyCall:
         >>> world.get(A)
         Computing 2 + 3
         5
+
+    Lazy calls are immutable and compared by their function and arguments, so
+    equal calls share the same singleton.
+
+    .. doctest::
+
+        >>> world.get(LazyCall(f)(2, y=3))
+        5
     """
     def __init__(self, func: Callable, singleton: bool = True):
         """
@@ -36,14 +48,37 @@ cdef class LazyCall:
         self._func = func
         self._args = ()  # type: Tuple
         self._kwargs = {}  # type: Dict
+        self._hash = None
 
     def __call__(self, *args, **kwargs):
         """
         All argument are passed on to the lazily called function.
+
+        Returns:
+            A new :py:class:`~.LazyCall` with those arguments.
         """
-        self._args = args
-        self._kwargs = kwargs
-        return self
+        cdef LazyCall lazy_call = LazyCall(self._func, self._singleton)
+        lazy_call._args = args
+        lazy_call._kwargs = kwargs
+        return lazy_call
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = _call_hash((self._func, self._singleton),
+                                    self._args, self._kwargs)
+        return self._hash
+
+    def __eq__(self, other):
+        cdef LazyCall lazy_call
+        if self is other:
+            return True
+        if not isinstance(other, LazyCall):
+            return False
+        lazy_call = <LazyCall> other
+        return (self._func == lazy_call._func
+                and self._singleton == lazy_call._singleton
+                and self._args == lazy_call._args
+                and self._kwargs == lazy_call._kwargs)
 
 cdef class LazyMethodCall:
     """
@@ -72,33 +107,89 @@ cdef class LazyMethodCall:
       the result for Antidote.
     - if retrieved as a instance attribute it returns the result for this
       instance. This makes testing a lot easier as it does not require Antidote.
+      With :code:`memoize=True`, the result is stored in the instance's
+      :code:`__dict__` so later accesses are plain attribute lookups. Use
+      :py:func:`~.helpers.constants.invalidate_constants` to reset it.
+
+    Like :py:class:`~.LazyCall`, it is immutable and compared by its method
+    name and arguments.
 
     Check out :py:class:`~.helpers.conf.LazyConstantsMeta` for simple way
     to declare multiple constants.
     """
-    def __init__(self, method: Union[Callable, str], singleton: bool = True):
+    def __init__(self,
+                 method: Union[Callable, str],
+                 singleton: bool = True,
+                 batch_method: Union[Callable, str] = None,
+                 memoize: bool = False):
+        if memoize and not singleton:
+            raise ValueError("Only singletons can be memoized.")
+
         self._singleton = singleton
+        self._memoize = memoize
+        self._name = None
         # Retrieve the name of the method, as injection can be done after the class
         # creation which is typically the case with @register.
         self._method_name = method if isinstance(method, str) else method.__name__
+        self._batch_method_name = (batch_method
+                                   if batch_method is None
+                                   or isinstance(batch_method, str) else
+                                   batch_method.__name__)
         self._args = ()  # type: Tuple
         self._kwargs = {}  # type: Dict
-        self._key = None
+        # owner -> dependency, so that the same key is returned on each access.
+        self._dependencies = dict()
+        self._hash = None
 
     def __call__(self, *args, **kwargs):
-        self._args = args
-        self._kwargs = kwargs
-        return self
+        cdef LazyMethodCall lazy_method_call = LazyMethodCall(
+            self._method_name,
+            self._singleton,
+            self._batch_method_name,
+            self._memoize
+        )
+        lazy_method_call._args = args
+        lazy_method_call._kwargs = kwargs
+        return lazy_method_call
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = _call_hash((self._method_name, self._singleton),
+                                    self._args, self._kwargs)
+        return self._hash
+
+    def __eq__(self, other):
+        cdef LazyMethodCall lazy_method_call
+        if self is other:
+            return True
+        if not isinstance(other, LazyMethodCall):
+            return False
+        lazy_method_call = <LazyMethodCall> other
+        return (self._method_name == lazy_method_call._method_name
+                and self._singleton == lazy_method_call._singleton
+                and self._batch_method_name == lazy_method_call._batch_method_name
+                and self._args == lazy_method_call._args
+                and self._kwargs == lazy_method_call._kwargs)
 
     def __get__(self, instance, owner):
+        cdef PyObject*ptr
         if instance is None:
-            if self._singleton:
-                if self._key is None:
-                    self._key = "{}_dependency".format(self._get_attribute_name(owner))
-                    setattr(owner, self._key, LazyMethodCallDependency(self, owner))
-                return getattr(owner, self._key)
-            return LazyMethodCallDependency(self, owner)
-        return self._call(instance)
+            ptr = PyDict_GetItem(self._dependencies, owner)
+            if ptr != NULL:
+                return <object> ptr
+            return self._dependencies.setdefault(
+                owner, LazyMethodCallDependency(self, owner))
+
+        value = self._call(instance)
+        if self._memoize:
+            if self._name is None:
+                self._name = self._get_attribute_name(owner)
+            # As there is no __set__(), the instance attribute takes precedence
+            # over this descriptor on the next accesses.
+            instance_dict = getattr(instance, '__dict__', None)
+            if instance_dict is not None:
+                instance_dict[self._name] = value
+        return value
 
     cdef object _call(self, object instance):
         cdef:
@@ -117,30 +208,68 @@ cdef class LazyMethodCall:
         return PyObject_Call(method, self._args, self._kwargs)
 
     def _get_attribute_name(self, owner):
-        for k, v in owner.__dict__.items():
-            if v is self:
-                return k
+        for cls in owner.__mro__:
+            for k, v in cls.__dict__.items():
+                if v is self:
+                    return k
 
 cdef class LazyMethodCallDependency:
     cdef:
         LazyMethodCall lazy_method_call
         object owner
+        object _hash
 
     def __cinit__(self, lazy_method_call, owner):
         self.lazy_method_call = lazy_method_call
         self.owner = owner
+        self._hash = hash((lazy_method_call, owner))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        cdef LazyMethodCallDependency dependency
+        if self is other:
+            return True
+        if not isinstance(other, LazyMethodCallDependency):
+            return False
+        dependency = <LazyMethodCallDependency> other
+        return (self.owner is dependency.owner
+                and self.lazy_method_call == dependency.lazy_method_call)
 
 cdef class LazyCallProvider(DependencyProvider):
     bound_dependency_types = (LazyMethodCallDependency, LazyCall)
 
+    def __init__(self, DependencyContainer container):
+        super().__init__(container)
+        # Singletons retrieved by a batch method. Kept by the provider, which may
+        # be used by multiple containers, each of them storing the singleton it
+        # asked for.
+        self._batched = dict()  # type: Dict[LazyMethodCallDependency, Any]
+
+    def memory_usage(self) -> int:
+        return deep_sizeof(self, self._batched, exclude=(self._container,))
+
     cpdef DependencyInstance provide(self, object dependency):
         cdef:
             LazyCall lazy_call
             LazyMethodCallDependency lazy_method_dependency
             DependencyInstance dependency_instance
+            PyObject*ptr
 
         if isinstance(dependency, LazyMethodCallDependency):
             lazy_method_dependency = <LazyMethodCallDependency> dependency
+            if lazy_method_dependency.lazy_method_call._batch_method_name is not None \
+                    and lazy_method_dependency.lazy_method_call._singleton:
+                ptr = PyDict_GetItem(self._batched, dependency)
+                if ptr != NULL:
+                    return DependencyInstance.__new__(DependencyInstance,
+                                                      <object> ptr,
+                                                      True)
+                dependency_instance = self._provide_batch(lazy_method_dependency)
+                if dependency_instance is not None:
+                    return dependency_instance
+
             return DependencyInstance.__new__(
                 DependencyInstance,
                 lazy_method_dependency.lazy_method_call._call(
@@ -155,3 +284,56 @@ cdef class LazyCallProvider(DependencyProvider):
                 PyObject_Call(lazy_call._func, lazy_call._args, lazy_call._kwargs),
                 lazy_call._singleton
             )
+
+    cdef DependencyInstance _provide_batch(self, object dependency):
+        """
+        Retrieves all the singletons of the owner sharing the same batch method
+        and which are not yet defined with a single call.
+        """
+        cdef:
+            LazyMethodCallDependency lazy_method_dependency = \
+                <LazyMethodCallDependency> dependency
+            object owner = lazy_method_dependency.owner
+            str batch_method_name = \
+                lazy_method_dependency.lazy_method_call._batch_method_name
+            dict singletons = self._container.singletons
+            list dependencies = []
+            list arguments = []
+            list values
+            LazyMethodCall lazy_method_call
+
+        for value in list(owner.__dict__.values()):
+            if isinstance(value, LazyMethodCall):
+                lazy_method_call = <LazyMethodCall> value
+                if lazy_method_call._batch_method_name == batch_method_name \
+                        and lazy_method_call._singleton \
+                        and len(lazy_method_call._args) == 1 \
+                        and not lazy_method_call._kwargs:
+                    d = lazy_method_call.__get__(None, owner)
+                    if d == dependency or (d not in singletons
+                                           and d not in self._batched):
+                        dependencies.append(d)
+                        arguments.append(lazy_method_call._args[0])
+
+        # Arguments which cannot be batched are retrieved one by one.
+        if dependency not in dependencies:
+            return None
+
+        instance = self._container.get(owner)
+        values = list(getattr(instance, batch_method_name)(arguments))
+        if len(values) != len(arguments):
+            raise ValueError("{}() returned {} values for {} arguments".format(
+                batch_method_name, len(values), len(arguments)))
+
+        self._batched.update(zip(dependencies, values))
+        return DependencyInstance.__new__(DependencyInstance,
+                                          self._batched[dependency],
+                                          True)
+
+cdef object _call_hash(tuple callee, tuple args, dict kwargs):
+    try:
+        # Lists, dictionaries and sets are hashed by their content.
+        return hash((callee, freeze(args), freeze(kwargs)))
+    except TypeError:
+        # If type error, return the best error-free hash possible
+        return hash((callee, len(args), frozenset(kwargs.keys())))
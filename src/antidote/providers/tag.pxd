@@ -10,6 +10,8 @@ cdef class Tag:
 cdef class Tagged:
     cdef:
         readonly str name
+        readonly dict where
+        readonly str order_by
 
 cdef class TaggedDependencies:
     cdef:
@@ -18,9 +20,18 @@ cdef class TaggedDependencies:
         list _dependencies
         list _tags
         list _instances
+        bint _singletons
+
+    cdef object _retrieved(self, dict retrieved, ssize_t i,
+                           DependencyInstance dependency_instance)
 
 cdef class TagProvider(DependencyProvider):
     cdef:
         dict _dependency_to_tag_by_tag_name
+        dict _indexes
+        dict _versions
+        object _cache
+        Py_ssize_t _cache_size
 
     cpdef DependencyInstance provide(self, dependency)
+    cdef tuple _query(self, Tagged tagged)
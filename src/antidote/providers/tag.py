@@ -1,6 +1,9 @@
+import itertools
 import threading
-from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional,
-                    Union)
+from collections import OrderedDict
+from concurrent.futures import as_completed, Future, ThreadPoolExecutor
+from typing import (Any, Callable, cast, Dict, Hashable, Iterable, Iterator, List,
+                    Mapping, Optional, Sized, Tuple, Union)
 
 from .._internal.utils import SlotsReprMixin
 from ..core import DependencyContainer, DependencyInstance, DependencyProvider
@@ -63,13 +66,43 @@ class Tagged(SlotsReprMixin):
     """
     Custom dependency used to retrieve all dependencies tagged with by with the
     name.
+
+    Dependencies can be filtered and sorted on their tag's attributes, only
+    the matching ones being instantiated:
+
+    .. doctest::
+
+        >>> from antidote import register, Tag, Tagged, world
+        >>> @register(tags=[Tag('handler', event='click', priority=2)])
+        ... class ClickHandler:
+        ...     pass
+        >>> @register(tags=[Tag('handler', event='key', priority=1)])
+        ... class KeyHandler:
+        ...     pass
+        >>> @register(tags=[Tag('handler', event='click', priority=1)])
+        ... class OtherClickHandler:
+        ...     pass
+        >>> handlers = world.get(Tagged('handler', where={'event': 'click'},
+        ...                             order_by='priority'))
+        >>> [type(h).__name__ for h in handlers.instances()]
+        ['OtherClickHandler', 'ClickHandler']
     """
-    __slots__ = ('name',)
+    __slots__ = ('name', 'where', 'order_by')
 
-    def __init__(self, name: str):
+    def __init__(self,
+                 name: str,
+                 where: Mapping[str, Any] = None,
+                 order_by: str = None):
         """
         Args:
             name: Name of the tags which shall be retrieved.
+            where: Only dependencies whose tag attributes are equal to all of
+                those values are retrieved. A missing attribute is equal to
+                :obj:`None`. Defaults to all dependencies.
+            order_by: Name of the tag attribute by which the dependencies
+                should be sorted, prefixed by :code:`'-'` for a descending
+                order. Dependencies without it come last. Defaults to the
+                registration order.
         """
         if not isinstance(name, str):
             raise TypeError("name must be a string")
@@ -77,7 +110,13 @@ class Tagged(SlotsReprMixin):
         if len(name) == 0:
             raise ValueError("name must be a non empty string")
 
+        if order_by is not None and (not isinstance(order_by, str)
+                                     or len(order_by.lstrip('-')) == 0):
+            raise ValueError("order_by must be None or a non empty string")
+
         self.name = name
+        self.where = dict(where or {})  # type: Dict[str, Any]
+        self.order_by = order_by
 
     __str__ = SlotsReprMixin.__repr__  # type: Callable[['Tagged'], str]
 
@@ -95,9 +134,30 @@ class TagProvider(DependencyProvider):
     """
     bound_dependency_types = (Tagged,)
 
-    def __init__(self, container: DependencyContainer):
+    def __init__(self, container: DependencyContainer, cache_size: int = 128):
+        """
+        Args:
+            container: :py:class:`~..core.DependencyContainer` to use.
+            cache_size: Maximum number of :py:class:`~.Tagged` queries for
+                which the matching dependencies are cached, the least recently
+                used ones being discarded first.
+        """
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise ValueError("cache_size must be a strictly positive integer, "
+                             "not {!r}".format(cache_size))
         super().__init__(container)
         self._dependency_to_tag_by_tag_name = {}  # type: Dict[str, Dict[Hashable, Tag]]
+        # name -> attribute -> value -> dependencies. None if some values of
+        # the attribute cannot be hashed.
+        self._indexes = {}  # type: Dict[str, Dict[str, Optional[Dict[Any, list]]]]
+        # Incremented whenever a dependency is tagged with the name, or one of
+        # its dependencies is overridden.
+        self._versions = {}  # type: Dict[str, int]
+        # query -> (version, last TaggedDependencies returned), least recently
+        # used first.
+        self._cache = OrderedDict()  # type: OrderedDict
+        self._cache_size = cache_size
+        container.add_singletons_listener(self._update_versions)
 
     def __repr__(self):
         return "{}(tagged_dependencies={!r})".format(
@@ -111,6 +171,14 @@ class TagProvider(DependencyProvider):
         :py:class:`~.dependency.Tagged`. For every other case, :obj:`None` is
         returned.
 
+        The matching dependencies, found through indexes on the tag attributes,
+        are computed once for each version of the tag, which changes whenever a
+        dependency is tagged with it or overridden with
+        :py:meth:`~.core.container.DependencyContainer.update_singletons`.
+        If all of them are singletons, the
+        :py:class:`~.TaggedDependencies` is also reused once it has instantiated
+        them.
+
         Args:
             dependency: Only :py:class:`~.dependency.Tagged` is supported, all
                 others are ignored.
@@ -120,21 +188,49 @@ class TagProvider(DependencyProvider):
             :py:class:`~..core.Instance`.
         """
         if isinstance(dependency, Tagged):
-            dependencies = []
-            tags = []
-            dependency_to_tag = self._dependency_to_tag_by_tag_name.get(dependency.name,
-                                                                        {})
+            try:
+                query = (dependency.name,
+                         frozenset(dependency.where.items()),
+                         dependency.order_by)  # type: Optional[Hashable]
+            except TypeError:
+                # Cannot be cached, attributes are checked one by one.
+                query = None
+
+            version = self._versions.get(dependency.name, 0)
+            try:
+                cached_version, tagged_dependencies = self._cache[query]
+            except KeyError:
+                cached_version = -1
+
+            if cached_version == version:
+                self._cache.move_to_end(query)
+                # _singletons is updated before an instance is added, so it
+                # must be read after the instances.
+                if len(tagged_dependencies._instances) \
+                        == len(tagged_dependencies._dependencies) \
+                        and tagged_dependencies._singletons:
+                    # Every dependency has been instantiated and is a singleton.
+                    return DependencyInstance(tagged_dependencies, singleton=False)
+
+                # Lists are never modified, so they can be shared.
+                dependencies = tagged_dependencies._dependencies
+                tags = tagged_dependencies._tags
+            else:
+                dependencies, tags = self._query(dependency)
 
-            for dependency_, tag in dependency_to_tag.items():
-                dependencies.append(dependency_)
-                tags.append(tag)
+            new_tagged_dependencies = TaggedDependencies(
+                container=self._container,
+                dependencies=dependencies,
+                tags=tags
+            )
+            if query is not None and (cached_version != version
+                                      or tagged_dependencies._singletons):
+                self._cache[query] = (version, new_tagged_dependencies)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
 
             return DependencyInstance(
-                TaggedDependencies(
-                    container=self._container,
-                    dependencies=dependencies,
-                    tags=tags
-                ),
+                new_tagged_dependencies,
                 # Whether the returned dependencies are singletons or not is
                 # their decision to take.
                 singleton=False
@@ -167,6 +263,63 @@ class TagProvider(DependencyProvider):
             else:
                 raise DuplicateTagError(tag.name)
 
+            indexes = self._indexes.setdefault(tag.name, {})
+            for attr, value in tag._attrs.items():
+                index = indexes.setdefault(attr, {})
+                if index is not None:
+                    try:
+                        index.setdefault(value, []).append(dependency)
+                    except TypeError:
+                        indexes[attr] = None
+
+            self._versions[tag.name] = self._versions.get(tag.name, 0) + 1
+
+    def _update_versions(self, singletons: Mapping):
+        """
+        Invalidates the cached results of the tags of the overridden
+        dependencies, which may have been instantiated already.
+        """
+        for name, dependency_to_tag in self._dependency_to_tag_by_tag_name.items():
+            if any(dependency in dependency_to_tag for dependency in singletons):
+                self._versions[name] += 1
+
+    def _query(self, tagged: Tagged) -> Tuple[List[Hashable], List[Tag]]:
+        """
+        Returns the dependencies and tags matching the :py:class:`~.Tagged`.
+        """
+        dependency_to_tag = self._dependency_to_tag_by_tag_name.get(tagged.name, {})
+        indexes = self._indexes.get(tagged.name, {})
+        candidates = dependency_to_tag  # type: Iterable[Hashable]
+        for attr, value in tagged.where.items():
+            if value is None:
+                # Tags without the attribute are not indexed.
+                continue
+            try:
+                index = indexes.get(attr, {})
+                if index is not None:
+                    bucket = index.get(value, [])
+                    if len(bucket) < len(cast(Sized, candidates)):
+                        candidates = bucket
+            except TypeError:
+                pass
+
+        items = [(dependency, dependency_to_tag[dependency])
+                 for dependency in candidates]
+        if tagged.where:
+            items = [(dependency, tag) for dependency, tag in items
+                     if all(getattr(tag, attr) == value
+                            for attr, value in tagged.where.items())]
+
+        if tagged.order_by is not None:
+            attr = tagged.order_by.lstrip('-')
+            present = [item for item in items if getattr(item[1], attr) is not None]
+            present.sort(key=lambda item: getattr(item[1], attr),
+                         reverse=tagged.order_by.startswith('-'))
+            items = present + [item for item in items
+                               if getattr(item[1], attr) is None]
+
+        return [dependency for dependency, _ in items], [tag for _, tag in items]
+
 
 class TaggedDependencies:
     """
@@ -185,6 +338,8 @@ class TaggedDependencies:
         self._dependencies = dependencies
         self._tags = tags
         self._instances = []  # type: List[Any]
+        # Whether all the instances retrieved so far are singletons.
+        self._singletons = True
 
     def __len__(self):
         return len(self._tags)
@@ -202,11 +357,45 @@ class TaggedDependencies:
         """
         return iter(self._tags)
 
-    def instances(self) -> Iterator:
+    def instances(self, parallel: bool = False, max_workers: int = None) -> Iterator:
         """
         Returns the dependencies, in a stable order for multi-threaded
         environments.
+
+        Args:
+            parallel: Whether the dependencies not yet instantiated should be
+                instantiated concurrently in a thread pool. They are still
+                returned in the same order. Only those the container provides
+                concurrently, such as factories registered with
+                :code:`concurrent=True`, are instantiated in the pool. The
+                others are instantiated in the current thread, one at a time,
+                as the container holds its instantiation lock for them. All of
+                them are when called while instantiating a dependency.
+            max_workers: Maximum number of threads used when :code:`parallel`
+                is True. Defaults to the one of
+                :py:class:`~concurrent.futures.ThreadPoolExecutor`.
+        """
+        if parallel:
+            return self._parallel_instances(max_workers)
+        return self._sequential_instances()
+
+    def as_completed(self, max_workers: int = None) -> Iterator:
         """
+        Returns the dependencies as soon as they are instantiated, those already
+        instantiated coming first. Missing ones are instantiated as with
+        :code:`instances(parallel=True)`, only those the container provides
+        concurrently being instantiated in a thread pool.
+
+        Args:
+            max_workers: Maximum number of threads used. Defaults to the one of
+                :py:class:`~concurrent.futures.ThreadPoolExecutor`.
+        """
+        start = len(self._instances)
+        yield from self._instances[:start]
+        for _, instance in self._instantiate_concurrently(start, max_workers):
+            yield instance
+
+    def _sequential_instances(self) -> Iterator:
         i = -1
         for i, instance in enumerate(self._instances):
             yield instance
@@ -219,8 +408,86 @@ class TaggedDependencies:
                 with self._lock:
                     # If not other thread has already added the instance.
                     if i == len(self._instances):
-                        self._instances.append(
-                            self._container.get(self._dependencies[i])
-                        )
+                        dependency_instance = self._container.safe_provide(
+                            self._dependencies[i])
+                        if not dependency_instance.singleton:
+                            self._singletons = False
+                        self._instances.append(dependency_instance.instance)
                 yield self._instances[i]
             i += 1
+
+    def _parallel_instances(self, max_workers: Optional[int]) -> Iterator:
+        i = 0
+        for _ in self._instantiate_concurrently(len(self._instances), max_workers):
+            while i < len(self._instances):
+                yield self._instances[i]
+                i += 1
+
+        # Remaining instances, if any, were retrieved by another thread meanwhile.
+        yield from itertools.islice(self._sequential_instances(), i, None)
+
+    def _instantiate_concurrently(self, start: int, max_workers: Optional[int]
+                                  ) -> Iterator[Tuple[int, Any]]:
+        """
+        Instantiates the dependencies from start, yielding their index and
+        instance as they are retrieved. Those provided concurrently by the
+        container are instantiated in a thread pool, the others in the current
+        thread meanwhile. Instances are added in order as soon as all the
+        previous ones are available.
+        """
+        concurrent = []  # type: List[int]
+        sequential = []  # type: List[int]
+        for i in range(start, len(self)):
+            if self._dependencies[i] in self._container._concurrent_providers:
+                concurrent.append(i)
+            else:
+                sequential.append(i)
+
+        # Threads would wait for the container's lock indefinitely when called
+        # while instantiating a dependency.
+        if not concurrent or self._container._is_instantiating():
+            yield from enumerate(itertools.islice(self._sequential_instances(),
+                                                  start, None), start)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = dict()  # type: Dict[Future, int]
+        try:
+            futures = {
+                executor.submit(self._container.safe_provide, self._dependencies[i]): i
+                for i in concurrent
+            }
+            retrieved = dict()  # type: Dict[int, DependencyInstance]
+            # The others would be instantiated one at a time by the container
+            # anyway.
+            for i in sequential:
+                dependency_instance = self._container.safe_provide(
+                    self._dependencies[i])
+                yield i, self._retrieved(retrieved, i, dependency_instance)
+            for future in as_completed(futures):
+                i = futures[future]
+                yield i, self._retrieved(retrieved, i, future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _retrieved(self,
+                   retrieved: Dict[int, DependencyInstance],
+                   i: int,
+                   dependency_instance: DependencyInstance):
+        """
+        Adds the instances retrieved which follow the current ones and returns
+        the i-th one.
+        """
+        with self._lock:
+            retrieved[i] = dependency_instance
+            while len(self._instances) in retrieved:
+                dependency_instance_ = retrieved.pop(len(self._instances))
+                if not dependency_instance_.singleton:
+                    self._singletons = False
+                self._instances.append(dependency_instance_.instance)
+
+            return (self._instances[i]
+                    if i < len(self._instances) else
+                    dependency_instance.instance)
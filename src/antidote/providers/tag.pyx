@@ -1,6 +1,9 @@
 # cython: language_level=3
 # cython: boundscheck=False, wraparound=False, annotation_typing=False
-from typing import Any, Dict, Iterable, Iterator, List, Union, Optional
+import itertools
+from collections import OrderedDict
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple, Union, Optional
 
 # @formatter:off
 from cpython.dict cimport PyDict_GetItem
@@ -10,6 +13,7 @@ from fastrlock.rlock cimport create_fastrlock, lock_fastrlock, unlock_fastrlock
 from antidote.core.container cimport (DependencyContainer, DependencyInstance,
                                       DependencyProvider)
 # @formatter:on
+from .._internal.memory import deep_sizeof
 from ..exceptions import DuplicateTagError
 
 cdef class Tag:
@@ -57,19 +61,54 @@ cdef class Tagged:
     """
     Custom dependency used to retrieve all dependencies tagged with by with the
     name.
+
+    Dependencies can be filtered and sorted on their tag's attributes, only
+    the matching ones being instantiated:
+
+    .. doctest::
+
+        >>> from antidote import register, Tag, Tagged, world
+        >>> @register(tags=[Tag('handler', event='click', priority=2)])
+        ... class ClickHandler:
+        ...     pass
+        >>> @register(tags=[Tag('handler', event='key', priority=1)])
+        ... class KeyHandler:
+        ...     pass
+        >>> @register(tags=[Tag('handler', event='click', priority=1)])
+        ... class OtherClickHandler:
+        ...     pass
+        >>> handlers = world.get(Tagged('handler', where={'event': 'click'},
+        ...                             order_by='priority'))
+        >>> [type(h).__name__ for h in handlers.instances()]
+        ['OtherClickHandler', 'ClickHandler']
     """
-    def __init__(self, str name):
+    def __init__(self, str name, where: Mapping[str, Any] = None,
+                 order_by: str = None):
         """
         Args:
             name: Name of the tags which shall be retrieved.
+            where: Only dependencies whose tag attributes are equal to all of
+                those values are retrieved. A missing attribute is equal to
+                :obj:`None`. Defaults to all dependencies.
+            order_by: Name of the tag attribute by which the dependencies
+                should be sorted, prefixed by :code:`'-'` for a descending
+                order. Dependencies without it come last. Defaults to the
+                registration order.
         """
         if len(name) == 0:
             raise ValueError("name must be a non empty string")
 
+        if order_by is not None and (not isinstance(order_by, str)
+                                     or len(order_by.lstrip('-')) == 0):
+            raise ValueError("order_by must be None or a non empty string")
+
         self.name = name
+        self.where = dict(where or {})
+        self.order_by = order_by
 
     def __repr__(self):
-        return "{}(name={!r})".format(type(self).__name__, self.name)
+        return "{}(name={!r}, where={!r}, order_by={!r})".format(
+            type(self).__name__, self.name, self.where, self.order_by)
 
 cdef class TagProvider(DependencyProvider):
     """
@@ -78,9 +117,30 @@ cdef class TagProvider(DependencyProvider):
     """
     bound_dependency_types = (Tagged,)
 
-    def __init__(self, DependencyContainer container):
+    def __init__(self, DependencyContainer container, cache_size: int = 128):
+        """
+        Args:
+            container: :py:class:`~..core.DependencyContainer` to use.
+            cache_size: Maximum number of :py:class:`~.Tagged` queries for
+                which the matching dependencies are cached, the least recently
+                used ones being discarded first.
+        """
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise ValueError("cache_size must be a strictly positive integer, "
+                             "not {!r}".format(cache_size))
         super().__init__(container)
         self._dependency_to_tag_by_tag_name = {}  # type: Dict[str, Dict[Any, Tag]]
+        # name -> attribute -> value -> dependencies. None if some values of
+        # the attribute cannot be hashed.
+        self._indexes = {}  # type: Dict[str, Dict[str, Optional[Dict[Any, list]]]]
+        # Incremented whenever a dependency is tagged with the name, or one of
+        # its dependencies is overridden.
+        self._versions = {}  # type: Dict[str, int]
+        # query -> (version, last TaggedDependencies returned), least recently
+        # used first.
+        self._cache = OrderedDict()  # type: OrderedDict
+        self._cache_size = cache_size
+        container.add_singletons_listener(self._update_versions)
 
     def __repr__(self):
         return "{}(tagged_dependencies={!r})".format(
@@ -88,12 +148,36 @@ cdef class TagProvider(DependencyProvider):
             self._dependency_to_tag_by_tag_name
         )
 
+    def memory_usage(self) -> int:
+        cdef:
+            Tag tag
+            TaggedDependencies tagged_dependencies
+
+        objects = [self, self._dependency_to_tag_by_tag_name, self._indexes,
+                   self._versions, self._cache]
+        for tags in self._dependency_to_tag_by_tag_name.values():
+            for tag in tags.values():
+                objects.append(tag._attrs)
+        for _, tagged_dependencies in self._cache.values():
+            objects.extend((tagged_dependencies._dependencies,
+                            tagged_dependencies._tags,
+                            tagged_dependencies._instances))
+        return deep_sizeof(*objects, exclude=(self._container,))
+
     cpdef DependencyInstance provide(self, dependency):
         """
         Returns all dependencies matching the tag name specified with a
         :py:class:`~.dependency.Tagged`. For every other case, :obj:`None` is
         returned.
 
+        The matching dependencies, found through indexes on the tag attributes,
+        are computed once for each version of the tag, which changes whenever a
+        dependency is tagged with it or overridden with
+        :py:meth:`~.core.container.DependencyContainer.update_singletons`.
+        If all of them are singletons, the
+        :py:class:`~.TaggedDependencies` is also reused once it has instantiated
+        them.
+
         Args:
             dependency: Only :py:class:`~.dependency.Tagged` is supported, all
                 others are ignored.
@@ -106,30 +190,61 @@ cdef class TagProvider(DependencyProvider):
             list dependencies
             list tags
             object dependency_
+            object version
+            object query
+            object cached_version = -1
             Tagged tagged
             Tag tag
+            TaggedDependencies tagged_dependencies = None
+            TaggedDependencies new_tagged_dependencies
             PyObject*ptr
 
         if isinstance(dependency, Tagged):
             tagged = <Tagged> dependency
-            dependencies = []
-            tags = []
-            ptr = PyDict_GetItem(self._dependency_to_tag_by_tag_name,
-                                 tagged.name)
-
+            try:
+                query = (tagged.name, frozenset(tagged.where.items()), tagged.order_by)
+            except TypeError:
+                # Cannot be cached, attributes are checked one by one.
+                query = None
+
+            version = self._versions.get(tagged.name, 0)
+            ptr = PyDict_GetItem(self._cache, query) if query is not None else NULL
             if ptr != NULL:
-                for dependency_, tag in (<dict> ptr).items():
-                    dependencies.append(dependency_)
-                    tags.append(tag)
+                cached_version, tagged_dependencies = <tuple> ptr
+
+            if cached_version == version:
+                self._cache.move_to_end(query)
+                # _singletons is updated before an instance is added, so it
+                # must be read after the instances.
+                if len(tagged_dependencies._instances) \
+                        == len(tagged_dependencies._dependencies) \
+                        and tagged_dependencies._singletons:
+                    # Every dependency has been instantiated and is a singleton.
+                    return DependencyInstance.__new__(DependencyInstance,
+                                                      tagged_dependencies,
+                                                      False)
+
+                # Lists are never modified, so they can be shared.
+                dependencies = tagged_dependencies._dependencies
+                tags = tagged_dependencies._tags
+            else:
+                dependencies, tags = self._query(tagged)
+
+            new_tagged_dependencies = TaggedDependencies.__new__(
+                TaggedDependencies,
+                container=self._container,
+                dependencies=dependencies,
+                tags=tags
+            )
+            if query is not None and (cached_version != version
+                                      or tagged_dependencies._singletons):
+                self._cache[query] = (version, new_tagged_dependencies)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
 
             return DependencyInstance.__new__(
                 DependencyInstance,
-                TaggedDependencies.__new__(
-                    TaggedDependencies,
-                    container=self._container,
-                    dependencies=dependencies,
-                    tags=tags
-                ),
+                new_tagged_dependencies,
                 # Whether the returned dependencies are singletons or not is
                 # their decision to take.
                 singleton=False
@@ -160,6 +275,69 @@ cdef class TagProvider(DependencyProvider):
             else:
                 raise DuplicateTagError(tag.name)
 
+            indexes = self._indexes.setdefault(tag.name, {})
+            for attr, value in tag._attrs.items():
+                index = indexes.setdefault(attr, {})
+                if index is not None:
+                    try:
+                        index.setdefault(value, []).append(dependency)
+                    except TypeError:
+                        indexes[attr] = None
+
+            self._versions[tag.name] = self._versions.get(tag.name, 0) + 1
+
+    def _update_versions(self, singletons: Mapping):
+        """
+        Invalidates the cached results of the tags of the overridden
+        dependencies, which may have been instantiated already.
+        """
+        for name, dependency_to_tag in self._dependency_to_tag_by_tag_name.items():
+            if any(dependency in dependency_to_tag for dependency in singletons):
+                self._versions[name] += 1
+
+    cdef tuple _query(self, Tagged tagged):
+        """
+        Returns the dependencies and tags matching the :py:class:`~.Tagged`.
+        """
+        cdef:
+            dict dependency_to_tag = self._dependency_to_tag_by_tag_name.get(
+                tagged.name, {})
+            dict indexes = self._indexes.get(tagged.name, {})
+            object candidates = dependency_to_tag
+            list items
+            list present
+            str attr
+
+        for attr, value in tagged.where.items():
+            if value is None:
+                # Tags without the attribute are not indexed.
+                continue
+            try:
+                index = indexes.get(attr, {})
+                if index is not None:
+                    bucket = index.get(value, [])
+                    if len(bucket) < len(candidates):
+                        candidates = bucket
+            except TypeError:
+                pass
+
+        items = [(dependency, dependency_to_tag[dependency])
+                 for dependency in candidates]
+        if tagged.where:
+            items = [(dependency, tag) for dependency, tag in items
+                     if all(getattr(tag, attr_) == value
+                            for attr_, value in tagged.where.items())]
+
+        if tagged.order_by is not None:
+            attr = tagged.order_by.lstrip('-')
+            present = [item for item in items if getattr(item[1], attr) is not None]
+            present.sort(key=lambda item: getattr(item[1], attr),
+                         reverse=tagged.order_by.startswith('-'))
+            items = present + [item for item in items
+                               if getattr(item[1], attr) is None]
+
+        return [dependency for dependency, _ in items], [tag for _, tag in items]
+
 cdef class TaggedDependencies:
     """
     Collection containing dependencies and their tags. Dependencies are lazily
@@ -176,6 +354,8 @@ cdef class TaggedDependencies:
         self._dependencies = dependencies  # type: List[Any]
         self._tags = tags  # type: List[Tag]
         self._instances = []  # type: List[Any]
+        # Whether all the instances retrieved so far are singletons.
+        self._singletons = True
 
     def __len__(self):
         return len(self._dependencies)
@@ -193,11 +373,46 @@ cdef class TaggedDependencies:
         """
         return iter(self._tags)
 
-    def instances(self) -> Iterator[Any]:
+    def instances(self, parallel: bool = False, max_workers: int = None
+                  ) -> Iterator[Any]:
         """
         Returns the dependencies, in a stable order for multi-threaded
         environments.
+
+        Args:
+            parallel: Whether the dependencies not yet instantiated should be
+                instantiated concurrently in a thread pool. They are still
+                returned in the same order. Only those the container provides
+                concurrently, such as factories registered with
+                :code:`concurrent=True`, are instantiated in the pool. The
+                others are instantiated in the current thread, one at a time,
+                as the container holds its instantiation lock for them. All of
+                them are when called while instantiating a dependency.
+            max_workers: Maximum number of threads used when :code:`parallel`
+                is True. Defaults to the one of
+                :py:class:`~concurrent.futures.ThreadPoolExecutor`.
         """
+        if parallel:
+            return self._parallel_instances(max_workers)
+        return self._sequential_instances()
+
+    def as_completed(self, max_workers: int = None) -> Iterator[Any]:
+        """
+        Returns the dependencies as soon as they are instantiated, those already
+        instantiated coming first. Missing ones are instantiated as with
+        :code:`instances(parallel=True)`, only those the container provides
+        concurrently being instantiated in a thread pool.
+
+        Args:
+            max_workers: Maximum number of threads used. Defaults to the one of
+                :py:class:`~concurrent.futures.ThreadPoolExecutor`.
+        """
+        cdef ssize_t start = len(self._instances)
+        yield from self._instances[:start]
+        for _, instance in self._instantiate_concurrently(start, max_workers):
+            yield instance
+
+    def _sequential_instances(self):
         cdef:
             ssize_t n = len(self._instances)
             ssize_t i = 0
@@ -214,7 +429,11 @@ cdef class TaggedDependencies:
                     if i < len(self._instances):
                         instance = self._instances[i]
                     else:
-                        instance = self._container.get(self._dependencies[i])
+                        dependency_instance = self._container.safe_provide(
+                            self._dependencies[i])
+                        if not dependency_instance.singleton:
+                            self._singletons = False
+                        instance = dependency_instance.instance
                         self._instances.append(instance)
                     n += 1
                 finally:
@@ -222,3 +441,88 @@ cdef class TaggedDependencies:
 
                 yield instance
             i += 1
+
+    def _parallel_instances(self, max_workers):
+        cdef ssize_t i = 0
+        for _ in self._instantiate_concurrently(len(self._instances), max_workers):
+            while i < len(self._instances):
+                yield self._instances[i]
+                i += 1
+
+        # Remaining instances, if any, were retrieved by another thread meanwhile.
+        yield from itertools.islice(self._sequential_instances(), i, None)
+
+    def _instantiate_concurrently(self, ssize_t start, max_workers):
+        """
+        Instantiates the dependencies from start, yielding their index and
+        instance as they are retrieved. Those provided concurrently by the
+        container are instantiated in a thread pool, the others in the current
+        thread meanwhile. Instances are added in order as soon as all the
+        previous ones are available.
+        """
+        cdef:
+            list concurrent = []
+            list sequential = []
+            dict futures = {}
+            dict retrieved = {}
+            ssize_t i
+
+        for i in range(start, len(self)):
+            if self._dependencies[i] in self._container._concurrent_providers:
+                concurrent.append(i)
+            else:
+                sequential.append(i)
+
+        # Threads would wait for the container's lock indefinitely when called
+        # while instantiating a dependency.
+        if not concurrent or self._container._is_instantiating():
+            yield from enumerate(itertools.islice(self._sequential_instances(),
+                                                  start, None), start)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            safe_provide = (<object> self._container).safe_provide
+            for i in concurrent:
+                futures[executor.submit(safe_provide, self._dependencies[i])] = i
+
+            # The others would be instantiated one at a time by the container
+            # anyway.
+            for i in sequential:
+                yield i, self._retrieved(retrieved, i,
+                                         self._container.safe_provide(
+                                             self._dependencies[i]))
+
+            for future in as_completed(futures):
+                i = futures[future]
+                yield i, self._retrieved(retrieved, i, future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    cdef object _retrieved(self,
+                           dict retrieved,
+                           ssize_t i,
+                           DependencyInstance dependency_instance):
+        """
+        Adds the instances retrieved which follow the current ones and returns
+        the i-th one.
+        """
+        cdef:
+            DependencyInstance dependency_instance_
+
+        lock_fastrlock(self._lock, -1, True)
+        try:
+            retrieved[i] = dependency_instance
+            while len(self._instances) in retrieved:
+                dependency_instance_ = retrieved.pop(len(self._instances))
+                if not dependency_instance_.singleton:
+                    self._singletons = False
+                self._instances.append(dependency_instance_.instance)
+
+            return (self._instances[i]
+                    if i < len(self._instances) else
+                    dependency_instance.instance)
+        finally:
+            unlock_fastrlock(self._lock)
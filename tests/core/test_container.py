@@ -1,8 +1,10 @@
+import threading
 from typing import Any
 
 import pytest
 
-from antidote.core import DependencyContainer, DependencyInstance, DependencyProvider
+from antidote.core import (DependencyContainer, DependencyInstance, DependencyProvider,
+                           inject)
 from antidote.exceptions import (DependencyCycleError, DependencyInstantiationError,
                                  DependencyNotFoundError)
 from .utils import DummyFactoryProvider, DummyProvider
@@ -64,6 +66,17 @@ def test_update(container: DependencyContainer):
     assert x is container.get('x')
 
 
+def test_singletons_listener(container: DependencyContainer):
+    updates = []
+    container.add_singletons_listener(updates.append)
+    container.update_singletons({'x': 1})
+    container.update_singletons({'y': 2, 'z': 3})
+    assert [{'x': 1}, {'y': 2, 'z': 3}] == updates
+
+    with pytest.raises(TypeError):
+        container.add_singletons_listener(object())
+
+
 def test_register_provider(container: DependencyContainer):
     provider = DummyProvider()
     container.register_provider(provider)
@@ -185,3 +198,80 @@ def test_bound_dependency_types_conflict():
 
     with pytest.raises(RuntimeError):
         container.register_provider(DummyProvider2(container))
+
+
+def test_thread_local(container: DependencyContainer):
+    class ThreadLocalProvider(DependencyProvider):
+        def provide(self, dependency):
+            if dependency is Service:
+                return DependencyInstance(Service(), thread_local=True)
+
+    container.register_provider(ThreadLocalProvider(container))
+    service = container.get(Service)
+    assert service is container.get(Service)
+    assert Service not in container.singletons
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(container.get(Service)))
+    thread.start()
+    thread.join()
+    assert isinstance(other[0], Service)
+    assert other[0] is not service
+    assert service is container.get(Service)
+
+
+def test_concurrent(container: DependencyContainer):
+    barrier = threading.Barrier(2, timeout=5)
+
+    class ConcurrentProvider(DependencyProvider):
+        def provide(self, dependency):
+            if dependency is Service:
+                # Both threads must be instantiating it at the same time.
+                barrier.wait()
+                return DependencyInstance(Service())
+            if dependency is AnotherService:
+                return DependencyInstance(AnotherService(container.get(AnotherService)))
+
+    provider = ConcurrentProvider(container)
+    container.register_provider(provider)
+    container.register_concurrent(Service, provider)
+    container.register_concurrent(AnotherService, provider)
+
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(container.get(Service)))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 2 == len(services)
+    assert services[0] is not services[1]
+
+    with pytest.raises(DependencyCycleError):
+        container.get(AnotherService)
+
+    with pytest.raises(TypeError):
+        container.register_concurrent(Service, object())
+
+
+def test_memory_report(container: DependencyContainer):
+    class EmptyProvider(DependencyProvider):
+        def provide(self, dependency):
+            return None
+
+    container.register_provider(EmptyProvider(container))
+    report = container.memory_report()
+    assert ['container', 'singletons', 'injection', 'EmptyProvider'] == list(report)
+    assert all(isinstance(size, int) and size > 0
+               for name, size in report.items()
+               if name != 'injection')
+
+    container.update_singletons({i: Service() for i in range(100)})
+    assert container.memory_report()['singletons'] > report['singletons']
+
+    @inject(dependencies=(Service,), container=container)
+    def f(service):
+        return service
+
+    assert container.memory_report()['injection'] > report['injection']
+    assert report['injection'] == DependencyContainer().memory_report()['injection']
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from antidote.core import Pool, PoolSpec
+from antidote.exceptions import PoolTimeoutError
+
+
+class Connection:
+    def __init__(self):
+        self.healthy = True
+
+
+@pytest.mark.parametrize('kwargs,error', [
+    (dict(min=-1), ValueError),
+    (dict(min='1'), ValueError),
+    (dict(max=0), ValueError),
+    (dict(min=4, max=2), ValueError),
+    (dict(timeout=-1), ValueError),
+    (dict(validate=object()), TypeError),
+])
+def test_invalid_spec(kwargs, error):
+    with pytest.raises(error):
+        PoolSpec(**kwargs)
+
+
+def test_prefill():
+    pool = Pool(PoolSpec(min=2, max=4), Connection)
+    assert 2 == pool.size
+    assert 2 == pool.idle
+
+    connections = [pool.acquire() for _ in range(4)]
+    assert 4 == len(set(map(id, connections)))
+    assert 4 == pool.size
+    assert 0 == pool.idle
+
+    for connection in connections:
+        pool.release(connection)
+    assert 4 == pool.idle
+    assert 'size=4' in repr(pool)
+
+
+def test_reuse():
+    pool = Pool(PoolSpec(max=2), Connection)
+    with pool.lease() as connection:
+        pass
+    with pool.lease() as other:
+        assert connection is other
+    assert 1 == pool.size
+
+
+def test_timeout():
+    pool = Pool(PoolSpec(max=1, timeout=0.01), Connection)
+    connection = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    pool.release(connection)
+    assert connection is pool.acquire()
+
+
+def test_wait_for_release():
+    pool = Pool(PoolSpec(max=1, timeout=5), Connection)
+    connection = pool.acquire()
+    acquired = []
+
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    thread.start()
+    pool.release(connection)
+    thread.join()
+
+    assert [connection] == acquired
+
+
+def test_validate():
+    def validate(connection):
+        if connection.healthy is None:
+            raise RuntimeError()
+        return connection.healthy
+
+    pool = Pool(PoolSpec(min=2, max=2, validate=validate), Connection)
+    first = pool.acquire()
+    second = pool.acquire()
+    first.healthy = False
+    second.healthy = None
+    pool.release(first)
+    pool.release(second)
+
+    connection = pool.acquire()
+    assert connection is not first and connection is not second
+    assert 1 == pool.size
+
+
+def test_factory_failure():
+    def fail():
+        raise RuntimeError()
+
+    pool = Pool(PoolSpec(max=1), fail)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert 0 == pool.size
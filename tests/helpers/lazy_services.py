@@ -0,0 +1,24 @@
+"""
+Module imported lazily by the tests of register_lazy(), it must not be imported
+anywhere else.
+"""
+
+
+class LazyService:
+    def __init__(self, name):
+        self.name = name
+
+
+class LazyBuiltService:
+    def __init__(self, name=None):
+        self.name = name
+
+    @classmethod
+    def build(cls, name):
+        return cls(name='built ' + name)
+
+    class Nested:
+        pass
+
+
+not_a_class = object()
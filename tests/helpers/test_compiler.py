@@ -0,0 +1,263 @@
+import importlib
+import itertools
+import sys
+import textwrap
+import types
+
+import pytest
+
+from antidote import Build, compile_container, load_compiled, new_container, register
+from antidote.__main__ import main
+from antidote.core import DependencyContainer
+from antidote.exceptions import DependencyCycleError, DependencyNotFoundError
+from antidote.providers import FactoryProvider
+
+APP = textwrap.dedent('''
+    import enum
+
+    from antidote import factory, new_container, register
+
+    container = new_container()
+    container.update_singletons({'name': 'app'})
+
+
+    class Mode(enum.Enum):
+        FAST = 1
+
+
+    @register(container=container)
+    class Config:
+        pass
+
+
+    @register(container=container, singleton=False,
+              dependencies=dict(name='name'))
+    class Service:
+        def __init__(self, config: Config, name: str):
+            self.config = config
+            self.name = name
+
+
+    class Product:
+        def __init__(self, config, service=None):
+            self.config = config
+            self.service = service
+
+
+    @factory(container=container, singleton=False)
+    def build_product(config: Config, service: Service) -> Product:
+        return Product(config, service)
+
+
+    class Client:
+        def __init__(self, config):
+            self.config = config
+
+
+    @factory(container=container)
+    class ClientFactory:
+        def __call__(self, config: Config) -> Client:
+            return Client(config)
+
+
+    @register(container=container, factory='build')
+    class Widget:
+        def __init__(self, config):
+            self.config = config
+
+        @staticmethod
+        def build(cls, config: Config):
+            return cls(config)
+
+
+    class Right:
+        def __init__(self, left):
+            pass
+
+
+    @register(container=container, singleton=False)
+    class Left:
+        def __init__(self, right: Right):
+            pass
+
+
+    register(Right, container=container, singleton=False,
+             dependencies=dict(left=Left))
+''')
+
+_counter = itertools.count()
+
+
+@pytest.fixture()
+def app(tmp_path):
+    name = 'compiled_app_{}'.format(next(_counter))
+    (tmp_path / (name + '.py')).write_text(APP)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        yield importlib.import_module(name)
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop(name, None)
+
+
+def load(source: str, container):
+    module = types.ModuleType('compiled')
+    exec(compile(source, 'compiled.py', 'exec'), module.__dict__)
+    load_compiled(module, container)
+    return module
+
+
+def test_compiled(app):
+    source = compile_container(app.container)
+    compiled = load(source, app.container)
+    container = app.container
+
+    config = container.get(app.Config)
+    assert config is compiled.get_0()
+    assert config is container.get(app.Config)
+
+    service = container.get(app.Service)
+    assert isinstance(service, app.Service)
+    assert service is not container.get(app.Service)
+    assert service.config is config
+    assert 'app' == service.name
+
+    product = container.get(app.Product)
+    assert product is not container.get(app.Product)
+    assert product.config is config
+    assert isinstance(product.service, app.Service)
+
+    client = container.get(app.Client)
+    assert client is container.get(app.Client)
+    assert client.config is config
+
+    widget = container.get(app.Widget)
+    assert isinstance(widget, app.Widget)
+    assert widget.config is config
+
+
+def test_build(app):
+    load(compile_container(app.container), app.container)
+    config = app.Config()
+
+    service = app.container.get(Build(app.Service, config=config))
+    assert service.config is config
+    assert 'app' == service.name
+
+    assert app.container.get(Build(app.Widget, config=config)).config is config
+
+
+def test_compiled_singletons_are_shared(app):
+    config = app.container.get(app.Config)
+    compiled = load(compile_container(app.container), app.container)
+
+    assert config is compiled.get_0()
+    assert config is app.container.get(app.Service).config
+
+
+def test_compiled_overridden_singletons(app):
+    compiled = load(compile_container(app.container), app.container)
+    config = app.container.get(app.Config)
+    assert config is app.container.get(app.Client).config
+
+    mock = object()
+    app.container.update_singletons({app.Config: mock})
+    assert mock is compiled.get_0()
+    assert mock is app.container.get(app.Service).config
+    assert mock is app.container.get(app.Product).config
+
+    service = app.Service(config, 'mock')
+    app.container.update_singletons({app.Service: service})
+    assert service is app.container.get(app.Product).service
+    # Previous overrides are kept.
+    assert mock is app.container.get(app.Product).config
+
+
+def test_compiled_direct_calls(app):
+    source = compile_container(app.container)
+    # build_product is called without its injection, unlike Service which needs
+    # a dependency which is not compiled.
+    assert '_w2 = _f2.__wrapped__' in source
+    assert '_w1' not in source
+
+    compiled = load(source, app.container)
+    assert app.Product in compiled.FACTORIES
+    # Left to the container, which injects it faster.
+    assert app.Service not in compiled.FACTORIES
+    config = app.container.get(app.Config)
+    assert config is compiled._s0
+    assert compiled._MISSING is compiled._s1
+    product = app.container.get(app.Product)
+    assert product.config is config
+    assert 'app' == product.service.name
+
+    other = app.Config()
+    product = app.container.get(Build(app.Product, config=other))
+    assert product.config is other
+    assert product.service.config is config
+
+
+def test_not_compiled(app):
+    class Local:
+        pass
+
+    app.container.providers[FactoryProvider].register_class(Local)
+    source = compile_container(app.container)
+
+    assert 'Local' not in source
+    assert 'Left' not in source
+    assert 'Right' not in source
+
+    load(source, app.container)
+    assert isinstance(app.container.get(Local), Local)
+    with pytest.raises(DependencyCycleError):
+        app.container.get(app.Left)
+
+
+def test_references(app):
+    provider = app.container.providers[FactoryProvider]
+    dependencies = ['literal', app.Mode.FAST, ('tuple', 1.5, None, b'x')]
+    for dependency in dependencies:
+        provider.register_factory(dependency, dict, singleton=False)
+    provider.register_factory(float('nan'), dict)
+
+    source = compile_container(app.container)
+    assert 'Mode.FAST' in source
+    assert "('tuple', 1.5, None, b'x', )" in source
+    assert 'nan' not in source
+
+    load(source, app.container)
+    for dependency in dependencies:
+        assert {} == app.container.get(dependency)
+
+
+def test_no_factory_provider():
+    with pytest.raises(ValueError):
+        compile_container(DependencyContainer())
+
+
+def test_update_factory():
+    container = new_container()
+
+    @register(container=container, singleton=False)
+    class Service:
+        pass
+
+    provider = container.providers[FactoryProvider]
+    provider.update_factory(Service, lambda dependency: dependency, True)
+    assert Service is container.get(Service)
+
+    with pytest.raises(TypeError):
+        provider.update_factory(Service, object())
+
+    with pytest.raises(DependencyNotFoundError):
+        provider.update_factory(object(), lambda: None)
+
+
+def test_main(app, tmp_path, capsys):
+    output = tmp_path / 'compiled.py'
+    assert 0 == main(['compile', app.__name__ + ':container', '-o', str(output)])
+    assert compile_container(app.container) == output.read_text()
+
+    assert 0 == main(['compile', app.__name__ + ':container'])
+    assert output.read_text() == capsys.readouterr().out
@@ -1,7 +1,7 @@
 import pytest
 
 from antidote.core import DependencyContainer
-from antidote.helpers.constants import LazyConstantsMeta
+from antidote.helpers.constants import invalidate_constants, LazyConstantsMeta
 from antidote.providers import LazyCallProvider, FactoryProvider
 
 
@@ -49,3 +49,66 @@ def test_private(container: DependencyContainer):
     conf = Conf()
     assert 'a' == conf._A
     assert 'b' == conf.b
+
+
+def test_batch(container: DependencyContainer):
+    calls = []
+
+    class Conf(metaclass=LazyConstantsMeta, container=container,
+               lazy_batch_method='get_many'):
+        A = 'a'
+        B = 'b'
+
+        def get(self, key):
+            return key * 2
+
+        def get_many(self, keys):
+            calls.append(keys)
+            return [key * 3 for key in keys]
+
+    assert 'bbb' == container.get(Conf.B)
+    assert 'aaa' == container.get(Conf.A)
+    assert [['a', 'b']] == calls
+    assert 'aa' == Conf().A
+
+
+def test_missing_batch_method(container: DependencyContainer):
+    with pytest.raises(ValueError):
+        class Conf(metaclass=LazyConstantsMeta, container=container,
+                   lazy_batch_method='get_many'):
+            A = 'a'
+
+            def get(self, key):
+                return key
+
+
+def test_memoize(container: DependencyContainer):
+    calls = []
+
+    class Conf(metaclass=LazyConstantsMeta, container=container,
+               lazy_memoize=True):
+        A = 'a'
+        B = 'b'
+
+        def get(self, key):
+            calls.append(key)
+            return key * 2
+
+    conf = Conf()
+    assert 'aa' == conf.A
+    assert 'aa' == conf.A
+    assert 'bb' == conf.B
+    assert ['a', 'b'] == calls
+
+    invalidate_constants(conf, 'A')
+    assert 'aa' == conf.A
+    assert 'bb' == conf.B
+    assert ['a', 'b', 'a'] == calls
+
+    invalidate_constants(conf)
+    assert 'aa' == conf.A
+    assert 'bb' == conf.B
+    assert ['a', 'b', 'a', 'a', 'b'] == calls
+
+    with pytest.raises(ValueError):
+        invalidate_constants(conf, 'get')
@@ -1,6 +1,6 @@
 import pytest
 
-from antidote import factory
+from antidote import Build, factory, Tagged
 from antidote.core import DependencyContainer
 from antidote.providers import FactoryProvider, TagProvider
 
@@ -68,3 +68,37 @@ def test_missing_return_type_hint(container):
 def test_invalid_func(func):
     with pytest.raises(TypeError):
         factory(func)
+
+
+def test_build_cache_size(container: DependencyContainer):
+    @factory(container=container, build_cache_size=1)
+    def build(x=None) -> Service:
+        return Service()
+
+    service = container.get(Build(Service, x=1))
+    assert service is container.get(Build(Service, x=1))
+    container.get(Build(Service, x=2))
+    assert service is not container.get(Build(Service, x=1))
+
+
+def test_outputs(container: DependencyContainer):
+    calls = []
+
+    @factory(container=container, outputs=['host', 'port'], tags=['config'])
+    def load_config():
+        calls.append(1)
+        return dict(host='localhost', port=80)
+
+    assert 80 == container.get('port')
+    assert 'localhost' == container.get('host')
+    assert 1 == len(calls)
+    assert ['host', 'port'] == sorted(container.get(Tagged('config')).dependencies())
+
+    with pytest.raises(ValueError):
+        factory(container=container, outputs=['a'], singleton=False)
+
+    with pytest.raises(TypeError):
+        @factory(container=container, outputs=['a'])
+        class ConfigFactory:
+            def __call__(self):
+                return dict(a=1)
@@ -49,6 +49,28 @@ def test_implements_profile(container: DependencyContainer):
     assert container.get(IService) is container.get(ServiceA)
 
 
+def test_implements_cache_state(container: DependencyContainer):
+    @implements(IService, state=Profile.A, cache_state=True, container=container)
+    @register(container=container)
+    class ServiceA(IService):
+        pass
+
+    @implements(IService, state=Profile.B, container=container)
+    @register(container=container)
+    class ServiceB(IService):
+        pass
+
+    profile = Profile.A
+    container.providers[FactoryProvider].register_factory(
+        Profile, lambda: profile, singleton=False)
+
+    assert container.get(IService) is container.get(ServiceA)
+    profile = Profile.B
+    assert container.get(IService) is container.get(ServiceA)
+    container.providers[IndirectProvider].notify_state_change(Profile)
+    assert container.get(IService) is container.get(ServiceB)
+
+
 def test_invalid_implements(container: DependencyContainer):
     with pytest.raises(TypeError):
         @implements(IService, container=container)
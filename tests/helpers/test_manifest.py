@@ -0,0 +1,230 @@
+import importlib
+import os
+import pickle
+import sys
+import textwrap
+
+import pytest
+
+from antidote import factory, inject, manifest, new_container
+from antidote._internal import argspec
+from antidote._internal.argspec import Arguments
+from antidote._internal.manifest import current_manifest, Manifest
+
+
+class Service:
+    pass
+
+
+def injected(service: Service, x: int = 1, *args, **kwargs) -> Service:
+    return service
+
+
+class Dummy:
+    def method(self, service: Service):
+        pass
+
+    @classmethod
+    def klass(cls, service: Service):
+        pass
+
+    @property
+    def prop(self):
+        pass
+
+    @prop.setter
+    def prop(self, value: Service):
+        pass
+
+
+def forbid_analysis(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Analysis should come from the manifest")
+
+    monkeypatch.setattr(argspec.inspect, 'signature', fail)
+    monkeypatch.setattr(argspec, 'get_type_hints', fail)
+
+
+@pytest.fixture()
+def path(tmp_path):
+    return str(tmp_path / 'manifest.antidote')
+
+
+@pytest.mark.parametrize(
+    'func',
+    [
+        injected,
+        Dummy.method,
+        Dummy.__dict__['klass'],
+        Dummy.prop.fget,
+        Dummy.prop.fset,
+    ]
+)
+def test_cached_arguments(path, monkeypatch, func):
+    with manifest(path):
+        expected = Arguments.from_callable(func)
+
+    assert os.path.exists(path)
+
+    forbid_analysis(monkeypatch)
+    with manifest(path):
+        arguments = Arguments.from_callable(func)
+
+    assert repr(expected) == repr(arguments)
+    assert expected.has_self == arguments.has_self
+    assert expected.return_type_hint is arguments.return_type_hint
+    assert [arg.type_hint for arg in expected] == [arg.type_hint for arg in arguments]
+
+
+def test_bound_method(path, monkeypatch):
+    with manifest(path):
+        bound = Arguments.from_callable(Dummy().method)
+        unbound = Arguments.from_callable(Dummy.method)
+        class_bound = Arguments.from_callable(Dummy.klass)
+
+    assert ['service'] == [arg.name for arg in bound]
+    assert ['self', 'service'] == [arg.name for arg in unbound]
+    assert ['service'] == [arg.name for arg in class_bound]
+
+    forbid_analysis(monkeypatch)
+    with manifest(path):
+        assert repr(unbound) == repr(Arguments.from_callable(Dummy.method))
+        assert repr(bound) == repr(Arguments.from_callable(Dummy().method))
+        assert repr(class_bound) == repr(Arguments.from_callable(Dummy.klass))
+        # Not shared with the bound class method.
+        with pytest.raises(AssertionError):
+            Arguments.from_callable(Dummy.__dict__['klass'].__func__)
+
+
+def test_injection(path, monkeypatch):
+    container = new_container()
+    service = Service()
+    container.update_singletons({Service: service})
+
+    with manifest(path):
+        inject(injected, container=container)
+
+    forbid_analysis(monkeypatch)
+    with manifest(path):
+        f = inject(injected, container=container)
+        factory(injected, container=new_container())
+
+    assert service is f()
+
+
+def test_nested(path):
+    def local(service: Service):
+        pass
+
+    with manifest(path):
+        assert current_manifest() is not None
+        Arguments.from_callable(local)
+        Arguments.from_callable(lambda service: None)
+
+    assert current_manifest() is None
+    assert not os.path.exists(path)
+
+
+def test_unpicklable(path, monkeypatch):
+    class Local:
+        pass
+
+    m = Manifest(path)
+    m.set(injected, Local)
+    assert m.get(injected) is None
+
+    m.set(injected, Service)
+    assert Service is m.get(injected)
+
+    # Referenced type does not exist anymore
+    monkeypatch.delattr(sys.modules[__name__], 'Service')
+    assert m.get(injected) is None
+
+
+def test_invalidation(tmp_path, monkeypatch, path):
+    module_path = tmp_path / 'manifest_module.py'
+    module_path.write_text(textwrap.dedent("""
+        def f(x: int):
+            pass
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module('manifest_module')
+
+    with manifest(path):
+        assert int is Arguments.from_callable(module.f)['x'].type_hint
+
+    module_path.write_text(textwrap.dedent("""
+        def f(x: str, y: str):
+            pass
+    """))
+    module = importlib.reload(module)
+
+    with manifest(path):
+        arguments = Arguments.from_callable(module.f)
+        assert str is arguments['x'].type_hint
+        assert 'y' in arguments
+
+    sys.modules.pop('manifest_module')
+
+
+def test_invalidation_type_hints(tmp_path, monkeypatch, path):
+    hints_path = tmp_path / 'manifest_hints.py'
+    hints_path.write_text(textwrap.dedent("""
+        class A:
+            pass
+
+        class B:
+            pass
+
+        Alias = A
+    """))
+    (tmp_path / 'manifest_module.py').write_text(textwrap.dedent("""
+        from typing import List
+        from manifest_hints import Alias
+
+        def f(x: Alias, y: List[Alias]):
+            pass
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    hints = importlib.import_module('manifest_hints')
+    module = importlib.import_module('manifest_module')
+
+    with manifest(path):
+        assert hints.A is Arguments.from_callable(module.f)['x'].type_hint
+
+    hints_path.write_text(textwrap.dedent("""
+        class A:
+            pass
+
+        class B:
+            pass
+
+        Alias = B  # changed
+    """))
+    hints = importlib.reload(hints)
+    module = importlib.reload(module)
+
+    with manifest(path):
+        assert hints.B is Arguments.from_callable(module.f)['x'].type_hint
+
+    sys.modules.pop('manifest_module')
+    sys.modules.pop('manifest_hints')
+
+
+@pytest.mark.parametrize('content', [b'', b'garbage', pickle.dumps(((0, ''), {}))])
+def test_invalid_file(path, content):
+    with open(path, 'wb') as file:
+        file.write(content)
+
+    with manifest(path):
+        Arguments.from_callable(injected)
+
+    assert Manifest.load(path).get(injected) is not None
+
+
+def test_write_failure(tmp_path):
+    path = str(tmp_path / 'missing' / 'manifest.antidote')
+
+    with pytest.warns(UserWarning):
+        with manifest(path):
+            Arguments.from_callable(injected)
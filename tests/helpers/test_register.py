@@ -1,9 +1,13 @@
-from typing import cast
+import gc
+import sys
+import threading
+import weakref
 
 import pytest
 
-from antidote import register
-from antidote.core import DependencyContainer
+from antidote import inject, PoolSpec, register, register_lazy, Tagged
+from antidote.core import DependencyContainer, Pool
+from antidote.exceptions import DependencyInstantiationError
 from antidote.providers import FactoryProvider, TagProvider
 
 
@@ -116,3 +120,262 @@ def test_invalid_factory_wiring():
         @register(factory='build', wire_super=False)
         class Dummy2(NewDummy):
             pass
+
+
+LAZY_MODULE = 'tests.helpers.lazy_services'
+
+
+@pytest.fixture()
+def lazy_module():
+    sys.modules.pop(LAZY_MODULE, None)
+    yield LAZY_MODULE
+    sys.modules.pop(LAZY_MODULE, None)
+
+
+def test_lazy(container: DependencyContainer, lazy_module):
+    container.update_singletons(dict(name='lazy'))
+    dependency = register_lazy(lazy_module + ':LazyService',
+                               dependencies=dict(name='name'),
+                               container=container)
+
+    assert lazy_module + ':LazyService' == dependency
+    assert lazy_module not in sys.modules
+
+    service = container.get(dependency)
+    assert lazy_module in sys.modules
+    assert 'LazyService' == type(service).__name__
+    assert 'lazy' == service.name
+    assert service is container.get(dependency)
+
+
+def test_lazy_options(container: DependencyContainer, lazy_module):
+    container.update_singletons(dict(name='service'))
+    built = register_lazy(lazy_module + ':LazyBuiltService',
+                          factory='build',
+                          use_names=True,
+                          singleton=False,
+                          tags=['lazy'],
+                          container=container)
+    nested = register_lazy(lazy_module + ':LazyBuiltService.Nested',
+                           container=container)
+
+    assert lazy_module not in sys.modules
+    assert [built] == list(container.get(Tagged('lazy')).dependencies())
+    assert lazy_module not in sys.modules
+
+    assert 'built service' == container.get(built).name
+    assert container.get(built) is not container.get(built)
+    nested_class = sys.modules[lazy_module].LazyBuiltService.Nested
+    assert type(container.get(nested)) is nested_class
+
+
+def test_lazy_function_factory(container: DependencyContainer, lazy_module):
+    dependency = register_lazy(lazy_module + ':LazyService',
+                               factory=lambda cls: cls(name='factory'),
+                               container=container)
+
+    assert 'factory' == container.get(dependency).name
+
+
+@pytest.mark.parametrize(
+    'error,import_path,kwargs',
+    [
+        (TypeError, object(), dict()),
+        (ValueError, LAZY_MODULE, dict()),
+        (ValueError, ':LazyService', dict()),
+        (ValueError, LAZY_MODULE + ':', dict()),
+        (ValueError, LAZY_MODULE + ':Lazy:Service', dict()),
+        (TypeError, LAZY_MODULE + ':LazyService', dict(factory=object())),
+    ]
+)
+def test_invalid_lazy(container: DependencyContainer, error, import_path, kwargs):
+    with pytest.raises(error):
+        register_lazy(import_path, container=container, **kwargs)
+
+
+@pytest.mark.parametrize(
+    'name,error',
+    [
+        ('not_a_class', TypeError),
+        ('Missing', AttributeError)
+    ]
+)
+def test_lazy_invalid_target(container: DependencyContainer, lazy_module, name, error):
+    dependency = register_lazy(lazy_module + ':' + name, container=container)
+
+    with pytest.raises(DependencyInstantiationError) as exc_info:
+        container.get(dependency)
+
+    assert isinstance(exc_info.value.__cause__, error)
+
+
+def test_pool(container: DependencyContainer):
+    @register(container=container, pool=PoolSpec(min=1, max=2))
+    class Connection:
+        pass
+
+    @inject(container=container)
+    def f(connection: Connection):
+        return connection
+
+    @inject(container=container)
+    def g(first: Connection, second: Connection):
+        assert first is not second
+        return first, second
+
+    pool = container.get(Connection)
+    assert isinstance(pool, Pool)
+    assert 1 == pool.size
+
+    connection = f()
+    assert isinstance(connection, Connection)
+    assert connection is f()
+    assert 1 == pool.idle
+
+    g()
+    assert 2 == pool.size
+    assert 2 == pool.idle
+
+    with pool.lease() as leased:
+        assert leased is not f()
+
+    explicit = Connection()
+    assert explicit is f(explicit)
+    assert 2 == pool.idle
+
+
+def test_pool_released_on_error(container: DependencyContainer):
+    @register(container=container, pool=PoolSpec(max=1, timeout=0))
+    class Connection:
+        pass
+
+    @inject(container=container)
+    def f(connection: Connection):
+        raise RuntimeError()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            f()
+    assert 1 == container.get(Connection).idle
+
+
+def test_pool_generator_coroutine(container: DependencyContainer):
+    @register(container=container, pool=PoolSpec(max=1))
+    class Connection:
+        pass
+
+    def generator(connection: Connection):
+        yield connection
+
+    async def coroutine(connection: Connection):
+        return connection
+
+    class Handler:
+        def generator(self, connection: Connection):
+            yield connection
+
+    # Their body is executed after the instances would have been given back.
+    for f in [generator, coroutine, Handler().generator]:
+        with pytest.raises(TypeError):
+            inject(f, container=container)()
+
+    assert 0 == container.get(Connection).size
+
+
+def test_pool_first_injection(container: DependencyContainer):
+    @register(container=container, pool=PoolSpec(max=1))
+    class Connection:
+        pass
+
+    @register(container=container, singleton=False)
+    class Request:
+        created = 0
+
+        def __init__(self):
+            Request.created += 1
+
+    @inject(container=container)
+    def f(request: Request, connection: Connection):
+        return request, connection
+
+    request, connection = f()
+    assert isinstance(connection, Connection)
+    # Dependencies injected before the pooled one are not provided twice.
+    assert 1 == Request.created
+
+
+def test_pool_init(container: DependencyContainer):
+    @register(container=container, pool=PoolSpec(max=1))
+    class Connection:
+        pass
+
+    @register(container=container)
+    class Repository:
+        def __init__(self, connection: Connection):
+            self.connection = connection
+
+    # The instance would be given back while still used by the repository.
+    with pytest.raises(DependencyInstantiationError) as exc_info:
+        container.get(Repository)
+
+    assert isinstance(exc_info.value.__cause__, TypeError)
+    assert 0 == container.get(Connection).size
+
+
+def test_invalid_pool(container: DependencyContainer):
+    with pytest.raises(TypeError):
+        register(container=container, pool=dict(max=1))
+
+
+def test_thread_local(container: DependencyContainer):
+    @register(container=container, thread_local=True)
+    class Session:
+        pass
+
+    session = container.get(Session)
+    assert session is container.get(Session)
+
+    sessions = []
+
+    def run():
+        sessions.append(weakref.ref(container.get(Session)))
+        assert sessions[-1]() is container.get(Session)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    gc.collect()
+    # Released once the thread exited.
+    assert sessions[0]() is None
+    assert session is container.get(Session)
+
+    with pytest.raises(ValueError):
+        register(container=container, thread_local=True, pool=PoolSpec())
+
+
+def test_concurrent(container: DependencyContainer):
+    barrier = threading.Barrier(2, timeout=5)
+
+    @register(container=container, singleton=False, concurrent=True)
+    class Request:
+        def __init__(self):
+            # Both threads must be instantiating it at the same time.
+            barrier.wait()
+
+    requests = []
+
+    def run():
+        requests.append(container.get(Request))
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 2 == len(requests)
+    assert requests[0] is not requests[1]
+
+    with pytest.raises(ValueError):
+        @register(container=container, concurrent=True)
+        class Singleton:
+            pass
@@ -0,0 +1,37 @@
+import sys
+
+from antidote import new_container, register, Tag
+from antidote._internal.memory import deep_sizeof
+from antidote.core import DependencyInstance
+
+
+class Service:
+    pass
+
+
+def test_deep_sizeof():
+    d = dict(a=[1, 2])
+    assert sys.getsizeof(d) + sys.getsizeof(d['a']) == deep_sizeof(d)
+    # Shared objects are only counted once.
+    assert deep_sizeof(d) == deep_sizeof(d, d['a'])
+    assert sys.getsizeof(d) == deep_sizeof(d, exclude=[d['a']])
+
+    # Objects which do not belong to Antidote are not counted.
+    objects = [Service(), object(), 'string']
+    assert sys.getsizeof(objects) == deep_sizeof(objects)
+    instance = DependencyInstance(Service())
+    assert deep_sizeof(instance) == deep_sizeof(DependencyInstance(object()))
+    assert deep_sizeof([instance]) == sys.getsizeof([instance]) + deep_sizeof(instance)
+
+
+def test_providers_memory_usage():
+    container = new_container()
+    report = container.memory_report()
+
+    for _ in range(10):
+        register(type('Service', (), {}), tags=[Tag('tag', x=1)], container=container)
+
+    new_report = container.memory_report()
+    assert new_report['FactoryProvider'] > report['FactoryProvider']
+    assert new_report['TagProvider'] > report['TagProvider']
+    assert new_report['IndirectProvider'] == report['IndirectProvider']
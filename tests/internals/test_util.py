@@ -1,4 +1,4 @@
-from antidote._internal.utils import SlotsReprMixin
+from antidote._internal.utils import freeze, SlotsReprMixin
 
 
 class DummySlot(SlotsReprMixin):
@@ -11,3 +11,11 @@ class DummySlot(SlotsReprMixin):
 
 def test_slot_repr_mixin():
     assert repr(DummySlot(1, 'test')) == "DummySlot(test=1, value='test')"
+
+
+def test_freeze():
+    frozen = freeze({'a': [1, {2, 3}], 'b': ({'c': None},)})
+    hash(frozen)
+    assert frozen == freeze({'b': ({'c': None},), 'a': [1, {3, 2}]})
+    assert frozen != freeze({'a': [1, {2}], 'b': ({'c': None},)})
+    assert 1 == freeze(1)
@@ -2,12 +2,16 @@
 Test only that the wrapper behaves nicely in all cases.
 Injection itself is tested through inject.
 """
+import gc
+import sys
 from typing import Any, List, Tuple
 
 import pytest
 
-from antidote._internal.wrapper import InjectedWrapper, Injection, InjectionBlueprint
+from antidote._internal.wrapper import build_blueprint, InjectedWrapper
 from antidote.core import DependencyContainer
+from antidote.core import container as container_module
+from antidote.core.container import dependency_slot
 from antidote.exceptions import DependencyNotFoundError
 
 default_container = DependencyContainer()
@@ -27,10 +31,7 @@ def easy_wrap(func=None,
     def wrapper(func):
         return InjectedWrapper(
             container=container or default_container,
-            blueprint=InjectionBlueprint(tuple([
-                Injection(arg_name, required, dependency)
-                for arg_name, required, dependency in arg_dependency
-            ])),
+            blueprint=build_blueprint(arg_dependency),
             wrapped=func
         )
 
@@ -243,3 +244,74 @@ def test_wrap(original, wrapped):
             wrapped.__self__
     else:
         assert func is wrapped.__self__
+
+
+def test_shared_blueprint():
+    blueprint = build_blueprint([('self', True, None),
+                                 ('x', True, 'x'),
+                                 ('y', False, None)])
+    assert ((1, 'x', 'x', True, dependency_slot('x')),) == blueprint.injections
+
+    # Only the injected arguments matter.
+    assert blueprint is build_blueprint([('cls', True, None),
+                                         ('x', True, 'x')])
+    assert blueprint is not build_blueprint([('x', True, 'x')])
+    assert blueprint is not build_blueprint([('self', True, None),
+                                             ('x', False, 'x')])
+
+    unhashable = build_blueprint([('x', True, ['x'])])
+    assert ((0, 'x', ['x'], True, sys.maxsize),) == unhashable.injections
+    assert unhashable is not build_blueprint([('x', True, ['x'])])
+
+
+def test_no_dict():
+    assert not hasattr(easy_wrap(g), '__dict__')
+    assert not hasattr(G().wrapped, '__dict__')
+
+
+def test_singleton_slots():
+    container = DependencyContainer()
+    container.update_singletons(dict(slot_x=sentinel))
+    wrapped = InjectedWrapper(container,
+                              build_blueprint([('x', True, 'slot_x')]),
+                              lambda x: x)
+
+    assert sentinel is wrapped()
+    assert sentinel is wrapped()  # retrieved from its slot
+
+    container.update_singletons(dict(slot_x=sentinel_2))
+    assert sentinel_2 is wrapped()
+    assert sentinel_2 is wrapped()
+
+
+def test_dependency_slot():
+    assert dependency_slot('slot_y') == dependency_slot('slot_y')
+    assert dependency_slot('slot_y') != dependency_slot('slot_z')
+
+    with pytest.raises(TypeError):
+        dependency_slot(['slot_y'])
+
+
+def test_dependency_slot_released():
+    container = DependencyContainer()
+    container.update_singletons(dict(slot_released=sentinel, slot_reused=sentinel_2))
+    gc.collect()
+    dependency_slot('slot_flush')  # frees the slots released so far.
+
+    wrapped = InjectedWrapper(container,
+                              build_blueprint([('x', True, 'slot_released')]),
+                              lambda x: x)
+    slot = wrapped.__antidote_blueprint__.injections[0][4]
+    assert sentinel is wrapped()
+    assert slot == build_blueprint([('x', True, 'slot_released')]).injections[0][4]
+
+    del wrapped
+    gc.collect()
+    reused = InjectedWrapper(container,
+                             build_blueprint([('x', True, 'slot_reused')]),
+                             lambda x: x)
+    # The dependency is not referenced anymore and its slot is reused.
+    assert 'slot_released' not in container_module._dependency_slots
+    assert slot == reused.__antidote_blueprint__.injections[0][4]
+    assert sentinel_2 is reused()
+    assert sentinel_2 is reused()
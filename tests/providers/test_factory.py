@@ -1,7 +1,9 @@
+import threading
+
 import pytest
 
-from antidote.core import DependencyContainer
-from antidote.exceptions import DuplicateDependencyError
+from antidote.core import DependencyContainer, PoolSpec, ProxyContainer
+from antidote.exceptions import DependencyInstantiationError, DuplicateDependencyError
 from antidote.providers.factory import Build, FactoryProvider
 
 
@@ -44,6 +46,19 @@ def test_build_eq_hash(wrapped, kwargs):
     assert repr(kwargs) in repr(b)
 
 
+def test_build_structural_eq_hash():
+    assert Build(Service, a=1, b=2) == Build(Service, b=2, a=1)
+    assert hash(Build(Service, a=1, b=2)) == hash(Build(Service, b=2, a=1))
+    assert Build(Service, a=1) != Build(Service, a=2)
+    assert Build(Service, a=1) != Build(AnotherService, a=1)
+
+    b = Build(Service, x=[1, {'y': {2}}])
+    assert hash(Build(Service, x=[1, {'y': {2}}])) == hash(b)
+    assert Build(Service, x=[1, {'y': {2}}]) == b
+    assert Build(Service, x=[1, {'y': {3}}]) != b
+    assert hash(Build(Service, x=[1, {'y': {3}}])) != hash(b)
+
+
 @pytest.mark.parametrize(
     'args,kwargs',
     [
@@ -139,3 +154,148 @@ def test_invalid_type(provider: FactoryProvider, kwargs):
 @pytest.mark.parametrize('dependency', ['test', Service, object()])
 def test_unknown_dependency(provider: FactoryProvider, dependency):
     assert provider.provide(dependency) is None
+
+
+def test_lazy_factory(provider: FactoryProvider):
+    loaded = []
+
+    def factory_loader():
+        loaded.append(True)
+        return Service
+
+    provider.register_lazy_factory('service', factory_loader=factory_loader,
+                                   singleton=False)
+    assert [] == loaded
+
+    assert isinstance(provider.provide('service').instance, Service)
+    assert isinstance(provider.provide('service').instance, Service)
+    assert [True] == loaded
+
+    with pytest.raises(DuplicateDependencyError):
+        provider.register_lazy_factory('service', factory_loader=factory_loader)
+
+    with pytest.raises(TypeError):
+        provider.register_lazy_factory('other', factory_loader=object())
+
+
+def test_build_cache(provider: FactoryProvider):
+    provider.register_class(Service, build_cache_size=2)
+
+    first = provider.provide(Build(Service, x=1))
+    assert first.singleton is False
+    assert first.instance is provider.provide(Build(Service, x=1)).instance
+
+    second = provider.provide(Build(Service, x=2)).instance
+    # x=1 is now the most recently used one, so x=2 is discarded.
+    provider.provide(Build(Service, x=1))
+    provider.provide(Build(Service, x=3))
+    assert first.instance is provider.provide(Build(Service, x=1)).instance
+    assert second is not provider.provide(Build(Service, x=2)).instance
+
+    assert Build(Service, x=1) not in provider._container.singletons
+    assert provider.provide(Service).singleton is True
+
+
+def test_concurrent_lazy_factory(provider: FactoryProvider):
+    barrier = threading.Barrier(2, timeout=5)
+    built = []
+
+    def build():
+        # Called without the container lock once loaded, so the second and
+        # third instantiations happen at the same time.
+        if built:
+            barrier.wait()
+        built.append(Service())
+        return built[-1]
+
+    provider.register_lazy_factory('service', factory_loader=lambda: build,
+                                   singleton=False, concurrent=True)
+    container = provider._container
+    container.get('service')
+
+    threads = [threading.Thread(target=container.get, args=('service',))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 3 == len(built)
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(singleton=False, pool=PoolSpec())])
+def test_invalid_concurrent(provider: FactoryProvider, kwargs):
+    with pytest.raises(ValueError):
+        provider.register_class(Service, concurrent=True, **kwargs)
+
+
+@pytest.mark.parametrize('size', [0, -1, 1.5])
+def test_invalid_build_cache_size(provider: FactoryProvider, size):
+    with pytest.raises(ValueError):
+        provider.register_class(Service, build_cache_size=size)
+
+
+def test_multi_factory(provider: FactoryProvider):
+    calls = []
+
+    def load(**kwargs):
+        calls.append(kwargs)
+        return dict(host='localhost', port=kwargs.get('port', 80), extra=None)
+
+    provider.register_multi_factory(['host', 'port'], load)
+    container = provider._container
+    assert 80 == container.get('port')
+    assert 'localhost' == container.get('host')
+    assert [{}] == calls
+    assert {'host', 'port'} <= set(container.singletons)
+    assert 'extra' not in container.singletons
+
+    assert 8080 == container.get(Build('port', port=8080))
+    assert 80 == container.get('port')
+
+    with pytest.raises(DuplicateDependencyError):
+        provider.register_multi_factory(['other', 'host'], load)
+    assert provider.provide('other') is None
+
+
+def test_multi_factory_overridden_output(provider: FactoryProvider):
+    provider.register_multi_factory(['host', 'port'],
+                                    lambda: dict(host='localhost', port=80))
+    container = provider._container
+    container.update_singletons(dict(port=9000))
+    assert 'localhost' == container.get('host')
+    assert 9000 == container.get('port')
+
+    proxy = ProxyContainer(container, dependencies=dict(host='proxy'))
+    assert 'proxy' == proxy.get('host')
+    assert 9000 == proxy.get('port')
+    assert 'localhost' == container.get('host')
+
+
+def test_multi_factory_proxy(provider: FactoryProvider):
+    calls = []
+
+    def load():
+        calls.append(None)
+        return dict(host='localhost', port=80)
+
+    provider.register_multi_factory(['host', 'port'], load)
+    container = provider._container
+    proxy = ProxyContainer(container, dependencies=dict(port=9000))
+    assert 'localhost' == proxy.get('host')
+    assert 9000 == proxy.get('port')
+    assert 80 == container.get('port')
+    assert 'host' not in container.singletons
+    assert 'localhost' == container.get('host')
+    assert [None] == calls
+
+
+def test_invalid_multi_factory(provider: FactoryProvider):
+    with pytest.raises(ValueError):
+        provider.register_multi_factory([], dict)
+
+    with pytest.raises(TypeError):
+        provider.register_multi_factory(['x'], object())
+
+    provider.register_multi_factory(['x', 'y'], lambda: dict(x=1))
+    with pytest.raises(DependencyInstantiationError):
+        provider._container.get('x')
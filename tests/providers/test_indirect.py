@@ -3,7 +3,8 @@ from enum import Enum
 import pytest
 
 from antidote.core import DependencyContainer
-from antidote.exceptions import DuplicateDependencyError, UndefinedContextError
+from antidote.exceptions import (DependencyCycleError, DuplicateDependencyError,
+                                 UndefinedContextError)
 from antidote.providers.indirect import IndirectProvider
 from antidote.providers.factory import FactoryProvider
 
@@ -163,3 +164,185 @@ def test_undefined_context(container: DependencyContainer,
 
     with pytest.raises(UndefinedContextError):
         interface_provider.provide(IService)
+
+
+def test_cached_targets(container: DependencyContainer,
+                        interface_provider: IndirectProvider,
+                        factory_provider: FactoryProvider):
+    factory_provider.register_class(ServiceA)
+    factory_provider.register_class(ServiceB, singleton=False)
+    interface_provider.register(IService, ServiceA, Profile.A)
+    interface_provider.register(IService, ServiceB, Profile.B)
+    calls = []
+    current_profile = Profile.A
+
+    def get_profile():
+        calls.append(current_profile)
+        return current_profile
+
+    factory_provider.register_factory(Profile, singleton=False, factory=get_profile)
+
+    service_a = interface_provider.provide(IService).instance
+    assert service_a is container.get(ServiceA)
+    # Singleton target is cached, but not the state.
+    assert service_a is interface_provider.provide(IService).instance
+    assert [Profile.A, Profile.A] == calls
+    # Overridden singletons are taken into account.
+    new_service_a = object()
+    container.update_singletons({ServiceA: new_service_a})
+    assert new_service_a is interface_provider.provide(IService).instance
+
+    current_profile = Profile.B
+    service_b = interface_provider.provide(IService).instance
+    assert isinstance(service_b, ServiceB)
+    assert service_b is not interface_provider.provide(IService).instance
+
+
+def test_cache_state(container: DependencyContainer,
+                     interface_provider: IndirectProvider,
+                     factory_provider: FactoryProvider):
+    class Other(Enum):
+        X = 'X'
+
+    class IOther:
+        pass
+
+    factory_provider.register_class(ServiceA)
+    factory_provider.register_class(ServiceB)
+    factory_provider.register_class(Service)
+    interface_provider.register(IService, ServiceA, Profile.A, cache_state=True)
+    interface_provider.register(IService, ServiceB, Profile.B)
+    interface_provider.register(IOther, Service, Other.X, cache_state=True)
+    calls = []
+    current_profile = Profile.A
+
+    def get_profile():
+        calls.append(current_profile)
+        return current_profile
+
+    def get_other():
+        calls.append(Other.X)
+        return Other.X
+
+    factory_provider.register_factory(Profile, singleton=False, factory=get_profile)
+    factory_provider.register_factory(Other, singleton=False, factory=get_other)
+
+    assert interface_provider.provide(IService).instance is container.get(ServiceA)
+    assert interface_provider.provide(IService).instance is container.get(ServiceA)
+    assert interface_provider.provide(IService).singleton is False
+    assert interface_provider.provide(IOther).instance is container.get(Service)
+    assert [Profile.A, Other.X] == calls
+
+    current_profile = Profile.B
+    assert interface_provider.provide(IService).instance is container.get(ServiceA)
+
+    interface_provider.notify_state_change(Profile)
+    assert interface_provider.provide(IService).instance is container.get(ServiceB)
+    assert interface_provider.provide(IOther).instance is container.get(Service)
+    assert [Profile.A, Other.X, Profile.B] == calls
+
+
+def test_state_var(container: DependencyContainer,
+                   interface_provider: IndirectProvider,
+                   factory_provider: FactoryProvider):
+    contextvars = pytest.importorskip('contextvars')
+    state_var = contextvars.ContextVar('state')
+    factory_provider.register_class(ServiceA)
+    interface_provider.register(IService, ServiceA, Profile.A)
+    interface_provider.register_state_var(Profile, state_var)
+    factory_provider.register_class(ServiceB, singleton=False)
+    interface_provider.register(IService, ServiceB, Profile.B)
+
+    with pytest.raises(UndefinedContextError):
+        interface_provider.provide(IService)
+
+    def get(profile):
+        state_var.set(profile)
+        return interface_provider.provide(IService)
+
+    result = contextvars.copy_context().run(get, Profile.A)
+    assert result.instance is container.get(ServiceA)
+    assert result.singleton is False
+    assert isinstance(contextvars.copy_context().run(get, Profile.B).instance, ServiceB)
+    result = contextvars.copy_context().run(get, Profile.A)
+    assert result.instance is container.get(ServiceA)
+
+    # Not used anymore
+    container.update_singletons({Profile: Profile.B})
+    result = contextvars.copy_context().run(get, Profile.A)
+    assert result.instance is container.get(ServiceA)
+
+    with pytest.raises(TypeError):
+        interface_provider.register_state_var(Profile, object())
+
+
+def test_link_chain(container: DependencyContainer,
+                    interface_provider: IndirectProvider,
+                    factory_provider: FactoryProvider):
+    class IBase:
+        pass
+
+    class IMiddle(IBase):
+        pass
+
+    class Final(IMiddle):
+        pass
+
+    class IStateful:
+        pass
+
+    factory_provider.register_class(Final)
+    interface_provider.register(IBase, IMiddle)
+    interface_provider.register(IStateful, IMiddle, Profile.A)
+    interface_provider.register(IMiddle, Final)
+    interface_provider.register(IService, IBase)
+    container.update_singletons({Profile: Profile.A})
+
+    final = container.get(IService)
+    assert isinstance(final, Final)
+    assert final is container.get(IStateful)
+    # Intermediate links are not resolved.
+    assert IBase not in container.singletons
+    assert IMiddle not in container.singletons
+    assert final is container.get(IBase)
+
+
+def test_link_chain_override(container: DependencyContainer,
+                             interface_provider: IndirectProvider,
+                             factory_provider: FactoryProvider):
+    factory_provider.register_class(Service)
+    interface_provider.register('a', 'b')
+    interface_provider.register('b', Service)
+    interface_provider.register('stateful', 'a', Profile.A)
+    container.update_singletons({Profile: Profile.A})
+
+    mock = object()
+    container.update_singletons({'b': mock})
+    assert mock is container.get('a')
+    assert mock is container.get('stateful')
+
+    # Links registered afterwards stop at the overridden dependency too.
+    interface_provider.register('c', 'a')
+    interface_provider.register('b2', 'b')
+    assert mock is container.get('c')
+    assert mock is container.get('b2')
+
+
+@pytest.mark.parametrize('links', [
+    [('a', 'a')],
+    [('a', 'b'), ('b', 'a')],
+    [('a', 'b'), ('b', 'c'), ('c', 'a')],
+    [('b', 'c'), ('a', 'b'), ('c', 'a')],
+])
+def test_link_cycle(interface_provider: IndirectProvider, links):
+    for dependency, target in links[:-1]:
+        interface_provider.register(dependency, target)
+
+    with pytest.raises(DependencyCycleError):
+        interface_provider.register(*links[-1])
+
+
+def test_stateful_link_cycle(interface_provider: IndirectProvider):
+    interface_provider.register('x', 'y')
+    with pytest.raises(DependencyCycleError):
+        interface_provider.register('y', 'x', Profile.A)
@@ -1,6 +1,7 @@
 import pytest
 
-from antidote.core import DependencyContainer
+from antidote.core import DependencyContainer, ProxyContainer
+from antidote.exceptions import DependencyInstantiationError
 from antidote.providers.lazy import LazyCall, LazyCallProvider, LazyMethodCall
 from antidote.providers.factory import FactoryProvider
 
@@ -108,7 +109,7 @@ def test_method_singleton(lazy_provider: LazyCallProvider,
 
     assert Test.A is Test.A
     assert True is lazy_provider.provide(Test.A).singleton
-    assert Test.B is not Test.B
+    assert Test.B is Test.B
     assert False is lazy_provider.provide(Test.B).singleton
 
 
@@ -148,3 +149,160 @@ def test_method_args_kwargs(lazy_provider: LazyCallProvider,
 
     assert (args, kwargs) == Test().A
     assert (args, kwargs) == lazy_provider.provide(Test.A).instance
+
+
+def test_method_batch(container: DependencyContainer,
+                      lazy_provider: LazyCallProvider,
+                      service_provider: FactoryProvider):
+    calls = []
+
+    @service_provider.register_class
+    class Test:
+        def get(self, key):
+            return key * 2
+
+        def get_many(self, keys):
+            calls.append(keys)
+            return [key * 3 for key in keys]
+
+        A = LazyMethodCall(get, batch_method=get_many)('a')
+        B = LazyMethodCall(get, batch_method='get_many')('b')
+        C = LazyMethodCall(get, batch_method='get_many')('c', 'd')
+        D = LazyMethodCall(get)('d')
+
+    container.update_singletons({Test.B: 'overridden'})
+
+    assert 'aaa' == container.get(Test.A)
+    assert [['a']] == calls
+    assert 'overridden' == container.get(Test.B)
+    assert 'dd' == container.get(Test.D)
+    assert 'aa' == Test().A
+
+    with pytest.raises(DependencyInstantiationError):
+        # Not batched as it has multiple arguments.
+        container.get(Test.C)
+    assert [['a']] == calls
+
+
+def test_method_batch_proxy(container: DependencyContainer,
+                            lazy_provider: LazyCallProvider,
+                            service_provider: FactoryProvider):
+    calls = []
+
+    @service_provider.register_class
+    class Test:
+        def get(self, key):
+            return key
+
+        def get_many(self, keys):
+            calls.append(keys)
+            return [object() for _ in keys]
+
+        A = LazyMethodCall(get, batch_method=get_many)('a')
+        B = LazyMethodCall(get, batch_method=get_many)('b')
+
+    proxy = ProxyContainer(container)
+    a = proxy.get(Test.A)
+    assert Test.A in proxy.singletons
+    # Batched singletons are not stored in the original container.
+    assert Test.A not in container.singletons
+    assert Test.B not in container.singletons
+
+    assert a is container.get(Test.A)
+    assert proxy.get(Test.B) is container.get(Test.B)
+    assert [['a', 'b']] == calls
+
+
+def test_method_batch_mismatch(lazy_provider: LazyCallProvider,
+                               service_provider: FactoryProvider):
+    @service_provider.register_class
+    class Test:
+        def get(self, key):
+            return key
+
+        def get_many(self, keys):
+            return []
+
+        A = LazyMethodCall(get, batch_method=get_many)('a')
+
+    with pytest.raises(ValueError):
+        lazy_provider.provide(Test.A)
+
+
+def test_method_memoize(lazy_provider: LazyCallProvider,
+                        service_provider: FactoryProvider):
+    calls = []
+
+    class Base:
+        def get(self, key):
+            calls.append(key)
+            return object()
+
+        A = LazyMethodCall(get, memoize=True)('a')
+        B = LazyMethodCall(get)('b')
+
+    class Test(Base):
+        pass
+
+    t = Test()
+    a = t.A
+    assert a is t.A
+    assert t.B is not t.B
+    assert ['a', 'b', 'b'] == calls
+    assert Test().A is not a
+
+    with pytest.raises(ValueError):
+        LazyMethodCall('get', singleton=False, memoize=True)
+
+
+def test_lazy_immutable(container: DependencyContainer,
+                        lazy_provider: LazyCallProvider):
+    def func(*args, **kwargs):
+        return object()
+
+    lazy = LazyCall(func)
+    a = lazy(1, x=[1])
+    b = lazy(2)
+    assert a is not lazy and b is not a
+
+    assert a == LazyCall(func)(1, x=[1])
+    assert hash(a) == hash(LazyCall(func)(1, x=[1]))
+    assert a != b
+    assert a != LazyCall(func, singleton=False)(1, x=[1])
+    assert a != LazyCall(lambda: None)(1, x=[1])
+
+    assert container.get(a) is container.get(LazyCall(func)(1, x=[1]))
+    assert container.get(a) is not container.get(b)
+
+
+def test_method_immutable(container: DependencyContainer,
+                          lazy_provider: LazyCallProvider,
+                          service_provider: FactoryProvider):
+    class Base:
+        def get(self, key):
+            return object()
+
+        get_lazily = LazyMethodCall(get)
+        A = get_lazily('a')
+        B = get_lazily('b')
+        C = LazyMethodCall('get')('a')
+        D = LazyMethodCall('get', singleton=False)('a')
+
+    class Test(Base):
+        pass
+
+    service_provider.register_class(Base)
+    service_provider.register_class(Test)
+
+    assert Base().A is not Base().B
+    assert Base.A == Base.C
+    assert hash(Base.A) == hash(Base.C)
+    assert Base.A != Base.B
+    assert Base.A != Base.D
+    assert Base.A != Test.A
+    assert Base.D is Base.D
+    assert Test.A is Test.A
+
+    assert container.get(Base.A) is container.get(Base.C)
+    assert container.get(Base.A) is not container.get(Test.A)
+    assert container.get(Base.D) is not container.get(Base.D)
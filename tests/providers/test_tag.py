@@ -1,9 +1,13 @@
+import itertools
+import threading
+
 import pytest
 from hypothesis import given, strategies as st
 
 from antidote import Tag, Tagged
-from antidote.core import DependencyContainer, DependencyInstance
-from antidote.exceptions import DependencyNotFoundError, DuplicateTagError
+from antidote.core import DependencyContainer, DependencyInstance, DependencyProvider
+from antidote.exceptions import (DependencyInstantiationError, DependencyNotFoundError,
+                                 DuplicateTagError)
 from antidote.providers.tag import TaggedDependencies, TagProvider
 
 
@@ -96,6 +100,115 @@ def test_tagged_dependencies_invalid_dependency():
         list(t.instances())
 
 
+class RecordingProvider(DependencyProvider):
+    def __init__(self, container):
+        super().__init__(container)
+        self.threads = []
+
+    def provide(self, dependency):
+        if isinstance(dependency, str) and dependency.startswith('x'):
+            self.threads.append(threading.current_thread())
+            if dependency == 'x_error':
+                raise RuntimeError()
+            return DependencyInstance(dependency.upper(),
+                                      singleton=dependency.endswith('s'))
+
+
+@pytest.mark.parametrize('max_workers', [None, 1, 4])
+def test_tagged_dependencies_parallel(max_workers):
+    c = DependencyContainer()
+    recording = RecordingProvider(c)
+    c.register_provider(recording)
+    dependencies = ['x{}'.format(i) for i in range(10)] + ['xs']
+    for dependency in dependencies[:-1]:
+        c.register_concurrent(dependency, recording)
+    t = TaggedDependencies(container=c,
+                           dependencies=dependencies,
+                           tags=[Tag('tag')] * len(dependencies))
+
+    expected = [d.upper() for d in dependencies]
+    assert expected == list(t.instances(parallel=True, max_workers=max_workers))
+    assert expected == list(t.instances())
+    assert len(dependencies) == len(recording.threads)
+    # Only the singleton is instantiated with the container's lock.
+    assert 1 == recording.threads.count(threading.current_thread())
+
+
+def test_tagged_dependencies_parallel_outside_lock():
+    c = DependencyContainer()
+    barrier = threading.Barrier(2, timeout=5)
+
+    class BarrierProvider(DependencyProvider):
+        def provide(self, dependency):
+            barrier.wait()
+            return DependencyInstance(dependency)
+
+    provider = BarrierProvider(c)
+    c.register_provider(provider)
+    c.register_concurrent('x1', provider)
+    c.register_concurrent('x2', provider)
+    t = TaggedDependencies(container=c,
+                           dependencies=['x1', 'x2'],
+                           tags=[Tag('tag')] * 2)
+
+    # Both must be instantiated at the same time to pass the barrier.
+    assert ['x1', 'x2'] == list(t.instances(parallel=True))
+
+
+def test_tagged_dependencies_as_completed():
+    c = DependencyContainer()
+    recording = RecordingProvider(c)
+    c.register_provider(recording)
+    dependencies = ['x{}'.format(i) for i in range(10)]
+    for dependency in dependencies[5:]:
+        c.register_concurrent(dependency, recording)
+    t = TaggedDependencies(container=c,
+                           dependencies=dependencies,
+                           tags=[Tag('tag')] * len(dependencies))
+
+    assert ['X0', 'X1'] == list(itertools.islice(t.instances(), 2))
+    instances = list(t.as_completed(max_workers=3))
+    assert ['X0', 'X1'] == instances[:2]
+    assert sorted(d.upper() for d in dependencies) == sorted(instances)
+    assert [d.upper() for d in dependencies] == list(t.instances())
+    assert [d.upper() for d in dependencies] == list(t.as_completed())
+
+
+def test_tagged_dependencies_parallel_error():
+    c = DependencyContainer()
+    c.register_provider(RecordingProvider(c))
+    t = TaggedDependencies(container=c,
+                           dependencies=['x1', 'x_error'],
+                           tags=[Tag('tag')] * 2)
+
+    with pytest.raises(DependencyInstantiationError):
+        list(t.instances(parallel=True))
+
+
+def test_tagged_dependencies_parallel_while_instantiating():
+    c = DependencyContainer()
+    recording = RecordingProvider(c)
+    c.register_provider(recording)
+    t = TaggedDependencies(container=c,
+                           dependencies=['x1', 'x2'],
+                           tags=[Tag('tag')] * 2)
+
+    class ParentProvider(DependencyProvider):
+        def provide(self, dependency):
+            if dependency == 'parent':
+                return DependencyInstance(list(t.instances(parallel=True)))
+            if dependency in {'x1', 'x2'}:
+                # Needs the lock held by the thread instantiating 'parent'.
+                return DependencyInstance(self._container.get('xs') + dependency)
+
+    parent = ParentProvider(c)
+    c.register_provider(parent)
+    c.register_concurrent('x1', parent)
+    c.register_concurrent('x2', parent)
+    assert ['XSx1', 'XSx2'] == c.get('parent')
+    assert [threading.current_thread()] == recording.threads
+
+
 def test_repr(provider: TagProvider):
     provider = TagProvider(DependencyContainer())
 
@@ -141,6 +254,141 @@ def test_provide_tags(provider: TagProvider):
     assert instances == set(tagged_dependencies.instances())
 
 
+def test_provide_cache(provider: TagProvider):
+    container = provider._container
+    container.update_singletons(dict(a=object(), b=object()))
+    provider.register('a', ['tag'])
+
+    first = provider.provide(Tagged('tag')).instance
+    # Not yet instantiated.
+    second = provider.provide(Tagged('tag')).instance
+    assert second is not first
+    assert [container.get('a')] == list(second.instances())
+    assert second is provider.provide(Tagged('tag')).instance
+
+    provider.register('b', ['tag'])
+    third = provider.provide(Tagged('tag')).instance
+    assert third is not second
+    assert ['a', 'b'] == list(third.dependencies())
+    assert [container.get('a'), container.get('b')] == list(third.instances())
+    assert third is provider.provide(Tagged('tag')).instance
+
+
+def test_provide_cache_overridden(provider: TagProvider):
+    container = provider._container
+    container.update_singletons(dict(a=object(), b=object()))
+    provider.register('a', ['tag'])
+    provider.register('b', ['other'])
+
+    first = provider.provide(Tagged('tag')).instance
+    list(first.instances())
+    other = provider.provide(Tagged('other')).instance
+    list(other.instances())
+
+    mock = object()
+    container.update_singletons(dict(a=mock))
+    assert [mock] == list(provider.provide(Tagged('tag')).instance.instances())
+    # Other tags are left untouched.
+    assert other is provider.provide(Tagged('other')).instance
+
+
+def test_provide_cache_non_singleton(provider: TagProvider):
+    class NonSingletonProvider(DependencyProvider):
+        def provide(self, dependency):
+            if dependency == 'non_singleton':
+                return DependencyInstance(object(), singleton=False)
+
+    container = provider._container
+    container.register_provider(NonSingletonProvider(container))
+    container.update_singletons(dict(a=object()))
+    provider.register('a', ['tag'])
+    provider.register('non_singleton', ['tag'])
+
+    first = provider.provide(Tagged('tag')).instance
+    instances = list(first.instances())
+    second = provider.provide(Tagged('tag')).instance
+    assert second is not first
+    assert instances[0] is list(second.instances())[0]
+    assert instances[1] is not list(second.instances())[1]
+    assert provider.provide(Tagged('tag')).instance is not second
+
+
+def test_provide_cache_parallel_non_singleton(provider: TagProvider):
+    container = provider._container
+    recording = RecordingProvider(container)
+    container.register_provider(recording)
+    provider.register('xs', ['tag'])
+    provider.register('x1', ['tag'])
+
+    first = provider.provide(Tagged('tag')).instance
+    second = provider.provide(Tagged('tag')).instance
+    assert ['XS', 'X1'] == list(second.instances(parallel=True))
+    # x1 is not a singleton, so the instances are not cached.
+    third = provider.provide(Tagged('tag')).instance
+    assert third is not second
+    assert third is not first
+    assert ['XS', 'X1'] == list(third.instances(parallel=True))
+    assert 3 == len(recording.threads)
+
+
+def test_provide_cache_size():
+    container = DependencyContainer()
+    provider = TagProvider(container=container, cache_size=2)
+    container.update_singletons(dict(a=object()))
+    provider.register('a', [Tag('tag', priority=1)])
+
+    def query(order_by):
+        tagged = Tagged('tag', order_by=order_by)
+        tagged_dependencies = provider.provide(tagged).instance
+        list(tagged_dependencies.instances())
+        return tagged_dependencies
+
+    first = query('priority')
+    assert first is query('priority')
+    second = query('-priority')
+    # Least recently used query is discarded first.
+    assert first is query('priority')
+    query('name')
+    assert first is query('priority')
+    assert second is not query('-priority')
+
+
+@pytest.mark.parametrize('cache_size', [0, -1, 1.5, None])
+def test_invalid_cache_size(cache_size):
+    with pytest.raises(ValueError):
+        TagProvider(DependencyContainer(), cache_size=cache_size)
+
+
+def test_provide_where_order_by(provider: TagProvider):
+    provider.register('a', [Tag('tag', event='click', priority=2)])
+    provider.register('b', [Tag('tag', event='key', priority=1)])
+    provider.register('c', [Tag('tag', event='click')])
+    provider.register('d', [Tag('tag', event='click', priority=1, data=[1])])
+    provider.register('e', [Tag('tag', priority=3, data=[2])])
+
+    def query(**kwargs):
+        return list(provider.provide(Tagged('tag', **kwargs)).instance.dependencies())
+
+    assert ['a', 'b', 'c', 'd', 'e'] == query()
+    assert ['a', 'c', 'd'] == query(where={'event': 'click'})
+    assert ['d'] == query(where={'event': 'click', 'priority': 1})
+    assert [] == query(where={'event': 'unknown'})
+    assert ['e'] == query(where={'event': None})
+    assert ['d'] == query(where={'data': [1]})
+    assert ['b', 'd', 'a', 'e', 'c'] == query(order_by='priority')
+    assert ['e', 'a', 'b', 'd', 'c'] == query(order_by='-priority')
+    assert ['d', 'a', 'c'] == query(where={'event': 'click'}, order_by='priority')
+
+    provider.register('f', [Tag('tag', event='click', priority=0)])
+    assert ['f', 'd', 'a', 'c'] == query(where={'event': 'click'}, order_by='priority')
+
+
+@pytest.mark.parametrize('order_by', ['', '-', object()])
+def test_invalid_order_by(order_by):
+    with pytest.raises((TypeError, ValueError)):
+        Tagged('tag', order_by=order_by)
+
+
 @pytest.mark.parametrize('tag', ['tag', Tag(name='tag')])
 def test_duplicate_tag_error(provider: TagProvider, tag):
     provider.register('test', [Tag(name='tag')])
@@ -0,0 +1,87 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from antidote import is_compiled, world
+
+try:
+    from concurrent import interpreters  # type: ignore  # Python 3.14+
+
+    def run_in_interpreter(code: str):
+        interpreter = interpreters.create()
+        try:
+            interpreter.exec(code)
+        finally:
+            interpreter.close()
+except ImportError:
+    interpreters = pytest.importorskip('_xxsubinterpreters')
+
+    def run_in_interpreter(code: str):
+        interpreter = interpreters.create()
+        try:
+            interpreters.run_string(interpreter, code)
+        finally:
+            interpreters.destroy(interpreter)
+
+pytestmark = pytest.mark.skipif(
+    is_compiled(),
+    reason="Cython extensions can only be loaded in one interpreter per process.")
+
+APP = """
+from antidote import inject, register
+
+
+@register
+class Service:
+    pass
+
+
+@inject
+def handler(service: Service):
+    return service
+"""
+
+CODE = """
+import sys
+sys.path[:0] = {paths!r}
+
+from antidote import manifest, world
+from antidote._internal import argspec
+
+if {forbid_analysis!r}:
+    def fail(*args, **kwargs):
+        raise AssertionError("Analysis should come from the manifest")
+
+    argspec.inspect.signature = fail
+    argspec.get_type_hints = fail
+
+# Each interpreter has its own world.
+assert 'interpreter' not in world.singletons
+world.update_singletons({{'interpreter': {index!r}}})
+
+with manifest({manifest!r}):
+    import subinterpreter_app
+
+assert subinterpreter_app.handler() is world.get(subinterpreter_app.Service)
+"""
+
+
+def test_container_per_interpreter(tmp_path):
+    with open(str(tmp_path / 'subinterpreter_app.py'), 'w') as file:
+        file.write(APP)
+    manifest = str(tmp_path / 'app.antidote')
+
+    for index in range(3):
+        run_in_interpreter(textwrap.dedent(CODE.format(
+            paths=[str(tmp_path)] + sys.path,
+            # Registrations are replayed from the manifest after the first one.
+            forbid_analysis=index > 0,
+            index=index,
+            manifest=manifest
+        )))
+        assert os.path.exists(manifest)
+
+    assert 'subinterpreter_app' not in sys.modules
+    assert 'interpreter' not in world.singletons
@@ -4,7 +4,7 @@ import time
 
 import pytest
 
-from antidote import Tagged, factory, new_container
+from antidote import Tagged, factory, inject, new_container, register
 from antidote.core import DependencyContainer
 from antidote.providers.tag import TaggedDependencies
 
@@ -87,3 +87,44 @@ def test_tagged_dependencies_instantiation_safety(container: DependencyContainer
 
     assert n_dependencies == len(set(dependencies))
     assert set(dependencies) == set(enumerate(tagged.instances()))
+
+
+def test_singleton_publication_stress():
+    n_threads = 16
+    container = new_container()
+    built = []
+
+    def __init__(self):
+        built.append(self)
+
+    services = [register(type('Service{}'.format(i), (), {'__init__': __init__}),
+                         tags=['stress'],
+                         container=container)
+                for i in range(50)]
+
+    @inject(dependencies=services[:3], container=container)
+    def f(a, b, c):
+        return [a, b, c]
+
+    barrier = threading.Barrier(n_threads)
+    results = []
+
+    def worker():
+        order = list(services)
+        random.shuffle(order)
+        barrier.wait()
+        instances = {s: container.get(s) for s in order}
+        results.append(([instances[s] for s in services],
+                        f(),
+                        list(container.get(Tagged('stress')).instances())))
+
+    multi_thread_do(worker, n_threads)
+
+    assert n_threads == len(results)
+    assert len(services) == len(built)
+    # Every singleton has been instantiated once and seen by all threads.
+    for instances, injected, tagged in results:
+        assert results[0][0] == instances
+        assert set(built) == set(instances)
+        assert instances[:3] == injected
+        assert set(instances) == set(tagged)